@@ -0,0 +1,111 @@
+"""Compare summarization inference backends on a fixed corpus.
+
+Every backend summarizes the same documents; latency and throughput are
+measured per backend and summary quality is scored as ROUGE against the
+float32 ``torch`` baseline's output. Run from ``api/``::
+
+    python -m benchmarks.backends --backends torch torch-int8 onnx --runs 3
+"""
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from benchmarks.rouge import rouge
+from core import inference
+from core.celery import SUMMARIZATION_MODEL
+from core.model_registry import ModelRegistry
+from core.summarization import summarize_text
+
+CORPUS_PATH = Path(__file__).parent / "corpus"
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> dict[str, str]:
+    return {file.name: file.read_text() for file in sorted(path.glob("*.txt"))}
+
+
+def run_backend(
+    backend: str, corpus: dict[str, str], runs: int, model_name: str
+) -> dict:
+    registry = ModelRegistry(model_name=model_name, backend=backend)
+    registry.warm_up()
+    summarizer = registry.get_summarizer()
+
+    latencies = []
+    summaries = {}
+    for _ in range(runs):
+        for name, text in corpus.items():
+            started = time.perf_counter()
+            summaries[name] = summarize_text(summarizer, text)
+            latencies.append(time.perf_counter() - started)
+
+    total_seconds = sum(latencies)
+    latencies.sort()
+    return {
+        "backend": backend,
+        "load_seconds": registry.load_seconds,
+        "parameter_bytes": registry.parameter_bytes,
+        "latency_mean_seconds": statistics.mean(latencies),
+        "latency_p50_seconds": latencies[len(latencies) // 2],
+        "latency_max_seconds": latencies[-1],
+        "documents_per_second": len(latencies) / total_seconds,
+        "characters_per_second": runs
+        * sum(len(text) for text in corpus.values())
+        / total_seconds,
+        "summaries": summaries,
+    }
+
+
+def compare(results: list[dict]) -> list[dict]:
+    """Attach mean ROUGE against the torch baseline to every result."""
+    baseline = next(r for r in results if r["backend"] == inference.TORCH)
+    for result in results:
+        scores = [
+            rouge(baseline["summaries"][name], summary)
+            for name, summary in result["summaries"].items()
+        ]
+        result["rouge_vs_fp32"] = {
+            metric: statistics.mean(score[metric] for score in scores)
+            for metric in scores[0]
+        }
+    return results
+
+
+def main(argv: list[str] | None = None) -> list[dict]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(inference.BACKENDS[:2]))
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PATH)
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--model", default=SUMMARIZATION_MODEL)
+    parser.add_argument("--json", action="store_true", help="print raw results")
+    args = parser.parse_args(argv)
+
+    backends = list(dict.fromkeys([inference.TORCH, *args.backends]))
+    corpus = load_corpus(args.corpus)
+    results = compare(
+        [run_backend(backend, corpus, args.runs, args.model) for backend in backends]
+    )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(
+            f"{'backend':<12}{'p50 s':>8}{'docs/s':>9}{'MiB':>8}"
+            f"{'R-1':>7}{'R-2':>7}{'R-L':>7}"
+        )
+        for r in results:
+            mib = (r["parameter_bytes"] or 0) / 2**20
+            scores = r["rouge_vs_fp32"]
+            print(
+                f"{r['backend']:<12}{r['latency_p50_seconds']:>8.2f}"
+                f"{r['documents_per_second']:>9.2f}{mib:>8.0f}"
+                f"{scores['rouge1']:>7.3f}{scores['rouge2']:>7.3f}"
+                f"{scores['rougeL']:>7.3f}"
+            )
+    return results
+
+
+if __name__ == "__main__":
+    main()
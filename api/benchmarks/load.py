@@ -0,0 +1,405 @@
+"""End-to-end load benchmark of the document API and the summary worker.
+
+Requests go through the FastAPI app in-process and summary tasks run on an
+in-process Celery worker over an in-memory broker, so the API routes, task
+routing, batching and storage are all exercised without a deployment. Only
+Redis (``REDIS_HOST``) is needed, for the summary status and events. The
+model is replaced by a deterministic fake unless ``--real-model`` is given.
+
+For every document size and concurrency level it reports requests/second and
+p50/p95/p99 latencies of storing, fetching and polling for summaries, plus
+the time until each summary is ready. Run from ``api/``::
+
+    python -m benchmarks.load
+    python -m benchmarks.load --sizes 1024 65536 --concurrency 1 16
+    python -m benchmarks.load --check             # fail on regressions
+    python -m benchmarks.load --update-baselines  # record new baselines
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from benchmarks.backends import load_corpus
+
+DEFAULT_SIZES = (1024, 16 * 1024, 128 * 1024)
+DEFAULT_CONCURRENCY = (1, 8)
+DEFAULT_REQUESTS = 40
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+# How much worse than its baseline a result may be before --check fails.
+DEFAULT_TOLERANCE = 0.5
+# Pause between summary polls of one client, in seconds.
+POLL_INTERVAL = 0.02
+SUMMARY_TIMEOUT = 120
+
+_WORD = re.compile(r"\S+")
+
+
+class FakeTokenizer:
+    """Fast-tokenizer stand-in where every whitespace-separated word is a token."""
+
+    model_max_length = 1024
+
+    def __call__(self, text: str, **kwargs) -> dict:
+        spans = [match.span() for match in _WORD.finditer(text)]
+        return {"input_ids": list(range(len(spans))), "offset_mapping": spans}
+
+    def num_special_tokens_to_add(self) -> int:
+        return 2
+
+
+class FakeSummarizer:
+    """Deterministic summarization pipeline stand-in.
+
+    The summary of an input is its first summary_words words. Every call
+    sleeps for a fixed overhead plus a cost per input token, so batching and
+    chunking still shape the timings the way they do for a real model.
+    """
+
+    def __init__(
+        self,
+        seconds_per_call: float = 0.005,
+        seconds_per_token: float = 0.00002,
+        summary_words: int = 40,
+    ):
+        self.tokenizer = FakeTokenizer()
+        self.model = SimpleNamespace(
+            config=SimpleNamespace(
+                max_position_embeddings=FakeTokenizer.model_max_length
+            )
+        )
+        self.seconds_per_call = seconds_per_call
+        self.seconds_per_token = seconds_per_token
+        self.summary_words = summary_words
+
+    def __call__(self, inputs, **kwargs) -> list[dict]:
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        words = [text.split() for text in texts]
+        time.sleep(
+            self.seconds_per_call + self.seconds_per_token * sum(len(w) for w in words)
+        )
+        return [{"summary_text": " ".join(w[: self.summary_words])} for w in words]
+
+
+def make_texts(size: int, count: int, seed: int = 0, run_id: str = "") -> list[str]:
+    """count distinct documents of about size bytes drawn from the corpus
+    vocabulary. The same arguments always give the same texts.
+
+    Summaries are shared by content, so every run passes its own run_id to
+    keep earlier runs' summaries in Redis from answering for it.
+    """
+    vocabulary = sorted(set(" ".join(load_corpus().values()).split()))
+    rng = random.Random(f"{seed}:{size}")
+    texts = []
+    for index in range(count):
+        words = [f"doc{run_id}-{seed}-{size}-{index}"]
+        length = len(words[0])
+        while length < size:
+            word = rng.choice(vocabulary)
+            words.append(word)
+            length += len(word) + 1
+        texts.append(" ".join(words))
+    return texts
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def summarize_timings(
+    operation: str, size: int, concurrency: int, latencies: list, seconds: float
+) -> dict:
+    return {
+        "operation": operation,
+        "size": size,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / seconds,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+@contextmanager
+def in_process_stack(summarizer=None, worker_concurrency: int = 8):
+    """A TestClient for the app, backed by an in-process worker and broker.
+
+    Documents go to a temporary store. With a summarizer, the worker uses it
+    instead of loading the model.
+    """
+    # The worker and the API share this process.
+    os.environ["API_FORBID_ML_IMPORTS"] = "false"
+    import celery_worker
+    from celery.contrib.testing.worker import start_worker
+    from fastapi.testclient import TestClient
+
+    from core.celery import celery_app
+    from core.model_registry import model_registry
+    from core.queues import DEFAULT_QUEUE, SUMMARY_QUEUES
+    from main import app
+    from routes.documents import controller
+    from routes.documents.async_storage import AsyncDocumentStorage
+    from routes.documents.storage import DocumentStorage
+
+    celery_app.conf.update(
+        broker_url="memory://",
+        result_backend="cache+memory://",
+        # The in-memory transport polls its queues; keep that out of the
+        # measured latencies.
+        broker_transport_options={
+            **celery_app.conf.broker_transport_options,
+            "polling_interval": 0.005,
+        },
+        task_always_eager=False,
+    )
+
+    with ExitStack() as stack:
+        storage_path = stack.enter_context(tempfile.TemporaryDirectory())
+        stack.enter_context(
+            patch.object(controller, "storage", AsyncDocumentStorage(storage_path))
+        )
+        stack.enter_context(
+            patch.object(celery_worker, "storage", DocumentStorage(storage_path))
+        )
+        # Memoized chunk summaries outlive a run and would let later runs
+        # skip the summarizer.
+        stack.enter_context(
+            patch.object(celery_worker, "CHUNK_SUMMARY_CACHE_MAX_ENTRIES", 0)
+        )
+        if summarizer is not None:
+            stack.enter_context(patch.object(model_registry, "_summarizer", summarizer))
+        stack.enter_context(
+            start_worker(
+                celery_app,
+                pool="threads",
+                concurrency=worker_concurrency,
+                perform_ping_check=False,
+                queues=[*SUMMARY_QUEUES, DEFAULT_QUEUE],
+            )
+        )
+        yield stack.enter_context(TestClient(app))
+
+
+def _timed(request) -> tuple[float, object]:
+    started = time.perf_counter()
+    response = request()
+    return time.perf_counter() - started, response
+
+
+def _check(response, *expected: int):
+    if response.status_code not in expected:
+        raise RuntimeError(
+            f"{response.request.method} {response.request.url.path} returned"
+            f" {response.status_code}: {response.text[:200]}"
+        )
+
+
+def run_scenario(
+    client, size: int, concurrency: int, requests: int, seed: int, run_id: str
+):
+    texts = make_texts(size, requests, seed, run_id)
+    results = []
+
+    with ThreadPoolExecutor(concurrency) as pool:
+
+        def store(text):
+            elapsed, response = _timed(
+                lambda: client.post("/documents", data={"text": text})
+            )
+            _check(response, 201)
+            return elapsed, response.json()["document_id"]
+
+        started = time.perf_counter()
+        stored = list(pool.map(store, texts))
+        results.append(
+            summarize_timings(
+                "store",
+                size,
+                concurrency,
+                [elapsed for elapsed, _ in stored],
+                time.perf_counter() - started,
+            )
+        )
+        document_ids = [document_id for _, document_id in stored]
+
+        def get(document_id):
+            elapsed, response = _timed(lambda: client.get(f"/documents/{document_id}"))
+            _check(response, 200)
+            return elapsed
+
+        started = time.perf_counter()
+        latencies = list(pool.map(get, document_ids))
+        results.append(
+            summarize_timings(
+                "get", size, concurrency, latencies, time.perf_counter() - started
+            )
+        )
+
+        def await_summary(document_id):
+            polls = []
+            first_poll = time.perf_counter()
+            while time.perf_counter() - first_poll < SUMMARY_TIMEOUT:
+                elapsed, response = _timed(
+                    lambda: client.get(f"/documents/{document_id}/summary")
+                )
+                _check(response, 200, 202)
+                polls.append(elapsed)
+                if response.status_code == 200:
+                    return polls, time.perf_counter() - first_poll
+                time.sleep(POLL_INTERVAL)
+            raise RuntimeError(f"No summary for {document_id} in {SUMMARY_TIMEOUT}s")
+
+        started = time.perf_counter()
+        summaries = list(pool.map(await_summary, document_ids))
+        seconds = time.perf_counter() - started
+        results.append(
+            summarize_timings(
+                "summary_poll",
+                size,
+                concurrency,
+                [poll for polls, _ in summaries for poll in polls],
+                seconds,
+            )
+        )
+        results.append(
+            summarize_timings(
+                "summary_ready",
+                size,
+                concurrency,
+                [ready for _, ready in summaries],
+                seconds,
+            )
+        )
+
+    return results
+
+
+def run(
+    sizes=DEFAULT_SIZES,
+    concurrency_levels=DEFAULT_CONCURRENCY,
+    requests: int = DEFAULT_REQUESTS,
+    real_model: bool = False,
+) -> list[dict]:
+    mode = "real" if real_model else "fake"
+    run_id = uuid.uuid4().hex[:8]
+    results = []
+    with in_process_stack(None if real_model else FakeSummarizer()) as client:
+        # Every scenario stores fresh documents, so each one starts cold.
+        for seed, (size, concurrency) in enumerate(
+            (size, concurrency) for size in sizes for concurrency in concurrency_levels
+        ):
+            for result in run_scenario(
+                client, size, concurrency, requests, seed, run_id
+            ):
+                results.append({"mode": mode, **result})
+    return results
+
+
+def baseline_key(result: dict) -> str:
+    return "/".join(
+        str(result[field]) for field in ("mode", "operation", "size", "concurrency")
+    )
+
+
+def load_baselines(path: Path = BASELINES_PATH) -> dict:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def save_baselines(results: list[dict], path: Path = BASELINES_PATH):
+    baselines = load_baselines(path)
+    for result in results:
+        baselines[baseline_key(result)] = {
+            "requests_per_second": round(result["requests_per_second"], 2),
+            "p95_ms": round(result["p95_ms"], 2),
+        }
+    path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+
+
+def find_regressions(
+    results: list[dict], baselines: dict, tolerance: float = DEFAULT_TOLERANCE
+) -> list[str]:
+    """Describe every result that is slower than its baseline by more than
+    tolerance, in throughput or p95 latency. Results without one pass."""
+    regressions = []
+    for result in results:
+        key = baseline_key(result)
+        baseline = baselines.get(key)
+        if baseline is None:
+            continue
+        if result["p95_ms"] > baseline["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: p95 {result['p95_ms']:.1f} ms"
+                f" > baseline {baseline['p95_ms']:.1f} ms"
+            )
+        if result["requests_per_second"] < baseline["requests_per_second"] * (
+            1 - tolerance
+        ):
+            regressions.append(
+                f"{key}: {result['requests_per_second']:.1f} req/s"
+                f" < baseline {baseline['requests_per_second']:.1f} req/s"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> list[dict]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument(
+        "--concurrency", nargs="+", type=int, default=list(DEFAULT_CONCURRENCY)
+    )
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument(
+        "--real-model", action="store_true", help="load the configured model"
+    )
+    parser.add_argument("--baselines", type=Path, default=BASELINES_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--check", action="store_true", help="exit 1 on regressions vs baselines"
+    )
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print raw results")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.concurrency, args.requests, args.real_model)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(
+            f"{'operation':<15}{'size':>8}{'conc':>6}{'req/s':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for r in results:
+            print(
+                f"{r['operation']:<15}{r['size']:>8}{r['concurrency']:>6}"
+                f"{r['requests_per_second']:>9.1f}{r['p50_ms']:>9.1f}"
+                f"{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+            )
+
+    if args.update_baselines:
+        save_baselines(results, args.baselines)
+    elif args.check:
+        regressions = find_regressions(
+            results, load_baselines(args.baselines), args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            raise SystemExit(1)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import re
+from collections import Counter
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def _f1(overlap: int, reference_count: int, candidate_count: int) -> float:
+    if not overlap:
+        return 0.0
+    precision = overlap / candidate_count
+    recall = overlap / reference_count
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(reference: str, candidate: str, n: int = 1) -> float:
+    """ROUGE-N F1 over lowercase word n-grams."""
+    reference_tokens, candidate_tokens = tokenize(reference), tokenize(candidate)
+    reference_grams = Counter(zip(*(reference_tokens[i:] for i in range(n))))
+    candidate_grams = Counter(zip(*(candidate_tokens[i:] for i in range(n))))
+    overlap = sum((reference_grams & candidate_grams).values())
+    return _f1(overlap, sum(reference_grams.values()), sum(candidate_grams.values()))
+
+
+def rouge_l(reference: str, candidate: str) -> float:
+    """ROUGE-L F1 from the longest common subsequence of words."""
+    reference_tokens, candidate_tokens = tokenize(reference), tokenize(candidate)
+    previous = [0] * (len(candidate_tokens) + 1)
+    for reference_token in reference_tokens:
+        current = [0]
+        for j, candidate_token in enumerate(candidate_tokens):
+            current.append(
+                previous[j] + 1
+                if reference_token == candidate_token
+                else max(previous[j + 1], current[j])
+            )
+        previous = current
+    return _f1(previous[-1], len(reference_tokens), len(candidate_tokens))
+
+
+def rouge(reference: str, candidate: str) -> dict:
+    return {
+        "rouge1": rouge_n(reference, candidate, 1),
+        "rouge2": rouge_n(reference, candidate, 2),
+        "rougeL": rouge_l(reference, candidate),
+    }
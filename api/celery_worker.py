@@ -1,76 +1,470 @@
 import logging
+import threading
+import time
+
+import redis
+from celery import chord
+from celery.concurrency import get_implementation
 from celery.exceptions import Ignore
+from celery.signals import worker_init, worker_process_init
+from routes.documents.events import publish_summary_event
+from routes.documents.exceptions import DocumentDoesNotExistsError
 from routes.documents.storage import DocumentStorage
-from core.celery import celery_app
-from transformers import pipeline
-import torch
+from routes.documents.summary_status import update_summary_status
+from core.celery import (
+    celery_app,
+    redis_client,
+    SUMMARY_BATCH_SIZE,
+    SUMMARY_PRELOAD_MODEL,
+    SUMMARY_TORCH_THREADS,
+    SUMMARY_CHUNK_OVERLAP,
+    SUMMARY_DISTRIBUTED,
+    SUMMARY_DISTRIBUTED_MIN_CHUNKS,
+    SUMMARY_CHUNKS_PER_TASK,
+)
+from core import inference
+from core.checkpoints import ChunkCheckpoint, checkpoint_signature
+from core.chunk_cache import CHUNK_SUMMARY_CACHE_MAX_ENTRIES, ChunkSummaryCache
+from core.metrics import SUMMARY_STAGE_SECONDS, SUMMARY_TASKS
+from core.model_registry import model_registry
+from core.queues import record_queue_wait  # noqa: F401 - connects the signal
+from core.tasks import GENERATE_SUMMARY
+from core.summarization import (
+    CHUNK_SUMMARY_KWARGS,
+    chunk_spans,
+    chunk_text,
+    combine_summaries,
+    max_chunk_tokens,
+    summarize_chunks,
+    summarize_document_chunks,
+)
 
 logger = logging.getLogger("momentum.celery_worker")
 
+# Opened on first use, in the process running the tasks: the index's SQLite
+# connections must not be opened in the prefork parent and carried across
+# fork().
+storage: DocumentStorage | None = None
+_storage_lock = threading.Lock()
 
-@celery_app.task(bind=True)
-def generate_summary(self, document_id: str, text: str) -> dict:
+
+# torch threads for each prefork child, decided in the parent.
+_child_torch_threads: int | None = None
+
+
+@worker_init.connect
+def prepare_worker(sender=None, **kwargs) -> None:
+    """Size torch's thread pool and optionally preload the model, in the main
+    worker process before its pool starts."""
+    global _child_torch_threads
+
+    if _pool_module(sender) != "celery.concurrency.thread" or sender.concurrency < 2:
+        # Each process runs one task at a time, so no other task's inputs can
+        # join its batches and waiting for them only adds latency.
+        model_registry.batch_window_seconds = 0
+
+    if not _is_prefork(sender):
+        # Thread and solo pools run the model from a single process, one
+        # batch at a time, so it may use every CPU.
+        inference.set_torch_threads(SUMMARY_TORCH_THREADS or inference.torch_threads(1))
+        # worker_process_init only fires in prefork children, and this process
+        # is the one that runs the tasks.
+        warm_up_model()
+        return
+
+    _child_torch_threads = SUMMARY_TORCH_THREADS or inference.torch_threads(
+        sender.concurrency
+    )
+    logger.info(f"Prefork children will use {_child_torch_threads} torch threads each")
+    if SUMMARY_PRELOAD_MODEL:
+        inference.set_torch_threads(1)
+        try:
+            model_registry.preload()
+        except Exception as e:
+            # Children then load the model themselves.
+            logger.error(f"Failed to preload summarization model: {e}")
+
+
+def _storage() -> DocumentStorage:
+    global storage
+    if storage is None:
+        with _storage_lock:
+            if storage is None:
+                storage = DocumentStorage()
+    return storage
+
+
+def _is_prefork(worker) -> bool:
+    return _pool_module(worker) == "celery.concurrency.prefork"
+
+
+def _pool_module(worker) -> str:
+    # worker_init fires before the pool name is resolved to its class.
+    return get_implementation(worker.pool_cls).__module__
+
+
+@worker_process_init.connect
+def warm_up_model(**kwargs) -> None:
+    if _child_torch_threads:
+        inference.set_torch_threads(_child_torch_threads)
     try:
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "document_id": document_id,
-                "status": "Loading summarization model...",
-            },
-        )
+        model_registry.warm_up()
+    except Exception as e:
+        # The model is loaded lazily by the first task if warm-up fails.
+        logger.error(f"Failed to warm up summarization model: {e}")
 
-        summarizer = pipeline(
-            "summarization",
-            model="sshleifer/distilbart-cnn-12-6",
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-        )
 
-        self.update_state(
-            state="PROGRESS",
-            meta={"document_id": document_id, "status": "Generating summary..."},
-        )
+@celery_app.task
+def model_stats() -> dict:
+    return model_registry.stats()
 
-        max_chunk = 1024
-        if len(text.split()) > max_chunk:
-            words = text.split()
-            chunks = [
-                " ".join(words[i : i + max_chunk])
-                for i in range(0, len(words), max_chunk)
-            ]
-
-            summaries = []
-            for chunk in chunks:
-                result = summarizer(
-                    chunk, max_length=150, min_length=50, do_sample=False
-                )
-                summaries.append(result[0]["summary_text"])
 
-            if len(summaries) > 1:
-                combined = " ".join(summaries)
-                final_result = summarizer(
-                    combined, max_length=200, min_length=100, do_sample=False
+# Acknowledged only once finished, so a task whose worker died is delivered
+# again and resumes from its checkpointed chunks.
+@celery_app.task(
+    name=GENERATE_SUMMARY, bind=True, acks_late=True, reject_on_worker_lost=True
+)
+def generate_summary(self, document_id: str) -> dict:
+    """Summarize a stored document.
+
+    Only the document id travels through the broker; the text is read from
+    DocumentStorage on the worker, so message size is independent of the
+    document size. Chunk summaries are checkpointed as they complete, and
+    chunks identical to one summarized for any earlier document reuse its
+    summary.
+    """
+    SUMMARY_TASKS.inc(state="STARTED")
+    try:
+        text = _storage().get_document(document_id)
+        if text is None:
+            raise DocumentDoesNotExistsError(
+                attribute_name="document_id", attribute_value=document_id
+            )
+
+        if not model_registry.is_loaded:
+            _report_progress(self, document_id, "Loading summarization model...")
+
+        summarizer = model_registry.get_batcher()
+        with SUMMARY_STAGE_SECONDS.time(stage="tokenize"):
+            spans = chunk_spans(
+                summarizer.tokenizer, text, max_chunk_tokens(summarizer)
+            )
+
+        if _should_distribute(spans):
+            _report_progress(
+                self, document_id, f"Summarizing {len(spans)} chunks across workers..."
+            )
+            # Map tasks receive character spans and re-read the document from
+            # storage, so chunk text never travels through the broker either.
+            return self.replace(
+                _map_reduce(
+                    document_id,
+                    [
+                        summarize_span_batch.s(document_id, batch, first_index)
+                        for first_index, batch in _indexed_batches(spans)
+                    ],
                 )
-                summary_text = final_result[0]["summary_text"]
-            else:
-                summary_text = summaries[0]
-        else:
-            result = summarizer(text, max_length=150, min_length=50, do_sample=False)
-            summary_text = result[0]["summary_text"]
+            )
+
+        chunks = [text[start:end] for start, end in spans]
+        if len(chunks) == 1:
+            _report_progress(self, document_id, "Generating summary...")
+            with SUMMARY_STAGE_SECONDS.time(stage="chunk_generate"):
+                summary_text = summarize_document_chunks(summarizer, chunks)
+            return _store_summary(self, document_id, summary_text)
 
-        storage = DocumentStorage()
-        storage.store_summary(document_id, summary_text)
+        checkpoint = _chunk_checkpoint(document_id, summarizer)
+        chunk_summaries = _summarize_resumable(
+            self, document_id, summarizer, chunks, checkpoint
+        )
 
-        logger.info(f"Summary generated and stored for document {document_id}")
+        _report_progress(self, document_id, "Combining summaries...")
+        with SUMMARY_STAGE_SECONDS.time(stage="combine"):
+            summary_text = combine_summaries(summarizer, " ".join(chunk_summaries))
 
-        return {
-            "document_id": document_id,
-            "summary": summary_text,
-            "status": "completed",
-        }
+        result = _store_summary(self, document_id, summary_text)
+        checkpoint.clear()
+        return result
 
+    except Ignore:
+        raise
     except Exception as e:
         logger.error(f"Failed to generate summary for {document_id}: {e}")
-        self.update_state(
-            state="FAILURE", meta={"document_id": document_id, "error": str(e)}
+        _report_failure(self, document_id, str(e))
+        raise Ignore()
+
+
+@celery_app.task(acks_late=True, reject_on_worker_lost=True)
+def summarize_span_batch(
+    document_id: str, spans: list[list[int]], first_index: int = 0
+) -> list[str]:
+    """Summarize spans[i] as chunk first_index + i, reusing checkpointed and
+    memoized ones."""
+    summarizer = model_registry.get_batcher()
+    checkpoint = _chunk_checkpoint(document_id, summarizer)
+    done = checkpoint.load()
+    indices = range(first_index, first_index + len(spans))
+    missing = [i for i in indices if i not in done]
+
+    if missing:
+        text = _storage().get_document(document_id)
+        if text is None:
+            # Deleted since it was chunked; the chord's errback reports it.
+            raise DocumentDoesNotExistsError(
+                attribute_name="document_id", attribute_value=document_id
+            )
+        chunks = [text[start:end] for start, end in spans]
+        summaries, _ = _summarize_memoized(
+            summarizer, [chunks[i - first_index] for i in missing]
         )
+        finished = dict(zip(missing, summaries))
+        checkpoint.save(finished)
+        done.update(finished)
+
+    return [done[i] for i in indices]
+
+
+@celery_app.task
+def summarize_chunk_batch(chunks: list[str]) -> list[str]:
+    return _summarize_chunks_timed(model_registry.get_batcher(), chunks)
+
+
+@celery_app.task(bind=True)
+def reduce_summaries(self, batch_summaries: list[list[str]], document_id: str) -> dict:
+    try:
+        summarizer = model_registry.get_batcher()
+        combined = " ".join(summary for batch in batch_summaries for summary in batch)
+        chunks = chunk_text(
+            summarizer.tokenizer, combined, max_chunk_tokens(summarizer)
+        )
+
+        if _should_distribute(chunks):
+            _report_progress(
+                self, document_id, f"Combining {len(chunks)} chunks across workers..."
+            )
+            return self.replace(
+                _map_reduce(
+                    document_id,
+                    [summarize_chunk_batch.s(batch) for batch in _batches(chunks)],
+                )
+            )
+
+        _report_progress(self, document_id, "Combining summaries...")
+
+        with SUMMARY_STAGE_SECONDS.time(stage="combine"):
+            summary_text = combine_summaries(summarizer, combined)
+
+        result = _store_summary(self, document_id, summary_text)
+        _chunk_checkpoint(document_id, summarizer).clear()
+        return result
+
+    except Ignore:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to combine summaries for {document_id}: {e}")
+        _report_failure(self, document_id, str(e))
         raise Ignore()
+
+
+# Called inline with the failed request rather than queued, since it takes
+# (request, exc, traceback) and is not bound.
+@celery_app.task
+def fail_map_reduce(request, exc, traceback, document_id: str):
+    """Errback of a map-reduce chord: a failed map task keeps the reduce step
+    from running, so report the failure under the id the API tracks."""
+    logger.error(f"Failed to summarize chunks of {document_id}: {exc}")
+    _announce(request.id, document_id, {"state": "FAILURE", "error": str(exc)})
+    SUMMARY_TASKS.inc(state="FAILURE")
+
+
+def _should_distribute(chunks: list) -> bool:
+    return SUMMARY_DISTRIBUTED and len(chunks) >= SUMMARY_DISTRIBUTED_MIN_CHUNKS
+
+
+def _batches(items: list, size: int | None = None) -> list[list]:
+    return [batch for _, batch in _indexed_batches(items, size)]
+
+
+def _indexed_batches(items: list, size: int | None = None) -> list[tuple[int, list]]:
+    size = size or SUMMARY_CHUNKS_PER_TASK
+    return [(i, items[i : i + size]) for i in range(0, len(items), size)]
+
+
+def _chunk_checkpoint(document_id: str, summarizer) -> ChunkCheckpoint:
+    return ChunkCheckpoint(
+        redis_client,
+        _storage().get_content_hash(document_id),
+        checkpoint_signature(
+            model_registry.model_name,
+            model_registry.backend,
+            max_chunk_tokens(summarizer),
+            SUMMARY_CHUNK_OVERLAP,
+            sorted(CHUNK_SUMMARY_KWARGS.items()),
+        ),
+    )
+
+
+def _chunk_summary_cache(summarizer) -> ChunkSummaryCache:
+    # Chunk boundaries do not matter here: the key is the chunk text itself.
+    return ChunkSummaryCache(
+        redis_client,
+        checkpoint_signature(
+            model_registry.model_name,
+            model_registry.backend,
+            max_chunk_tokens(summarizer),
+            sorted(CHUNK_SUMMARY_KWARGS.items()),
+        ),
+        CHUNK_SUMMARY_CACHE_MAX_ENTRIES,
+    )
+
+
+def _summarize_memoized(summarizer, chunks: list[str]) -> tuple[list[str], int]:
+    """Summarize chunks, reusing the summaries of identical chunks of any
+    document. Returns the summaries and how many came from the cache."""
+    cache = _chunk_summary_cache(summarizer)
+    summaries = cache.get_many(chunks)
+    missing = [i for i in range(len(chunks)) if i not in summaries]
+    if missing:
+        generated = _summarize_chunks_timed(summarizer, [chunks[i] for i in missing])
+        cache.put_many({chunks[i]: summary for i, summary in zip(missing, generated)})
+        summaries.update(zip(missing, generated))
+    return [summaries[i] for i in range(len(chunks))], len(chunks) - len(missing)
+
+
+def _summarize_resumable(
+    task, document_id: str, summarizer, chunks: list[str], checkpoint
+) -> list[str]:
+    """Summarize every chunk, resuming from and saving to checkpoint and
+    reusing memoized chunk summaries."""
+    done = checkpoint.load()
+    missing = [i for i in range(len(chunks)) if i not in done]
+    if done:
+        logger.info(
+            f"Resuming {document_id} with {len(done)}/{len(chunks)} chunks done"
+        )
+
+    started = time.monotonic()
+    processed = 0
+    cached = 0
+    for batch in _batches(missing, SUMMARY_BATCH_SIZE):
+        _report_chunk_progress(
+            task, document_id, len(done), len(chunks), started, processed, cached
+        )
+        summaries, hits = _summarize_memoized(summarizer, [chunks[i] for i in batch])
+        finished = dict(zip(batch, summaries))
+        checkpoint.save(finished)
+        done.update(finished)
+        processed += len(batch)
+        cached += hits
+    _report_chunk_progress(
+        task, document_id, len(done), len(chunks), started, processed, cached
+    )
+
+    return [done[i] for i in range(len(chunks))]
+
+
+def _summarize_chunks_timed(summarizer, chunks: list[str]) -> list[str]:
+    started = time.perf_counter()
+    summaries = summarize_chunks(summarizer, chunks)
+    # Chunks are generated as one batch; each is charged an equal share.
+    per_chunk = (time.perf_counter() - started) / len(chunks)
+    for _ in chunks:
+        SUMMARY_STAGE_SECONDS.observe(per_chunk, stage="chunk_generate")
+    return summaries
+
+
+def _report_chunk_progress(
+    task,
+    document_id: str,
+    done: int,
+    total: int,
+    started: float,
+    processed: int,
+    cached: int = 0,
+):
+    # The ETA extrapolates this run's generation rate, so chunks restored from
+    # a checkpoint or served from the cache do not make it look faster.
+    progress = {
+        "chunks_done": done,
+        "chunks_total": total,
+        "eta_seconds": None,
+        "chunks_cached": cached,
+        "chunk_cache_hit_rate": None,
+    }
+    if processed:
+        progress["chunk_cache_hit_rate"] = round(cached / processed, 3)
+    if processed > cached:
+        elapsed = time.monotonic() - started
+        rate = elapsed / (processed - cached)
+        progress["eta_seconds"] = round(rate * (total - done), 1)
+    _report_progress(
+        task, document_id, f"Summarized {done} of {total} chunks...", **progress
+    )
+
+
+def _map_reduce(document_id: str, map_tasks: list) -> chord:
+    """Fan chunk batches out to the worker pool and reduce them in one task.
+
+    The replacing task hands its id to the reduce step, so the task id the
+    API already tracks resolves to the final summary, or to the failure of
+    any map task.
+    """
+    reduce = reduce_summaries.s(document_id)
+    return chord(map_tasks, reduce.on_error(fail_map_reduce.s(document_id)))
+
+
+def _report_progress(task, document_id: str, status: str, **progress):
+    task.update_state(
+        state="PROGRESS",
+        meta={"document_id": document_id, "status": status, **progress},
+    )
+    _announce(
+        task.request.id,
+        document_id,
+        {"state": "PROGRESS", "status": status, **progress},
+    )
+
+
+def _report_failure(task, document_id: str, error: str):
+    task.update_state(
+        state="FAILURE", meta={"document_id": document_id, "error": error}
+    )
+    _announce(task.request.id, document_id, {"state": "FAILURE", "error": error})
+    SUMMARY_TASKS.inc(state="FAILURE")
+
+
+def _announce(task_id: str, document_id: str, fields: dict):
+    """Update the content's summary status hash and wake API requests
+    long-polling or streaming it, in one round trip."""
+    content_hash = _storage().get_content_hash(document_id)
+    if content_hash is None:
+        return
+    try:
+        with redis_client.pipeline(transaction=False) as pipe:
+            update_summary_status(pipe, content_hash, task_id, fields)
+            publish_summary_event(
+                pipe, content_hash, {"document_id": document_id, **fields}
+            )
+            pipe.execute()
+    except redis.RedisError as e:
+        # The status hash expires, so clients re-dispatch at worst after its TTL.
+        logger.warning(f"Failed to announce summary state for {document_id}: {e}")
+
+
+def _store_summary(task, document_id: str, summary_text: str) -> dict:
+    with SUMMARY_STAGE_SECONDS.time(stage="store"):
+        _storage().store_summary(document_id, summary_text)
+    _announce(
+        task.request.id,
+        document_id,
+        {"state": "SUCCESS", "status": "completed", "summary": summary_text},
+    )
+
+    logger.info(f"Summary generated and stored for document {document_id}")
+    SUMMARY_TASKS.inc(state="SUCCESS")
+
+    return {
+        "document_id": document_id,
+        "summary": summary_text,
+        "status": "completed",
+    }
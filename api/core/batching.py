@@ -0,0 +1,138 @@
+import copy
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from core.celery import SUMMARY_BATCH_SIZE, SUMMARY_BATCH_WINDOW_MS
+
+logger = logging.getLogger("momentum.batching")
+
+
+class BatchingSummarizer:
+    """Pipeline front-end that merges inputs from concurrent tasks into shared
+    forward passes.
+
+    Callers use it like the summarization pipeline. Their inputs are queued
+    with the generation kwargs they were called with; a single dispatcher
+    thread runs each group as one padded batch once it holds max_batch_size
+    inputs or its oldest input has waited window_seconds, then hands every
+    caller its own results. Only the dispatcher thread touches the model and
+    the pipeline's tokenizer; callers chunking their texts get a copy of the
+    tokenizer per thread.
+    """
+
+    def __init__(
+        self,
+        load_summarizer,
+        max_batch_size: int = SUMMARY_BATCH_SIZE,
+        window_seconds: float = SUMMARY_BATCH_WINDOW_MS / 1000,
+    ):
+        self._load_summarizer = load_summarizer
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        # Generation kwargs -> [(text, future, queued_at)] in arrival order.
+        self._pending: dict[tuple, list[tuple[str, Future, float]]] = {}
+        self._condition = threading.Condition()
+        self._dispatcher: threading.Thread | None = None
+        self._local = threading.local()
+        self.batches = 0
+        self.inputs = 0
+
+    @property
+    def tokenizer(self):
+        # The pipeline reconfigures its tokenizer (truncation, padding) on every
+        # call, and a fast tokenizer used from two threads at once fails with
+        # "Already borrowed", so it stays with the dispatcher.
+        tokenizer = getattr(self._local, "tokenizer", None)
+        if tokenizer is None:
+            tokenizer = copy.deepcopy(self._load_summarizer().tokenizer)
+            self._local.tokenizer = tokenizer
+        return tokenizer
+
+    @property
+    def model(self):
+        return self._load_summarizer().model
+
+    def __call__(self, inputs, batch_size: int | None = None, **kwargs) -> list[dict]:
+        # batch_size is decided here, across callers, not per call.
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        key = tuple(sorted(kwargs.items()))
+        futures = [Future() for _ in texts]
+
+        with self._condition:
+            self._start_dispatcher()
+            queued = self._pending.setdefault(key, [])
+            now = time.monotonic()
+            queued.extend(zip(texts, futures, [now] * len(texts)))
+            self._condition.notify()
+
+        return [future.result() for future in futures]
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "inputs": self.inputs,
+            "mean_batch_size": self.inputs / self.batches if self.batches else None,
+        }
+
+    def _start_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_forever, name="summary-batcher", daemon=True
+            )
+            self._dispatcher.start()
+
+    def _dispatch_forever(self):
+        while True:
+            key, batch = self._next_batch()
+            self._run(dict(key), batch)
+
+    def _next_batch(self) -> tuple[tuple, list[tuple[str, Future, float]]]:
+        with self._condition:
+            while True:
+                if not self._pending:
+                    self._condition.wait()
+                    continue
+                # A full group goes at once; otherwise serve the group whose
+                # oldest input has waited longest once its window is over.
+                full = [
+                    k
+                    for k, queued in self._pending.items()
+                    if len(queued) >= self.max_batch_size
+                ]
+                if full:
+                    key = full[0]
+                    queued = self._pending[key]
+                    break
+                key = min(self._pending, key=lambda k: self._pending[k][0][2])
+                queued = self._pending[key]
+                remaining = queued[0][2] + self.window_seconds - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch = queued[: self.max_batch_size]
+            del queued[: self.max_batch_size]
+            if not queued:
+                del self._pending[key]
+            return key, batch
+
+    def _run(self, kwargs: dict, batch: list[tuple[str, Future, float]]):
+        texts = [text for text, _, _ in batch]
+        try:
+            summarizer = self._load_summarizer()
+            if len(texts) == 1:
+                results = summarizer(texts[0], **kwargs)
+            else:
+                results = summarizer(texts, batch_size=len(texts), **kwargs)
+        except Exception as e:
+            logger.error(f"Batched summarization of {len(texts)} inputs failed: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.inputs += len(texts)
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
@@ -1,6 +1,52 @@
 import os
 from celery import Celery
 import redis
+import redis.asyncio
+
+SUMMARIZATION_MODEL = os.environ.get(
+    "SUMMARIZATION_MODEL", "sshleifer/distilbart-cnn-12-6"
+)
+# torch (float32 baseline), torch-int8 (dynamic quantization) or onnx
+# (ONNX Runtime, needs optimum[onnxruntime]); see core.inference.
+SUMMARY_INFERENCE_BACKEND = os.environ.get("SUMMARY_INFERENCE_BACKEND", "torch").lower()
+# Directory of an exported ONNX model; exported on worker start when empty.
+SUMMARY_ONNX_MODEL_PATH = os.environ.get("SUMMARY_ONNX_MODEL_PATH", "")
+SUMMARY_BATCH_SIZE = int(os.environ.get("SUMMARY_BATCH_SIZE", 8))
+# How long a partial batch waits for inputs from other concurrent tasks.
+SUMMARY_BATCH_WINDOW_MS = float(os.environ.get("SUMMARY_BATCH_WINDOW_MS", 20))
+SUMMARY_CHUNK_OVERLAP = int(os.environ.get("SUMMARY_CHUNK_OVERLAP", 64))
+SUMMARY_DISTRIBUTED = os.environ.get("SUMMARY_DISTRIBUTED", "false").lower() == "true"
+SUMMARY_DISTRIBUTED_MIN_CHUNKS = int(
+    os.environ.get("SUMMARY_DISTRIBUTED_MIN_CHUNKS", 16)
+)
+SUMMARY_CHUNKS_PER_TASK = int(
+    os.environ.get("SUMMARY_CHUNKS_PER_TASK", SUMMARY_BATCH_SIZE)
+)
+
+# Documents are routed to a queue by size so short texts never wait behind
+# long reports; each queue is served by its own worker pool.
+SUMMARY_QUEUE_SMALL = "summaries.small"
+SUMMARY_QUEUE_MEDIUM = "summaries.medium"
+SUMMARY_QUEUE_LARGE = "summaries.large"
+SUMMARY_QUEUE_SMALL_MAX_BYTES = int(
+    os.environ.get("SUMMARY_QUEUE_SMALL_MAX_BYTES", 16 * 1024)
+)
+SUMMARY_QUEUE_MEDIUM_MAX_BYTES = int(
+    os.environ.get("SUMMARY_QUEUE_MEDIUM_MAX_BYTES", 256 * 1024)
+)
+# Within a queue, smaller documents get a higher broker priority.
+SUMMARY_SHORTEST_JOB_FIRST = (
+    os.environ.get("SUMMARY_SHORTEST_JOB_FIRST", "false").lower() == "true"
+)
+# Load the model in the prefork parent so its children share the weights.
+SUMMARY_PRELOAD_MODEL = (
+    os.environ.get("SUMMARY_PRELOAD_MODEL", "false").lower() == "true"
+)
+# torch intra-op threads per worker process; 0 derives them from the CPUs
+# available and the pool's concurrency.
+SUMMARY_TORCH_THREADS = int(os.environ.get("SUMMARY_TORCH_THREADS", 0))
+# Sentences in the synchronous extractive summary (?mode=extractive).
+EXTRACTIVE_SUMMARY_SENTENCES = int(os.environ.get("EXTRACTIVE_SUMMARY_SENTENCES", 3))
 
 celery_app = Celery(
     "summary",
@@ -8,9 +54,32 @@ celery_app = Celery(
     backend=os.environ.get("CELERY_RESULT_BACKEND", "redis://redis:6379/0"),
 )
 
+celery_app.conf.task_routes = {
+    # Map-reduce steps only exist for large documents.
+    "celery_worker.summarize_span_batch": {"queue": SUMMARY_QUEUE_LARGE},
+    "celery_worker.summarize_chunk_batch": {"queue": SUMMARY_QUEUE_LARGE},
+    "celery_worker.reduce_summaries": {"queue": SUMMARY_QUEUE_LARGE},
+}
+celery_app.conf.broker_transport_options = {
+    # One Redis list per priority 0 (first) to 9, named "<queue>:<priority>".
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+# Summaries take seconds to minutes; a worker must not reserve a queued job
+# that an idle worker of the same pool could start right away.
+celery_app.conf.worker_prefetch_multiplier = 1
+
 redis_client = redis.Redis(
     host=os.environ.get("REDIS_HOST", "redis"),
     port=int(os.environ.get("REDIS_PORT", 6379)),
     db=int(os.environ.get("REDIS_DB", 0)),
     decode_responses=True,
 )
+
+async_redis_client = redis.asyncio.Redis(
+    host=os.environ.get("REDIS_HOST", "redis"),
+    port=int(os.environ.get("REDIS_PORT", 6379)),
+    db=int(os.environ.get("REDIS_DB", 0)),
+    decode_responses=True,
+)
@@ -0,0 +1,53 @@
+import hashlib
+
+# Finished chunk summaries of an interrupted run are kept this long.
+CHECKPOINT_TTL = 24 * 3600
+
+CHECKPOINT_PREFIX = "summary_chunks:"
+# Set of the checkpoint keys of one content, so they can be deleted without
+# scanning the keyspace.
+CHECKPOINT_KEYS_PREFIX = "summary_checkpoints:"
+
+
+def checkpoint_keys_key(content_hash: str) -> str:
+    return f"{CHECKPOINT_KEYS_PREFIX}{content_hash}"
+
+
+def checkpoint_signature(*settings) -> str:
+    """Fingerprint of everything that changes chunk boundaries or summaries,
+    so a checkpoint is only resumed under the settings that produced it."""
+    return hashlib.sha256(repr(settings).encode("utf-8")).hexdigest()[:16]
+
+
+class ChunkCheckpoint:
+    """Chunk summaries of one document, persisted in Redis as they complete.
+
+    Entries map the chunk index to its summary. A task that is retried or
+    re-dispatched after a worker died or failed loads them and only
+    summarizes the chunks that are still missing.
+    """
+
+    def __init__(self, redis_client, content_hash: str, signature: str):
+        self._redis_client = redis_client
+        self.key = f"{CHECKPOINT_PREFIX}{content_hash}:{signature}"
+        self._keys_key = checkpoint_keys_key(content_hash)
+
+    def load(self) -> dict[int, str]:
+        return {
+            int(index): summary
+            for index, summary in self._redis_client.hgetall(self.key).items()
+        }
+
+    def save(self, summaries: dict[int, str]):
+        with self._redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(self.key, mapping=summaries)
+            pipe.expire(self.key, CHECKPOINT_TTL)
+            pipe.sadd(self._keys_key, self.key)
+            pipe.expire(self._keys_key, CHECKPOINT_TTL)
+            pipe.execute()
+
+    def clear(self):
+        with self._redis_client.pipeline(transaction=False) as pipe:
+            pipe.delete(self.key)
+            pipe.srem(self._keys_key, self.key)
+            pipe.execute()
@@ -0,0 +1,105 @@
+import hashlib
+import logging
+import os
+import time
+
+import redis
+
+from core.metrics import CHUNK_SUMMARY_CACHE_EVICTIONS, CHUNK_SUMMARY_CACHE_LOOKUPS
+
+logger = logging.getLogger("momentum.chunk_cache")
+
+# Chunk summaries kept across all documents; the least recently used ones are
+# evicted beyond this many. 0 disables the cache.
+CHUNK_SUMMARY_CACHE_MAX_ENTRIES = int(
+    os.environ.get("CHUNK_SUMMARY_CACHE_MAX_ENTRIES", 100_000)
+)
+
+CHUNK_SUMMARY_CACHE_KEY = "chunk_summaries"
+# Sorted set of the same fields scored by last use, for LRU eviction.
+CHUNK_SUMMARY_CACHE_LRU_KEY = "chunk_summaries:lru"
+
+# Stores ARGV[3..] as (field, summary) pairs used at ARGV[1], then evicts the
+# least recently used fields beyond ARGV[2] entries. Returns how many went.
+STORE_SCRIPT = """
+for i = 3, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    redis.call('ZADD', KEYS[2], ARGV[1], ARGV[i])
+end
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[2])
+if excess <= 0 then
+    return 0
+end
+local evicted = redis.call('ZPOPMIN', KEYS[2], excess)
+for i = 1, #evicted, 2 do
+    redis.call('HDEL', KEYS[1], evicted[i])
+end
+return excess
+"""
+
+
+class ChunkSummaryCache:
+    """Summaries of individual chunks, shared by every document and worker.
+
+    Entries are keyed by a hash of the chunk text and a signature of the
+    model and generation settings, so identical sections of different
+    documents (boilerplate, disclaimers, templated headers) are summarized
+    once. The cache lives in one Redis hash bounded to max_entries by LRU
+    eviction. It is only an optimization: Redis errors count as misses.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        signature: str,
+        max_entries: int = CHUNK_SUMMARY_CACHE_MAX_ENTRIES,
+    ):
+        self._redis_client = redis_client
+        self._store = redis_client.register_script(STORE_SCRIPT)
+        self.signature = signature
+        self.max_entries = max_entries
+
+    def field(self, chunk: str) -> str:
+        return hashlib.sha256(f"{self.signature}\0{chunk}".encode("utf-8")).hexdigest()
+
+    def get_many(self, chunks: list[str]) -> dict[int, str]:
+        """Cached summaries by index into chunks; misses are left out."""
+        if self.max_entries <= 0 or not chunks:
+            return {}
+        fields = [self.field(chunk) for chunk in chunks]
+        try:
+            with self._redis_client.pipeline(transaction=False) as pipe:
+                pipe.hmget(CHUNK_SUMMARY_CACHE_KEY, fields)
+                # XX only refreshes fields that are still cached.
+                pipe.zadd(
+                    CHUNK_SUMMARY_CACHE_LRU_KEY,
+                    dict.fromkeys(fields, time.time()),
+                    xx=True,
+                )
+                summaries, _ = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Chunk summary cache lookup failed: {e}")
+            summaries = [None] * len(chunks)
+
+        cached = {i: s for i, s in enumerate(summaries) if s is not None}
+        CHUNK_SUMMARY_CACHE_LOOKUPS.inc(len(cached), result="hit")
+        CHUNK_SUMMARY_CACHE_LOOKUPS.inc(len(chunks) - len(cached), result="miss")
+        return cached
+
+    def put_many(self, summaries: dict[str, str]):
+        """Cache summaries given by chunk text."""
+        if self.max_entries <= 0 or not summaries:
+            return
+        args = [time.time(), self.max_entries]
+        for chunk, summary in summaries.items():
+            args += [self.field(chunk), summary]
+        try:
+            evicted = self._store(
+                keys=[CHUNK_SUMMARY_CACHE_KEY, CHUNK_SUMMARY_CACHE_LRU_KEY],
+                args=args,
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Chunk summary cache store failed: {e}")
+            return
+        if evicted:
+            CHUNK_SUMMARY_CACHE_EVICTIONS.inc(evicted)
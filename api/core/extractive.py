@@ -0,0 +1,126 @@
+import hashlib
+import re
+import threading
+from array import array
+
+import numpy as np
+import spacy
+
+from core.celery import EXTRACTIVE_SUMMARY_SENTENCES
+
+# Sentences are ranked with TextRank up to this many; longer documents fall
+# back to similarity with the document centroid, which stays linear.
+TEXTRANK_MAX_SENTENCES = 1000
+# Terms are hashed into a fixed number of TF-IDF features so memory does not
+# grow with the vocabulary.
+HASHED_FEATURES = 1024
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+
+_WORD = re.compile(r"\w+")
+_local = threading.local()
+
+
+def _sentencizer():
+    # A blank pipeline with the rule-based sentencizer needs no model download
+    # and splits megabytes of text in milliseconds. One per thread, since
+    # pipelines are not thread-safe.
+    nlp = getattr(_local, "nlp", None)
+    if nlp is None:
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        _local.nlp = nlp
+    return nlp
+
+
+def split_sentences(text: str) -> list[str]:
+    nlp = _sentencizer()
+    nlp.max_length = max(nlp.max_length, len(text) + 1)
+    return [
+        sentence.text.strip() for sentence in nlp(text).sents if sentence.text.strip()
+    ]
+
+
+def _feature(term: str) -> int:
+    digest = hashlib.blake2b(term.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little") % HASHED_FEATURES
+
+
+def tfidf_weights(sentences: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """L2-normalised hashed TF-IDF vectors as sparse (rows, features, weights)
+    coordinates, so memory follows the length of the text rather than
+    sentences x HASHED_FEATURES."""
+    terms = array("q")
+    rows = array("q")
+    features = {}
+    for row, sentence in enumerate(sentences):
+        for term in _WORD.findall(sentence.lower()):
+            if term not in features:
+                features[term] = _feature(term)
+            terms.append(features[term])
+            rows.append(row)
+
+    cells, counts = np.unique(
+        np.frombuffer(rows, dtype=np.int64) * HASHED_FEATURES
+        + np.frombuffer(terms, dtype=np.int64),
+        return_counts=True,
+    )
+    rows, columns = np.divmod(cells, HASHED_FEATURES)
+
+    document_frequency = np.bincount(columns, minlength=HASHED_FEATURES)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    weights = (np.log1p(counts) * idf[columns]).astype(np.float32)
+    norms = np.sqrt(np.bincount(rows, weights * weights, minlength=len(sentences)))
+    return rows, columns, weights / norms[rows].astype(np.float32)
+
+
+def tfidf_matrix(sentences: list[str]) -> np.ndarray:
+    """L2-normalised hashed TF-IDF vectors, one dense row per sentence."""
+    rows, columns, weights = tfidf_weights(sentences)
+    vectors = np.zeros((len(sentences), HASHED_FEATURES), dtype=np.float32)
+    vectors[rows, columns] = weights
+    return vectors
+
+
+def textrank_scores(vectors: np.ndarray) -> np.ndarray:
+    """PageRank over the cosine-similarity graph of the sentences."""
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = similarity / np.where(out_weight == 0, 1, out_weight)
+
+    n = len(vectors)
+    scores = np.full(n, 1 / n, dtype=np.float32)
+    for _ in range(TEXTRANK_ITERATIONS):
+        updated = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * (
+            transition.T @ scores
+        )
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def centroid_scores(
+    rows: np.ndarray, columns: np.ndarray, weights: np.ndarray, n: int
+) -> np.ndarray:
+    """Similarity of each of n sparse sentence vectors with their centroid."""
+    centroid = np.bincount(columns, weights, minlength=HASHED_FEATURES) / n
+    return np.bincount(rows, weights * centroid[columns], minlength=n)
+
+
+def extractive_summary(
+    text: str, sentence_count: int = EXTRACTIVE_SUMMARY_SENTENCES
+) -> str:
+    """The sentence_count most central sentences of text, in document order."""
+    sentences = split_sentences(text)
+    if len(sentences) <= sentence_count:
+        return " ".join(sentences)
+
+    if len(sentences) <= TEXTRANK_MAX_SENTENCES:
+        scores = textrank_scores(tfidf_matrix(sentences))
+    else:
+        scores = centroid_scores(*tfidf_weights(sentences), len(sentences))
+
+    top = np.argpartition(-scores, sentence_count)[:sentence_count]
+    return " ".join(sentences[i] for i in sorted(top))
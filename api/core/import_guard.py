@@ -0,0 +1,38 @@
+import importlib.abc
+import os
+import sys
+
+# Imported only by worker processes; the API enqueues tasks by name instead.
+ML_MODULES = ("torch", "transformers", "optimum")
+
+
+class _BlockMLImports(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path, target=None):
+        if fullname.partition(".")[0] in ML_MODULES:
+            raise ImportError(
+                f"{fullname} must not be imported in the API process;"
+                " enqueue worker tasks through core.tasks instead"
+            )
+        return None
+
+
+def forbid_ml_imports():
+    """Fail if torch or transformers is loaded, and make later imports fail.
+
+    Optional imports of them, such as spaCy's through thinc, see an
+    ImportError and fall back. Disabled with API_FORBID_ML_IMPORTS=false
+    for processes that deliberately host the API and a worker together.
+    """
+    if os.environ.get("API_FORBID_ML_IMPORTS", "true").lower() != "true":
+        return
+
+    loaded = sorted(
+        name for name in sys.modules if name.partition(".")[0] in ML_MODULES
+    )
+    if loaded:
+        raise RuntimeError(
+            f"The API process must not load {', '.join(loaded[:5])};"
+            " enqueue worker tasks through core.tasks instead"
+        )
+    if not any(isinstance(finder, _BlockMLImports) for finder in sys.meta_path):
+        sys.meta_path.insert(0, _BlockMLImports())
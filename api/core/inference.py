@@ -0,0 +1,97 @@
+import os
+
+import torch
+from transformers import AutoTokenizer, pipeline
+
+try:
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+except ImportError:  # ONNX Runtime is optional; the torch backends always work
+    ORTModelForSeq2SeqLM = None
+
+TORCH = "torch"
+TORCH_INT8 = "torch-int8"
+ONNX = "onnx"
+
+BACKENDS = (TORCH, TORCH_INT8, ONNX)
+
+
+def validate(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported inference backend: {backend}")
+    if backend == ONNX and ORTModelForSeq2SeqLM is None:
+        raise ValueError("SUMMARY_INFERENCE_BACKEND=onnx requires optimum[onnxruntime]")
+    return backend
+
+
+def load_summarizer(model_name: str, backend: str = TORCH, onnx_path: str = ""):
+    """Build a summarization pipeline running on the given backend.
+
+    ``torch`` is the float32 (float16 on GPU) baseline. ``torch-int8`` applies
+    dynamic int8 quantization to every Linear layer, which speeds up CPU
+    inference at a small quality cost. ``onnx`` runs the model in ONNX
+    Runtime, loading an export from onnx_path or exporting it on the fly.
+    """
+    validate(backend)
+
+    if backend == ONNX:
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            onnx_path or model_name, export=not onnx_path
+        )
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+    if backend == TORCH_INT8:
+        summarizer = pipeline(
+            "summarization", model=model_name, torch_dtype=torch.float32
+        )
+        summarizer.model = torch.ao.quantization.quantize_dynamic(
+            summarizer.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        return summarizer
+
+    return pipeline(
+        "summarization",
+        model=model_name,
+        torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+    )
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        return os.cpu_count() or 1
+
+
+def torch_threads(processes: int, cpus: int | None = None) -> int:
+    """Intra-op threads per process so that processes running inference at
+    the same time use every CPU once instead of oversubscribing them."""
+    cpus = cpus or available_cpus()
+    return max(1, cpus // max(1, processes))
+
+
+def set_torch_threads(threads: int):
+    torch.set_num_threads(threads)
+
+
+def model_bytes(model) -> int | None:
+    """Bytes held by a torch model's weights, or None for non-torch models.
+
+    Dynamically quantized layers keep their weights in packed parameters
+    outside ``parameters()``, so those are counted from the state dict.
+    """
+    if not hasattr(model, "parameters"):
+        return None
+
+    total = sum(
+        tensor.numel() * tensor.element_size()
+        for tensor in (*model.parameters(), *model.buffers())
+    )
+    for name, value in model.state_dict().items():
+        if name.endswith("_packed_params._packed_params"):
+            total += sum(
+                tensor.numel() * tensor.element_size()
+                for tensor in value
+                if isinstance(tensor, torch.Tensor)
+            )
+    return total
@@ -0,0 +1,215 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import redis
+
+from core.celery import redis_client
+
+logger = logging.getLogger("momentum.metrics")
+
+METRICS_PREFIX = "metrics:"
+# Observations are buffered per process and added to the shared Redis totals
+# this often, so instrumented code never waits on Redis.
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 5))
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry: dict[str, "Counter | Histogram"] = {}
+# (metric name, field) -> amount not yet flushed to Redis.
+_pending: dict[tuple[str, str], float] = {}
+_lock = threading.Lock()
+_flusher_pid: int | None = None
+
+
+def _label_string(labels: dict) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in sorted(labels.items()))
+
+
+def _add(name: str, field: str, amount: float):
+    global _flusher_pid
+    with _lock:
+        if _flusher_pid != os.getpid():
+            # First observation in this process, or in a forked child.
+            _flusher_pid = os.getpid()
+            threading.Thread(
+                target=_flush_forever, name="metrics-flusher", daemon=True
+            ).start()
+        _pending[(name, field)] = _pending.get((name, field), 0) + amount
+
+
+def _reset_after_fork():
+    # A worker may fork while another thread holds the lock, e.g. the parent's
+    # flusher, and the child would then block on it forever.
+    global _lock, _flusher_pid
+    _lock = threading.Lock()
+    _pending.clear()
+    _flusher_pid = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _flush_forever():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        flush()
+
+
+def flush(client=redis_client):
+    """Add this process's buffered observations to the shared totals."""
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return
+
+    try:
+        with client.pipeline(transaction=False) as pipe:
+            for (name, field), amount in pending.items():
+                pipe.hincrbyfloat(f"{METRICS_PREFIX}{name}", field, amount)
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Dropped {len(pending)} metric updates: {e}")
+
+
+atexit.register(flush)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        _registry[name] = self
+
+    def inc(self, amount: float = 1, **labels):
+        _add(self.name, _label_string(labels), amount)
+
+    def samples(self, fields: dict[str, str]) -> list[str]:
+        return [
+            (
+                f"{self.name}{{{labels}}} {float(value)}"
+                if labels
+                else f"{self.name} {float(value)}"
+            )
+            for labels, value in sorted(fields.items())
+        ]
+
+
+class Histogram:
+    """Prometheus histogram whose buckets are summed across processes.
+
+    Each observation increments only the bucket it falls in; cumulative
+    bucket counts and the total count are derived when rendering.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        _registry[name] = self
+
+    def observe(self, value: float, **labels):
+        label_string = _label_string(labels)
+        bucket = next((b for b in self.buckets if value <= b), "+Inf")
+        _add(self.name, f"{label_string}|{bucket}", 1)
+        _add(self.name, f"{label_string}|sum", value)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self, fields: dict[str, str]) -> list[str]:
+        series: dict[str, dict[str, float]] = {}
+        for field, value in fields.items():
+            labels, _, part = field.rpartition("|")
+            series.setdefault(labels, {})[part] = float(value)
+
+        lines = []
+        for labels, parts in sorted(series.items()):
+            prefix = f"{labels}," if labels else ""
+            count = 0.0
+            for bucket in (*self.buckets, "+Inf"):
+                count += parts.get(str(bucket), 0)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bucket}"}} {count}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {parts.get('sum', 0.0)}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+def render(snapshot: dict[str, dict[str, str]]) -> str:
+    """Prometheus text exposition of every registered metric."""
+    lines = []
+    for metric in _registry.values():
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples(snapshot.get(metric.name, {})))
+    return "\n".join(lines) + "\n"
+
+
+async def render_latest(async_client) -> str:
+    """Render the totals of all processes, including this one's latest."""
+    await asyncio.to_thread(flush)
+    names = list(_registry)
+    async with async_client.pipeline(transaction=False) as pipe:
+        for name in names:
+            pipe.hgetall(f"{METRICS_PREFIX}{name}")
+        values = await pipe.execute()
+    return render(dict(zip(names, values)))
+
+
+SUMMARY_STAGE_SECONDS = Histogram(
+    "summary_stage_seconds",
+    "Time spent in each stage of summary generation: queue_wait (per queue),"
+    " model_load, tokenize, chunk_generate (per chunk), combine and store.",
+)
+SUMMARY_TASKS = Counter(
+    "summary_tasks_total",
+    "Summary tasks dispatched (PENDING), started, completed and failed.",
+)
+STORAGE_READ_SECONDS = Histogram(
+    "document_storage_read_seconds",
+    "Time to read and decode a text or summary object on a cache miss.",
+)
+REDIS_CALL_SECONDS = Histogram(
+    "redis_call_seconds", "Latency of the API's summary status Redis calls."
+)
+DOCUMENT_CACHE_LOOKUPS = Counter(
+    "document_cache_lookups_total", "Read cache lookups by result (hit or miss)."
+)
+DOCUMENT_CACHE_EVICTIONS = Counter(
+    "document_cache_evictions_total", "Objects evicted from the read cache."
+)
+DOCUMENTS_DELETED = Counter(
+    "documents_deleted_total",
+    "Document ids removed, by reason (api, max_age or max_bytes).",
+)
+DOCUMENT_BYTES_RECLAIMED = Counter(
+    "document_bytes_reclaimed_total",
+    "Bytes of texts whose last document was removed, by reason.",
+)
+RETENTION_SWEEP_SECONDS = Histogram(
+    "document_retention_sweep_seconds", "Duration of document retention sweeps."
+)
+CHUNK_SUMMARY_CACHE_LOOKUPS = Counter(
+    "chunk_summary_cache_lookups_total",
+    "Chunk summary memoization lookups by result (hit or miss).",
+)
+CHUNK_SUMMARY_CACHE_EVICTIONS = Counter(
+    "chunk_summary_cache_evictions_total",
+    "Chunk summaries evicted from the memoization cache.",
+)
@@ -0,0 +1,137 @@
+import gc
+import logging
+import os
+import resource
+import threading
+import time
+
+from core import inference
+from core.batching import BatchingSummarizer
+from core.celery import (
+    SUMMARIZATION_MODEL,
+    SUMMARY_BATCH_WINDOW_MS,
+    SUMMARY_INFERENCE_BACKEND,
+    SUMMARY_ONNX_MODEL_PATH,
+)
+from core.metrics import SUMMARY_STAGE_SECONDS
+
+logger = logging.getLogger("momentum.model_registry")
+
+WARMUP_TEXT = (
+    "The summarization worker loads its model once per process and keeps it "
+    "in memory so that every task can reuse the same pipeline."
+)
+
+
+def _rss_bytes() -> int:
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ModelRegistry:
+    """Holds the summarization pipeline for the lifetime of a worker process."""
+
+    def __init__(
+        self,
+        model_name: str = SUMMARIZATION_MODEL,
+        backend: str = SUMMARY_INFERENCE_BACKEND,
+        onnx_path: str = SUMMARY_ONNX_MODEL_PATH,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_path = onnx_path
+        self._summarizer = None
+        self._batcher: BatchingSummarizer | None = None
+        self._lock = threading.Lock()
+        # How long the batcher holds inputs for concurrent tasks to join; set
+        # to 0 by workers whose processes run one task at a time.
+        self.batch_window_seconds = SUMMARY_BATCH_WINDOW_MS / 1000
+        self.load_count = 0
+        self.load_seconds: float | None = None
+        self.parameter_bytes: int | None = None
+        self.rss_delta_bytes: int | None = None
+        self.warmup_seconds: float | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._summarizer is not None
+
+    def get_summarizer(self):
+        if self._summarizer is None:
+            with self._lock:
+                if self._summarizer is None:
+                    self._summarizer = self._load()
+        return self._summarizer
+
+    def get_batcher(self) -> BatchingSummarizer:
+        """Shared front-end that batches inputs across concurrent tasks."""
+        if self._batcher is None:
+            with self._lock:
+                if self._batcher is None:
+                    self._batcher = BatchingSummarizer(
+                        lambda: self.get_summarizer(),
+                        window_seconds=self.batch_window_seconds,
+                    )
+        return self._batcher
+
+    def _load(self):
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+
+        summarizer = inference.load_summarizer(
+            self.model_name, self.backend, self.onnx_path
+        )
+
+        self.load_seconds = time.perf_counter() - started
+        SUMMARY_STAGE_SECONDS.observe(self.load_seconds, stage="model_load")
+        self.rss_delta_bytes = max(_rss_bytes() - rss_before, 0)
+        self.parameter_bytes = inference.model_bytes(summarizer.model)
+        self.load_count += 1
+
+        logger.info(
+            f"Loaded {self.model_name} ({self.backend}) in {self.load_seconds:.2f}s "
+            f"(parameters={self.parameter_bytes} bytes, "
+            f"rss_delta={self.rss_delta_bytes} bytes, pid={os.getpid()})"
+        )
+        return summarizer
+
+    def preload(self) -> None:
+        """Load the model in a parent process that is about to fork workers.
+
+        Children inherit the weights and share their pages copy-on-write, as
+        inference never writes them. Objects existing now are moved out of the
+        garbage collector's reach, so its bookkeeping does not copy the pages
+        holding them into every child. No inference runs here: torch thread
+        pools started before a fork do not survive it.
+        """
+        self.get_summarizer()
+        gc.freeze()
+        logger.info(
+            f"Preloaded {self.model_name} for forked workers (pid={os.getpid()})"
+        )
+
+    def warm_up(self) -> None:
+        summarizer = self.get_summarizer()
+
+        started = time.perf_counter()
+        summarizer(WARMUP_TEXT, max_length=20, min_length=5, do_sample=False)
+        self.warmup_seconds = time.perf_counter() - started
+
+        logger.info(f"Warmed up {self.model_name} in {self.warmup_seconds:.2f}s")
+
+    def stats(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "model": self.model_name,
+            "backend": self.backend,
+            "loaded": self.is_loaded,
+            "load_count": self.load_count,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "parameter_bytes": self.parameter_bytes,
+            "rss_delta_bytes": self.rss_delta_bytes,
+            "batching": self._batcher.stats() if self._batcher else None,
+        }
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,133 @@
+import json
+import math
+import sys
+import time
+
+from celery.signals import before_task_publish, task_prerun
+
+from core.celery import (
+    redis_client,
+    SUMMARY_QUEUE_SMALL,
+    SUMMARY_QUEUE_MEDIUM,
+    SUMMARY_QUEUE_LARGE,
+    SUMMARY_QUEUE_SMALL_MAX_BYTES,
+    SUMMARY_QUEUE_MEDIUM_MAX_BYTES,
+    SUMMARY_SHORTEST_JOB_FIRST,
+)
+from core.metrics import SUMMARY_STAGE_SECONDS
+
+SUMMARY_QUEUES = (SUMMARY_QUEUE_SMALL, SUMMARY_QUEUE_MEDIUM, SUMMARY_QUEUE_LARGE)
+DEFAULT_QUEUE = "celery"
+MAX_PRIORITY = 9
+# Smallest size each queue's priorities are measured from.
+PRIORITY_FLOOR_BYTES = 1024
+# Recent wait times kept per queue for percentiles.
+WAIT_SAMPLES = 1000
+
+WAIT_STATS_PREFIX = "queue_wait:"
+
+
+def summary_queue(size: int) -> str:
+    if size < SUMMARY_QUEUE_SMALL_MAX_BYTES:
+        return SUMMARY_QUEUE_SMALL
+    if size < SUMMARY_QUEUE_MEDIUM_MAX_BYTES:
+        return SUMMARY_QUEUE_MEDIUM
+    return SUMMARY_QUEUE_LARGE
+
+
+def summary_priority(size: int) -> int | None:
+    """Broker priority for shortest-job-first ordering within a queue.
+
+    Every doubling in size above the queue's lower bound costs one priority
+    level (0 runs first). Returns None when shortest-job-first is disabled.
+    """
+    if not SUMMARY_SHORTEST_JOB_FIRST:
+        return None
+    floor = {
+        SUMMARY_QUEUE_SMALL: PRIORITY_FLOOR_BYTES,
+        SUMMARY_QUEUE_MEDIUM: SUMMARY_QUEUE_SMALL_MAX_BYTES,
+        SUMMARY_QUEUE_LARGE: SUMMARY_QUEUE_MEDIUM_MAX_BYTES,
+    }[summary_queue(size)]
+    return min(int(math.log2(max(size, floor) / floor)), MAX_PRIORITY)
+
+
+def summary_route(size: int) -> dict:
+    """apply_async options placing a document of this size."""
+    route = {"queue": summary_queue(size)}
+    priority = summary_priority(size)
+    if priority is not None:
+        route["priority"] = priority
+    return route
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers: dict = None, **kwargs) -> None:
+    if headers is not None:
+        headers.setdefault("enqueued_at", time.time())
+
+
+@task_prerun.connect
+def record_queue_wait(task=None, **kwargs) -> None:
+    enqueued_at = task.request.get("enqueued_at")
+    delivery_info = task.request.delivery_info or {}
+    queue = delivery_info.get("routing_key")
+    if enqueued_at is None or queue is None:
+        return
+    wait = time.time() - enqueued_at
+    SUMMARY_STAGE_SECONDS.observe(wait, stage="queue_wait", queue=queue)
+    try:
+        record_wait(queue, wait)
+    except Exception:
+        # Metrics must never fail a task.
+        pass
+
+
+def record_wait(queue: str, seconds: float, client=redis_client):
+    key = f"{WAIT_STATS_PREFIX}{queue}"
+    with client.pipeline(transaction=False) as pipe:
+        pipe.hincrby(key, "count", 1)
+        pipe.hincrbyfloat(key, "seconds_total", seconds)
+        pipe.lpush(f"{key}:samples", seconds)
+        pipe.ltrim(f"{key}:samples", 0, WAIT_SAMPLES - 1)
+        pipe.execute()
+
+
+def queue_depth(queue: str, client=redis_client) -> int:
+    """Messages waiting in a queue across all of its priority lists."""
+    with client.pipeline(transaction=False) as pipe:
+        pipe.llen(queue)
+        for priority in range(1, MAX_PRIORITY + 1):
+            pipe.llen(f"{queue}:{priority}")
+        return sum(pipe.execute())
+
+
+def _percentile(samples: list[float], fraction: float) -> float | None:
+    if not samples:
+        return None
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+def queue_stats(queues=SUMMARY_QUEUES + (DEFAULT_QUEUE,), client=redis_client) -> dict:
+    """Depth and wait-time metrics per queue, for tuning the size thresholds."""
+    stats = {}
+    for queue in queues:
+        key = f"{WAIT_STATS_PREFIX}{queue}"
+        totals = client.hgetall(key)
+        samples = sorted(float(s) for s in client.lrange(f"{key}:samples", 0, -1))
+        count = int(totals.get("count", 0))
+        stats[queue] = {
+            "depth": queue_depth(queue, client),
+            "started": count,
+            "wait_seconds_mean": (
+                float(totals["seconds_total"]) / count if count else None
+            ),
+            "wait_seconds_p50": _percentile(samples, 0.5),
+            "wait_seconds_p95": _percentile(samples, 0.95),
+            "wait_seconds_max": samples[-1] if samples else None,
+        }
+    return stats
+
+
+if __name__ == "__main__":
+    queues = tuple(sys.argv[1:]) or SUMMARY_QUEUES + (DEFAULT_QUEUE,)
+    print(json.dumps(queue_stats(queues), indent=2))
@@ -0,0 +1,111 @@
+from core.celery import SUMMARY_BATCH_SIZE, SUMMARY_CHUNK_OVERLAP
+
+CHUNK_SUMMARY_KWARGS = {"max_length": 150, "min_length": 50, "do_sample": False}
+FINAL_SUMMARY_KWARGS = {"max_length": 200, "min_length": 100, "do_sample": False}
+
+
+def max_chunk_tokens(summarizer) -> int:
+    """Largest number of text tokens that fits the model window."""
+    tokenizer = summarizer.tokenizer
+    window = min(
+        tokenizer.model_max_length,
+        getattr(summarizer.model.config, "max_position_embeddings", None)
+        or tokenizer.model_max_length,
+    )
+    return window - tokenizer.num_special_tokens_to_add()
+
+
+def chunk_spans(
+    tokenizer, text: str, max_tokens: int, overlap: int = SUMMARY_CHUNK_OVERLAP
+) -> list[tuple[int, int]]:
+    """Character spans of windows of at most max_tokens model tokens.
+
+    Consecutive windows share overlap tokens. Spans come from the fast
+    tokenizer's offset mapping, so slicing them out of the original text drops
+    or re-encodes nothing, and they can stand in for the chunks themselves.
+    """
+    if overlap >= max_tokens:
+        raise ValueError("Chunk overlap must be smaller than the chunk size")
+
+    offsets = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        verbose=False,
+    )["offset_mapping"]
+    if len(offsets) <= max_tokens:
+        return [(0, len(text))]
+
+    step = max_tokens - overlap
+    spans = []
+    for start in range(0, len(offsets), step):
+        end = min(start + max_tokens, len(offsets))
+        spans.append((offsets[start][0], offsets[end - 1][1]))
+        if end == len(offsets):
+            break
+
+    return spans
+
+
+def chunk_text(
+    tokenizer, text: str, max_tokens: int, overlap: int = SUMMARY_CHUNK_OVERLAP
+) -> list[str]:
+    """Split text into windows of at most max_tokens model tokens."""
+    return [
+        text[start:end]
+        for start, end in chunk_spans(tokenizer, text, max_tokens, overlap)
+    ]
+
+
+def summarize_chunks(
+    summarizer, chunks: list[str], batch_size: int = SUMMARY_BATCH_SIZE
+) -> list[str]:
+    """Summarize all chunks as padded batches of batch_size inputs."""
+    results = summarizer(
+        chunks, batch_size=batch_size, truncation=True, **CHUNK_SUMMARY_KWARGS
+    )
+    return [result["summary_text"] for result in results]
+
+
+def summarize_text(
+    summarizer,
+    text: str,
+    batch_size: int = SUMMARY_BATCH_SIZE,
+    overlap: int = SUMMARY_CHUNK_OVERLAP,
+) -> str:
+    chunks = chunk_text(
+        summarizer.tokenizer, text, max_chunk_tokens(summarizer), overlap
+    )
+    return summarize_document_chunks(summarizer, chunks, batch_size, overlap)
+
+
+def summarize_document_chunks(
+    summarizer,
+    chunks: list[str],
+    batch_size: int = SUMMARY_BATCH_SIZE,
+    overlap: int = SUMMARY_CHUNK_OVERLAP,
+) -> str:
+    if len(chunks) == 1:
+        result = summarizer(chunks[0], truncation=True, **CHUNK_SUMMARY_KWARGS)
+        return result[0]["summary_text"]
+
+    combined = " ".join(summarize_chunks(summarizer, chunks, batch_size))
+    return combine_summaries(summarizer, combined, batch_size, overlap)
+
+
+def combine_summaries(
+    summarizer,
+    combined: str,
+    batch_size: int = SUMMARY_BATCH_SIZE,
+    overlap: int = SUMMARY_CHUNK_OVERLAP,
+) -> str:
+    """Reduce joined chunk summaries into one, recursing while they exceed the window."""
+    max_tokens = max_chunk_tokens(summarizer)
+    chunks = chunk_text(summarizer.tokenizer, combined, max_tokens, overlap)
+
+    while len(chunks) > 1:
+        combined = " ".join(summarize_chunks(summarizer, chunks, batch_size))
+        chunks = chunk_text(summarizer.tokenizer, combined, max_tokens, overlap)
+
+    result = summarizer(combined, truncation=True, **FINAL_SUMMARY_KWARGS)
+    return result[0]["summary_text"]
@@ -0,0 +1,12 @@
+"""Names and signatures of the worker's tasks.
+
+The API enqueues work through these signatures by task name, so it never
+imports celery_worker and with it torch and transformers.
+"""
+
+from core.celery import celery_app
+
+GENERATE_SUMMARY = "celery_worker.generate_summary"
+
+# Unregistered in the API process, so apply_async publishes via send_task.
+generate_summary = celery_app.signature(GENERATE_SUMMARY)
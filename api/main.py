@@ -1,11 +1,41 @@
+from contextlib import asynccontextmanager
+
+from core.import_guard import forbid_ml_imports
+
+# Checked before the API modules load, so none of them can pull the ML stack in.
+forbid_ml_imports()
+
 from fastapi import FastAPI
+from fastapi.responses import Response
 from routes.documents.router import router as document_router
+from routes.documents.controller import retention, summary_events
+from core.celery import async_redis_client
+from core import metrics
 import urllib3
 
-
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    retention.start()
+    yield
+    await retention.stop()
+    await summary_events.stop()
+    # Pooled connections are bound to the event loop that opened them.
+    await async_redis_client.connection_pool.disconnect()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.include_router(document_router)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """Prometheus metrics, summed over the API and all worker processes."""
+    return Response(
+        await metrics.render_latest(async_redis_client),
+        media_type=metrics.CONTENT_TYPE,
+    )
@@ -0,0 +1,428 @@
+import asyncio
+import codecs
+import hashlib
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+import aiofiles
+import aiofiles.os
+import aiofiles.tempfile
+
+from core.metrics import STORAGE_READ_SECONDS
+
+from . import compression
+from .exceptions import DocumentDoesNotExistsError
+from .storage import (
+    STREAM_CHUNK_SIZE,
+    DocumentStorage,
+    iter_view,
+    object_kind,
+    object_name,
+)
+
+
+class AsyncDocumentStorage:
+    """Non-blocking front-end over the same on-disk layout as DocumentStorage.
+
+    File I/O goes through aiofiles and (de)compression of whole objects runs in
+    a worker thread. Index reads and writes are moved off the event loop too,
+    since even a WAL read can wait on disk. Reads share the wrapped storage's
+    ReadCache.
+
+    With the segment backend, appends and memory-mapped reads of the wrapped
+    storage's SegmentStore run in a worker thread, one hop per object.
+    """
+
+    def __init__(self, base_path: str = "document_storage", **storage_options):
+        self.storage = DocumentStorage(base_path, **storage_options)
+        self.index = self.storage.index
+        self.codec = self.storage.compression
+        self.cache = self.storage.cache
+        self.segments = self.storage.segments
+
+    hash_content = staticmethod(DocumentStorage.hash_content)
+
+    def object_path(
+        self, content_hash: str, suffix: str = ".txt", codec: str = compression.NONE
+    ) -> Path:
+        return self.storage.object_path(content_hash, suffix, codec)
+
+    async def store_document(self, text: str) -> str:
+        document_id = str(uuid.uuid4())
+        data = text.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+
+        try:
+            if await asyncio.to_thread(self.index.get_content, content_hash) is None:
+                await self._write_object(content_hash, data, self.codec)
+            missing = await asyncio.to_thread(
+                self.storage._index_documents, [(document_id, content_hash, len(data))]
+            )
+            for codec in missing.values():
+                await self._write_object(content_hash, data, codec)
+        except Exception as e:
+            print(f"Error storing document: {str(e)}")
+            raise
+
+        return document_id
+
+    async def store_documents(self, texts: list[str]) -> list[str]:
+        """Store many documents, writing each new object once and indexing all
+        of them in a single transaction."""
+        rows = []
+        data_by_hash = {}
+
+        try:
+            for text in texts:
+                data = text.encode("utf-8")
+                content_hash = hashlib.sha256(data).hexdigest()
+                data_by_hash.setdefault(content_hash, data)
+                rows.append((str(uuid.uuid4()), content_hash, len(data)))
+
+            new_contents = await asyncio.to_thread(
+                self._unknown_contents, list(data_by_hash)
+            )
+            await asyncio.gather(
+                *(
+                    self._write_object(
+                        content_hash, data_by_hash[content_hash], self.codec
+                    )
+                    for content_hash in new_contents
+                )
+            )
+            missing = await asyncio.to_thread(self.storage._index_documents, rows)
+            await asyncio.gather(
+                *(
+                    self._write_object(content_hash, data_by_hash[content_hash], codec)
+                    for content_hash, codec in missing.items()
+                )
+            )
+        except Exception as e:
+            print(f"Error storing documents: {str(e)}")
+            raise
+
+        return [document_id for document_id, _, _ in rows]
+
+    def open_document_writer(self) -> "AsyncDocumentWriter":
+        return AsyncDocumentWriter(self)
+
+    async def get_metadata(self, document_id: str) -> dict | None:
+        return await asyncio.to_thread(self.index.get, document_id)
+
+    async def get_metadata_many(self, document_ids: list[str]) -> dict[str, dict]:
+        return await asyncio.to_thread(self.index.get_many, document_ids)
+
+    async def get_content_hash(self, document_id: str) -> str | None:
+        metadata = await self.get_metadata(document_id)
+        return metadata["content_hash"] if metadata else None
+
+    async def get_document_size(self, document_id: str) -> int | None:
+        metadata = await self.get_metadata(document_id)
+        return metadata["size"] if metadata else None
+
+    async def iter_document(
+        self,
+        document_id: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """Yield the UTF-8 bytes of a document from start up to (excluding) end.
+
+        Compressed objects are decompressed incrementally; bytes before start
+        are decoded and dropped, so memory stays bounded by chunk_size.
+        """
+        metadata = await self.get_metadata(document_id)
+        codec = metadata["compression"]
+        file_path = self.object_path(metadata["content_hash"], codec=codec)
+        decompressor = compression.decompressor(codec)
+
+        try:
+            view = await self._segment_view(metadata["content_hash"], ".txt", codec)
+            if view is not None:
+                # Copying out of the map may fault pages in, so each chunk is
+                # taken in a worker thread like an aiofiles read.
+                chunks = iter_view(view, codec, start, end, chunk_size)
+                while (
+                    chunk := await asyncio.to_thread(next, chunks, None)
+                ) is not None:
+                    yield chunk
+                return
+
+            async with aiofiles.open(file_path, "rb") as f:
+                if codec == compression.NONE:
+                    await f.seek(start)
+                    position = start
+                else:
+                    position = 0
+
+                while end is None or position < end:
+                    raw = await f.read(chunk_size)
+                    chunk = (
+                        decompressor.decompress(raw) if raw else decompressor.flush()
+                    )
+                    chunk_start, position = position, position + len(chunk)
+                    if chunk and position > start:
+                        lower = max(start - chunk_start, 0)
+                        upper = len(chunk) if end is None else end - chunk_start
+                        yield chunk[lower:upper]
+                    if not raw:
+                        break
+        except Exception as e:
+            print(f"Error streaming document {document_id}: {str(e)}")
+            raise
+
+    async def get_document(self, document_id: str) -> str | None:
+        metadata = await self.get_metadata(document_id)
+
+        if metadata is None:
+            return None
+
+        try:
+            return await self._read_cached(
+                metadata["content_hash"], ".txt", metadata["compression"]
+            )
+        except Exception as e:
+            print(f"Error retrieving document {document_id}: {str(e)}")
+            raise
+
+    async def get_summary(self, document_id: str) -> str | None:
+        metadata = await self.get_metadata(document_id)
+
+        if metadata is None or not metadata["has_summary"]:
+            return None
+
+        try:
+            return await self._read_cached(
+                metadata["content_hash"],
+                "-summary.txt",
+                metadata["summary_compression"],
+                metadata["summary_hash"],
+            )
+        except Exception as e:
+            print(f"Error retrieving summary for document {document_id}: {str(e)}")
+            raise
+
+    async def get_summaries(self, document_ids: list[str]) -> dict[str, str]:
+        """Read the stored summaries of many documents, each distinct object once."""
+        metadata = await self.get_metadata_many(document_ids)
+        objects = {
+            m["content_hash"]: (m["summary_compression"], m["summary_hash"])
+            for m in metadata.values()
+            if m["has_summary"]
+        }
+
+        try:
+            texts = await asyncio.gather(
+                *(
+                    self._read_cached(content_hash, "-summary.txt", codec, version)
+                    for content_hash, (codec, version) in objects.items()
+                )
+            )
+        except Exception as e:
+            print(f"Error retrieving summaries: {str(e)}")
+            raise
+
+        summaries = dict(zip(objects, texts))
+        return {
+            document_id: summaries[m["content_hash"]]
+            for document_id, m in metadata.items()
+            if m["has_summary"]
+        }
+
+    async def store_summary(self, document_id: str, summary: str):
+        content_hash = await self.get_content_hash(document_id)
+        if content_hash is None:
+            raise DocumentDoesNotExistsError(
+                attribute_name="document_id", attribute_value=document_id
+            )
+
+        try:
+            await self._write_object(
+                content_hash, summary.encode("utf-8"), self.codec, "-summary.txt"
+            )
+            await asyncio.to_thread(
+                self.index.mark_summary,
+                content_hash,
+                self.codec,
+                self.hash_content(summary),
+            )
+        except Exception as e:
+            print(f"Error storing summary for document {document_id}: {str(e)}")
+            raise
+
+    async def delete_document(self, document_id: str) -> dict | None:
+        return await asyncio.to_thread(self.storage.delete_document, document_id)
+
+    async def delete_content(self, content_hash: str) -> dict | None:
+        return await asyncio.to_thread(self.storage.delete_content, content_hash)
+
+    async def set_pinned(self, document_id: str, pinned: bool) -> bool:
+        return await asyncio.to_thread(self.index.set_pinned, document_id, pinned)
+
+    def _unknown_contents(self, content_hashes: list[str]) -> list[str]:
+        return [
+            content_hash
+            for content_hash in content_hashes
+            if self.index.get_content(content_hash) is None
+        ]
+
+    async def _compress(self, data: bytes, codec: str) -> bytes:
+        if codec == compression.NONE:
+            return data
+        return await asyncio.to_thread(
+            compression.compress, data, codec, self.storage.compression_level
+        )
+
+    async def _write_object(
+        self, content_hash: str, data: bytes, codec: str, suffix: str = ".txt"
+    ):
+        data = await self._compress(data, codec)
+        if self.segments is not None:
+            await asyncio.to_thread(
+                self.segments.put, object_name(content_hash, suffix, codec), data
+            )
+        else:
+            await self._write_atomic(
+                self.object_path(content_hash, suffix, codec), data
+            )
+
+    async def _segment_view(
+        self, content_hash: str, suffix: str, codec: str
+    ) -> memoryview | None:
+        if self.segments is None:
+            return None
+        return await asyncio.to_thread(
+            self.segments.view, object_name(content_hash, suffix, codec)
+        )
+
+    async def _read_cached(
+        self, content_hash: str, suffix: str, codec: str, version: str | None = None
+    ) -> str:
+        key = (content_hash, suffix, version)
+        text = self.cache.get(key)
+        if text is None:
+            with STORAGE_READ_SECONDS.time(object=object_kind(suffix)):
+                text = await self._read_object(content_hash, suffix, codec)
+            self.cache.put(key, text)
+        return text
+
+    async def _read_object(self, content_hash: str, suffix: str, codec: str) -> str:
+        if self.segments is not None:
+            # Mapped pages may still have to be faulted in from disk.
+            return await asyncio.to_thread(
+                self.storage._read_object, content_hash, suffix, codec
+            )
+
+        async with aiofiles.open(
+            self.object_path(content_hash, suffix, codec), "rb"
+        ) as f:
+            data = await f.read()
+        if codec != compression.NONE:
+            data = await asyncio.to_thread(compression.decompress, data, codec)
+        return data.decode("utf-8")
+
+    @staticmethod
+    async def _write_atomic(path: Path, content: bytes):
+        await aiofiles.os.makedirs(path.parent, exist_ok=True)
+        async with aiofiles.tempfile.NamedTemporaryFile(
+            "wb", dir=path.parent, prefix=".tmp-", delete=False
+        ) as f:
+            tmp_path = f.name
+            try:
+                await f.write(content)
+            except BaseException:
+                await aiofiles.os.unlink(tmp_path)
+                raise
+        await aiofiles.os.replace(tmp_path, path)
+
+
+class AsyncDocumentWriter:
+    """aiofiles counterpart of DocumentWriter for streamed uploads."""
+
+    def __init__(self, storage: AsyncDocumentStorage):
+        self.storage = storage
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._compressor = compression.compressor(
+            storage.codec, storage.storage.compression_level
+        )
+        self._stack = AsyncExitStack()
+        self._file = None
+
+    async def _open(self):
+        if self._file is None:
+            self._file = await self._stack.enter_async_context(
+                aiofiles.tempfile.NamedTemporaryFile(
+                    "wb",
+                    dir=self.storage.storage.objects_path,
+                    prefix=".tmp-",
+                    delete=False,
+                )
+            )
+
+    async def write(self, chunk: bytes):
+        await self._open()
+        # Raises UnicodeDecodeError as soon as the stream stops being UTF-8.
+        self._decoder.decode(chunk)
+        self._hash.update(chunk)
+        await self._file.write(self._compressor.compress(chunk))
+        self.size += len(chunk)
+
+    async def commit(self) -> str:
+        try:
+            self._decoder.decode(b"", final=True)
+            await self._open()
+            await self._file.write(self._compressor.flush())
+            await self._stack.aclose()
+
+            content_hash = self._hash.hexdigest()
+            codec = self.storage.codec
+            placed = (
+                await asyncio.to_thread(self.storage.index.get_content, content_hash)
+                is None
+            )
+            if placed:
+                await self._place(content_hash, codec)
+
+            document_id = str(uuid.uuid4())
+            missing = await asyncio.to_thread(
+                self.storage.storage._index_documents,
+                [(document_id, content_hash, self.size)],
+            )
+            # Only a content deleted since the lookup above, and indexed again
+            # by this upload, can be missing in the codec of the temp file.
+            if not placed and missing.get(content_hash) == codec:
+                await self._place(content_hash, codec)
+            elif not placed:
+                await aiofiles.os.unlink(self._file.name)
+        except BaseException:
+            await self.abort()
+            raise
+
+        return document_id
+
+    async def _place(self, content_hash: str, codec: str):
+        if self.storage.segments is not None:
+            await asyncio.to_thread(
+                self.storage.segments.put_file,
+                object_name(content_hash, ".txt", codec),
+                self._file.name,
+            )
+            await aiofiles.os.unlink(self._file.name)
+        else:
+            file_path = self.storage.object_path(content_hash, codec=codec)
+            await aiofiles.os.makedirs(file_path.parent, exist_ok=True)
+            await aiofiles.os.replace(self._file.name, file_path)
+
+    async def abort(self):
+        if self._file is None:
+            return
+        await self._stack.aclose()
+        try:
+            await aiofiles.os.unlink(self._file.name)
+        except FileNotFoundError:
+            pass
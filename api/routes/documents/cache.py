@@ -0,0 +1,77 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from core.metrics import DOCUMENT_CACHE_EVICTIONS, DOCUMENT_CACHE_LOOKUPS
+
+DOCUMENT_CACHE_MAX_BYTES = int(
+    os.environ.get("DOCUMENT_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+)
+
+
+class ReadCache:
+    """Byte-budgeted LRU cache of decoded texts and summaries.
+
+    Entries are charged their in-memory size and the least recently used ones
+    are evicted once max_bytes is exceeded. Objects larger than a quarter of
+    the budget are not cached, so one huge document cannot flush the hot set.
+    A max_bytes of 0 disables the cache.
+    """
+
+    def __init__(self, max_bytes: int = DOCUMENT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                DOCUMENT_CACHE_LOOKUPS.inc(result="miss")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        DOCUMENT_CACHE_LOOKUPS.inc(result="hit")
+        return entry[0]
+
+    def put(self, key: Hashable, value: str):
+        size = sys.getsizeof(value)
+        if size > self.max_bytes // 4:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+                DOCUMENT_CACHE_EVICTIONS.inc()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
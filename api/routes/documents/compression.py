@@ -0,0 +1,133 @@
+import gzip
+import itertools
+import os
+import zlib
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+NONE = "none"
+GZIP = "gzip"
+ZSTD = "zstd"
+
+SUFFIXES = {NONE: "", GZIP: ".gz", ZSTD: ".zst"}
+
+DOCUMENT_COMPRESSION = os.environ.get("DOCUMENT_COMPRESSION", NONE).lower()
+DOCUMENT_COMPRESSION_LEVEL = int(
+    os.environ.get(
+        "DOCUMENT_COMPRESSION_LEVEL", 3 if DOCUMENT_COMPRESSION == ZSTD else 6
+    )
+)
+
+
+def validate(codec: str) -> str:
+    if codec not in SUFFIXES:
+        raise ValueError(f"Unsupported document compression: {codec}")
+    if codec == ZSTD and zstandard is None:
+        raise ValueError("DOCUMENT_COMPRESSION=zstd requires the zstandard package")
+    return codec
+
+
+def suffix(codec: str) -> str:
+    return SUFFIXES[codec]
+
+
+class _Identity:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _ZstdDecompressor:
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def compressor(codec: str, level: int = DOCUMENT_COMPRESSION_LEVEL):
+    """Incremental compressor exposing ``compress(chunk)`` and ``flush()``."""
+    if codec == GZIP:
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+    if codec == ZSTD:
+        return _ZstdCompressor(level)
+    return _Identity()
+
+
+def decompressor(codec: str):
+    """Incremental decompressor exposing ``decompress(chunk)`` and ``flush()``."""
+    if codec == GZIP:
+        return zlib.decompressobj(31)
+    if codec == ZSTD:
+        return _ZstdDecompressor()
+    return _Identity()
+
+
+def compress(data: bytes, codec: str, level: int = DOCUMENT_COMPRESSION_LEVEL) -> bytes:
+    stream = compressor(codec, level)
+    return stream.compress(data) + stream.flush()
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    stream = decompressor(codec)
+    return stream.decompress(data) + stream.flush()
+
+
+def decompress_range(
+    chunks: Iterable[bytes], codec: str, start: int = 0, end: int | None = None
+) -> Iterator[bytes]:
+    """Decompress a stream of chunks, yielding only bytes from start up to end.
+
+    Bytes before start are decompressed and dropped, so memory stays bounded
+    by the chunk size.
+    """
+    stream = decompressor(codec)
+    position = 0
+    for raw in itertools.chain(chunks, [None]):
+        chunk = stream.flush() if raw is None else stream.decompress(raw)
+        chunk_start, position = position, position + len(chunk)
+        if chunk and position > start:
+            lower = max(start - chunk_start, 0)
+            upper = len(chunk) if end is None else end - chunk_start
+            yield bytes(chunk[lower:upper])
+        if end is not None and position >= end:
+            return
+
+
+def open_reader(path: Path, codec: str) -> BinaryIO:
+    """Open a stored object for streaming, decompressing reads.
+
+    Forward ``seek`` is supported for every codec, which is all Range reads need.
+    """
+    if codec == GZIP:
+        return gzip.open(path, "rb")
+    if codec == ZSTD:
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), closefd=True
+        )
+    return open(path, "rb")
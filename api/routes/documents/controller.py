@@ -1,85 +1,467 @@
-from .storage import DocumentStorage
-from .exceptions import DocumentDoesNotExistsError
-from fastapi.responses import JSONResponse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator
+
+from .async_storage import AsyncDocumentStorage
+from .events import SummaryEventHub, next_event
+from .retention import RetentionSweeper
+from .summary_status import SummaryStatusStore, summary_progress
+from .exceptions import (
+    DocumentDoesNotExistsError,
+    InvalidDocumentEncodingError,
+    RangeNotSatisfiableError,
+)
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi import status
-from celery_worker import generate_summary
-from core.celery import celery_app, redis_client
+from core.celery import celery_app, async_redis_client
+from core.extractive import extractive_summary
+from core.metrics import SUMMARY_TASKS
+from core.queues import summary_route
+from core.tasks import generate_summary
+
+storage = AsyncDocumentStorage()
+summary_events = SummaryEventHub(async_redis_client)
+summary_status = SummaryStatusStore(async_redis_client)
+retention = RetentionSweeper(storage, summary_status, async_redis_client)
+
+logger = logging.getLogger("momentum.documents")
+
+ABSTRACTIVE = "abstractive"
+EXTRACTIVE = "extractive"
 
-storage = DocumentStorage()
+# Upper bound for ?wait= long-polls, in seconds.
+SUMMARY_WAIT_MAX = 60
+# Idle SSE streams send a comment this often so proxies keep them open.
+SUMMARY_EVENTS_KEEPALIVE = 15
+# SSE streams end after this long; EventSource clients then reconnect.
+SUMMARY_EVENTS_MAX_SECONDS = 900
 
 
-def get_text(document_id: str) -> dict:
-    text = storage.get_document(document_id)
-    if not text:
+async def get_text(document_id: str, if_none_match: str | None = None) -> Response:
+    metadata = await _get_metadata(document_id)
+    # Answered from the index alone, before the text is read.
+    etag = _etag(metadata["content_hash"])
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    text = await storage.get_document(document_id)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"document_id": document_id, "text": text},
+        headers={"ETag": etag},
+    )
+
+
+async def delete_text(document_id: str) -> Response:
+    if not await retention.delete_document(document_id):
         raise DocumentDoesNotExistsError(
             attribute_name="document_id", attribute_value=document_id
         )
+    logger.info(f"Deleted document {document_id}")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-    return text
 
+async def pin_text(document_id: str, pinned: bool) -> JSONResponse:
+    if not await storage.set_pinned(document_id, pinned):
+        raise DocumentDoesNotExistsError(
+            attribute_name="document_id", attribute_value=document_id
+        )
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"document_id": document_id, "pinned": pinned},
+    )
+
+
+def cache_stats() -> dict:
+    return storage.cache.stats()
 
-def store_text(text: str) -> str:
-    document_id = storage.store_document(text)
+
+async def store_text(text: str) -> str:
+    document_id = await storage.store_document(text)
     return JSONResponse(
         status_code=status.HTTP_201_CREATED, content={"document_id": document_id}
     )
 
 
-def summarize_text(document_id: str) -> JSONResponse:
+async def store_texts(texts: list[str]) -> JSONResponse:
+    document_ids = await storage.store_documents(texts)
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED, content={"document_ids": document_ids}
+    )
+
+
+async def store_text_stream(chunks: AsyncIterator[bytes]) -> JSONResponse:
+    writer = storage.open_document_writer()
     try:
-        text = get_text(document_id)
-    except FileNotFoundError:
-        return JSONResponse(
-            status_code=status.HTTP_404_NOT_FOUND,
-            content={"message": "Document not found"},
-        )
+        async for chunk in chunks:
+            await writer.write(chunk)
+        document_id = await writer.commit()
+    except UnicodeDecodeError as e:
+        await writer.abort()
+        raise InvalidDocumentEncodingError() from e
+    except BaseException:
+        await writer.abort()
+        raise
 
-    existing_summary = storage.get_summary(document_id)
-    if existing_summary:
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content={"document_id": document_id, "summary": existing_summary},
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED, content={"document_id": document_id}
+    )
+
+
+async def stream_text(document_id: str, range_header: str | None) -> StreamingResponse:
+    size = await storage.get_document_size(document_id)
+    if size is None:
+        raise DocumentDoesNotExistsError(
+            attribute_name="document_id", attribute_value=document_id
         )
+    retention.record_access(document_id)
 
-    task_key = f"summary_task:{document_id}"
-    existing_task_id = redis_client.get(task_key)
+    headers = {"Accept-Ranges": "bytes"}
+    if range_header is None:
+        start, end = 0, size
+        status_code = status.HTTP_200_OK
+    else:
+        start, end = _parse_range(range_header, size)
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    headers["Content-Length"] = str(end - start)
 
-    if existing_task_id:
-        task_result = celery_app.AsyncResult(existing_task_id)
+    return StreamingResponse(
+        storage.iter_document(document_id, start, end),
+        status_code=status_code,
+        headers=headers,
+        media_type="text/plain; charset=utf-8",
+    )
 
-        if task_result.state in ["PENDING", "PROGRESS"]:
-            return JSONResponse(
-                status_code=status.HTTP_202_ACCEPTED,
-                content={
-                    "document_id": document_id,
-                    "message": "Summary is being generated. Please try again soon.",
-                    "task_id": existing_task_id,
-                    "status": task_result.state.lower(),
-                },
-            )
-        elif task_result.state == "SUCCESS":
-            return JSONResponse(
-                status_code=status.HTTP_200_OK,
-                content={
+
+def _parse_range(range_header: str, size: int) -> tuple[int, int]:
+    """Parse a single ``bytes=`` range into a half-open [start, end) interval."""
+    unit, _, spec = range_header.partition("=")
+    try:
+        if unit.strip() != "bytes" or "," in spec:
+            raise ValueError
+        first, _, last = spec.strip().partition("-")
+        if first:
+            start = int(first)
+            end = min(int(last) + 1, size) if last else size
+        else:
+            start = max(size - int(last), 0)
+            end = size
+    except ValueError:
+        raise RangeNotSatisfiableError(range_header, size)
+
+    if start >= end:
+        raise RangeNotSatisfiableError(range_header, size)
+
+    return start, end
+
+
+async def summarize_texts(document_ids: list[str]) -> JSONResponse:
+    """Return the summary or generation state of many documents at once.
+
+    Index and summary lookups are each done in one batch, every task status is
+    read or claimed in one pipelined round trip, and all missing summaries are
+    published over a single producer.
+    Results keep the order of document_ids.
+    """
+    metadata = await storage.get_metadata_many(document_ids)
+    for document_id in metadata:
+        retention.record_access(document_id)
+    summaries = await storage.get_summaries(
+        [document_id for document_id, m in metadata.items() if m["has_summary"]]
+    )
+
+    # One task per distinct content, shared by every id that uploaded it.
+    waiting = {}
+    for document_id in dict.fromkeys(document_ids):
+        if document_id in metadata and document_id not in summaries:
+            waiting.setdefault(metadata[document_id]["content_hash"], document_id)
+
+    content_hashes = list(waiting)
+    new_task_ids = [str(uuid.uuid4()) for _ in content_hashes]
+    statuses = await summary_status.claim_many(content_hashes, new_task_ids)
+    tasks = dict(zip(content_hashes, statuses))
+
+    claimed = [
+        (metadata[waiting[content_hash]], task_id)
+        for content_hash, task_id, task_status in zip(
+            content_hashes, new_task_ids, statuses
+        )
+        if task_status["task_id"] == task_id
+    ]
+    if claimed:
+        await _dispatch_summaries(claimed)
+        logger.info(f"Started {len(claimed)} summary tasks in bulk")
+
+    results = []
+    for document_id in document_ids:
+        if document_id not in metadata:
+            results.append({"document_id": document_id, "status": "not_found"})
+        elif document_id in summaries:
+            results.append(
+                {
                     "document_id": document_id,
-                    "summary": task_result.result["summary"],
-                },
+                    "status": "completed",
+                    "summary": summaries[document_id],
+                }
             )
         else:
-            redis_client.delete(task_key)
+            task_status = tasks[metadata[document_id]["content_hash"]]
+            if task_status["state"] == "SUCCESS":
+                results.append(
+                    {
+                        "document_id": document_id,
+                        "status": "completed",
+                        "summary": task_status["summary"],
+                    }
+                )
+            else:
+                result = {
+                    "document_id": document_id,
+                    "status": task_status["state"].lower(),
+                    "task_id": task_status["task_id"],
+                }
+                progress = summary_progress(task_status)
+                if progress:
+                    result["progress"] = progress
+                results.append(result)
+
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"results": results})
+
+
+async def _dispatch_summaries(claims: list[tuple[dict, str]]):
+    """Enqueue a task for each (document metadata, task_id) slot this request
+    claimed, routed to the queue for the document's size.
 
-    task = generate_summary.delay(document_id, text)
+    Claims are released if publishing fails, so the next request retries
+    instead of waiting on a task that was never sent.
+    """
+
+    def publish():
+        # One broker connection and channel for the whole batch.
+        with celery_app.producer_or_acquire() as producer:
+            for metadata, task_id in claims:
+                generate_summary.apply_async(
+                    (metadata["document_id"],),
+                    task_id=task_id,
+                    producer=producer,
+                    **summary_route(metadata["size"]),
+                )
+
+    try:
+        # Publishing to the broker is blocking kombu I/O.
+        await asyncio.to_thread(publish)
+    except BaseException:
+        for metadata, task_id in claims:
+            await summary_status.release(metadata["content_hash"], task_id)
+        raise
+    SUMMARY_TASKS.inc(len(claims), state="PENDING")
 
-    redis_client.setex(task_key, 3600, task.id)
 
-    print(f"Started summary task {task.id} for document {document_id}")
+async def summarize_text(
+    document_id: str,
+    wait: float = 0,
+    mode: str = ABSTRACTIVE,
+    provisional: bool = False,
+    if_none_match: str | None = None,
+) -> Response:
+    """Return the summary, or the state of its generation.
+
+    With wait > 0 a pending request is held open until the worker reports a
+    new stage or stores the summary, or until wait seconds pass. The
+    extractive mode is computed synchronously and never starts a task; with
+    provisional, a pending abstractive response carries it as a stand-in.
+    Stored summaries carry a strong ETag and revalidate with 304.
+    """
+    metadata = await _get_metadata(document_id)
+
+    summary_hash = metadata.get("summary_hash")
+    if (
+        mode == ABSTRACTIVE
+        and summary_hash
+        and _etag_matches(if_none_match, _etag(summary_hash))
+    ):
+        return _not_modified(_etag(summary_hash))
+
+    if mode == EXTRACTIVE:
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "document_id": document_id,
+                "summary": await _extractive_summary(document_id),
+                "mode": EXTRACTIVE,
+            },
+        )
 
+    if wait <= 0:
+        status_code, content = await _summary_status(document_id, metadata)
+    else:
+        # Subscribe before reading the state so no event can slip in between.
+        async with summary_events.subscribe(metadata["content_hash"]) as events:
+            status_code, content = await _summary_status(document_id, metadata)
+            if status_code == status.HTTP_202_ACCEPTED:
+                if await next_event(events, wait) is not None:
+                    status_code, content = await _summary_status(document_id, metadata)
+
+    if provisional and status_code == status.HTTP_202_ACCEPTED:
+        content["provisional_summary"] = await _extractive_summary(document_id)
+
+    if status_code != status.HTTP_200_OK:
+        return JSONResponse(status_code=status_code, content=content)
+
+    etag = _etag(storage.hash_content(content["summary"]))
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
     return JSONResponse(
-        status_code=status.HTTP_202_ACCEPTED,
-        content={
-            "document_id": document_id,
-            "message": "Summary generation started",
-            "task_id": task.id,
-            "status": "pending",
-        },
+        status_code=status_code, content=content, headers={"ETag": etag}
+    )
+
+
+def _etag(object_hash: str) -> str:
+    return f'"{object_hash}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ tags match too.
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+async def _extractive_summary(document_id: str) -> str:
+    text = await storage.get_document(document_id)
+    # Sentence splitting and scoring are CPU-bound.
+    return await asyncio.to_thread(extractive_summary, text)
+
+
+async def stream_summary_events(document_id: str) -> StreamingResponse:
+    metadata = await _get_metadata(document_id)
+    return StreamingResponse(
+        _summary_event_stream(document_id, metadata),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
+
+
+async def _summary_event_stream(document_id: str, metadata: dict) -> AsyncIterator[str]:
+    content_hash = metadata["content_hash"]
+    deadline = time.monotonic() + SUMMARY_EVENTS_MAX_SECONDS
+    async with summary_events.subscribe(content_hash) as events:
+        status_code, content = await _summary_status(document_id, metadata)
+        sent = None
+        while status_code == status.HTTP_202_ACCEPTED:
+            # The message differs between starting and joining a task, which
+            # is no news to a client already following it.
+            state = {
+                name: value for name, value in content.items() if name != "message"
+            }
+            if state != sent:
+                yield _sse("status", content)
+                sent = state
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            event = await next_event(events, min(SUMMARY_EVENTS_KEEPALIVE, remaining))
+            if event is None:
+                yield ": keep-alive\n\n"
+            elif event["state"] == "FAILURE":
+                yield _sse("error", {"document_id": document_id, **event})
+                return
+
+            # Only read the status here: claiming it again would start another
+            # task once the status of this one has expired.
+            summary = await storage.get_summary(document_id)
+            if summary:
+                status_code = status.HTTP_200_OK
+                content = {"document_id": document_id, "summary": summary}
+                continue
+            task_status = await summary_status.get(content_hash)
+            if not task_status:
+                yield _sse(
+                    "error",
+                    {
+                        "document_id": document_id,
+                        "state": "EXPIRED",
+                        "error": "Summary status expired, request the summary again",
+                    },
+                )
+                return
+            if task_status["state"] == "FAILURE":
+                yield _sse("error", {"document_id": document_id, **task_status})
+                return
+            content = _pending_content(document_id, task_status)
+        yield _sse("summary", content)
+
+
+def _pending_content(document_id: str, task_status: dict) -> dict:
+    content = {
+        "document_id": document_id,
+        "message": "Summary is being generated. Please try again soon.",
+        "task_id": task_status["task_id"],
+        "status": task_status["state"].lower(),
+    }
+    progress = summary_progress(task_status)
+    if progress:
+        content["progress"] = progress
+    return content
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _get_metadata(document_id: str) -> dict:
+    # The worker reads the text from storage itself, so the API only needs to
+    # know that the document exists.
+    metadata = await storage.get_metadata(document_id)
+    if metadata is None:
+        raise DocumentDoesNotExistsError(
+            attribute_name="document_id", attribute_value=document_id
+        )
+    retention.record_access(document_id)
+    return metadata
+
+
+async def _summary_status(document_id: str, metadata: dict) -> tuple[int, dict]:
+    """Resolve the summary or its task state, starting a task if none runs."""
+    existing_summary = await storage.get_summary(document_id)
+    if existing_summary:
+        return status.HTTP_200_OK, {
+            "document_id": document_id,
+            "summary": existing_summary,
+        }
+
+    # Tasks are keyed by content so byte-identical uploads under different
+    # document ids join the same in-flight summary instead of starting another.
+    # The claim reads the task status and, if no task is live, reserves the
+    # slot for task_id in the same atomic round trip.
+    content_hash = metadata["content_hash"]
+    task_id = str(uuid.uuid4())
+    task_status = await summary_status.claim(content_hash, task_id)
+
+    if task_status["state"] == "SUCCESS":
+        return status.HTTP_200_OK, {
+            "document_id": document_id,
+            "summary": task_status["summary"],
+        }
+    if task_status["task_id"] != task_id:
+        return status.HTTP_202_ACCEPTED, _pending_content(document_id, task_status)
+
+    await _dispatch_summaries([(metadata, task_id)])
+
+    logger.info(f"Started summary task {task_id} for document {document_id}")
+
+    return status.HTTP_202_ACCEPTED, {
+        "document_id": document_id,
+        "message": "Summary generation started",
+        "task_id": task_id,
+        "status": "pending",
+    }
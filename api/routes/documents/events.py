@@ -0,0 +1,93 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+SUMMARY_EVENTS_PREFIX = "summary_events:"
+
+
+def summary_events_channel(content_hash: str) -> str:
+    return f"{SUMMARY_EVENTS_PREFIX}{content_hash}"
+
+
+def publish_summary_event(redis_client, content_hash: str, event: dict):
+    """Notify API processes waiting on this content that its summary state changed."""
+    redis_client.publish(summary_events_channel(content_hash), json.dumps(event))
+
+
+class SummaryEventHub:
+    """Fans summary events out to every waiting request in this process.
+
+    A single pattern subscription per API process serves all long-poll and SSE
+    clients, so the number of Redis connections does not grow with the number
+    of waiters.
+    """
+
+    def __init__(self, redis_client):
+        self._redis_client = redis_client
+        self._waiters: dict[str, set[asyncio.Queue]] = {}
+        self._pubsub = None
+        self._listener: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_started(self):
+        if self._listener is not None and not self._listener.done():
+            return
+        async with self._lock:
+            if self._listener is not None and not self._listener.done():
+                return
+            self._pubsub = self._redis_client.pubsub()
+            await self._pubsub.psubscribe(f"{SUMMARY_EVENTS_PREFIX}*")
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        async for message in self._pubsub.listen():
+            if message["type"] != "pmessage":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            event = json.loads(message["data"])
+            for queue in self._waiters.get(channel, ()):
+                queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, content_hash: str) -> AsyncIterator[asyncio.Queue]:
+        """Register a queue receiving every event for content_hash.
+
+        The subscription is live once the context is entered, so state checked
+        inside the block cannot miss a later event.
+        """
+        await self._ensure_started()
+        channel = summary_events_channel(content_hash)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._waiters.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            waiters = self._waiters.get(channel)
+            if waiters is not None:
+                waiters.discard(queue)
+                if not waiters:
+                    del self._waiters[channel]
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        # The lock binds to the running loop; start fresh for the next one.
+        self._lock = asyncio.Lock()
+
+
+async def next_event(queue: asyncio.Queue, timeout: float) -> dict | None:
+    try:
+        return await asyncio.wait_for(queue.get(), timeout)
+    except asyncio.TimeoutError:
+        return None
@@ -9,3 +9,14 @@ class DocumentDoesNotExistsError(DocumentError):
         super().__init__(
             f"Document with {attribute_name}={attribute_value} does not exists"
         )
+
+
+class InvalidDocumentEncodingError(DocumentError):
+    def __init__(self):
+        super().__init__("Document body must be UTF-8 encoded text")
+
+
+class RangeNotSatisfiableError(DocumentError):
+    def __init__(self, range_header: str, size: int):
+        self.size = size
+        super().__init__(f"Range {range_header} is not satisfiable for {size} bytes")
@@ -0,0 +1,307 @@
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contents (
+    content_hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    has_summary INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL REFERENCES contents (content_hash),
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_content_hash ON documents (content_hash);
+"""
+
+# Columns added after the first release of the index, created on open.
+MIGRATIONS = {
+    "contents": {
+        "compression": "ALTER TABLE contents ADD COLUMN compression TEXT"
+        " NOT NULL DEFAULT 'none'",
+        "summary_compression": "ALTER TABLE contents ADD COLUMN summary_compression"
+        " TEXT NOT NULL DEFAULT 'none'",
+        "summary_hash": "ALTER TABLE contents ADD COLUMN summary_hash TEXT",
+    },
+    "documents": {
+        "accessed_at": "ALTER TABLE documents ADD COLUMN accessed_at REAL",
+        "pinned": "ALTER TABLE documents ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0",
+    },
+}
+
+# Connections a forked child inherited from its parent. They are never used,
+# and never closed either: closing one would run SQLite's close path, WAL
+# cleanup included, on a database the parent still has open.
+_inherited_connections: list[sqlite3.Connection] = []
+
+# A document never read since upload was last accessed when it was created.
+LAST_ACCESS = "COALESCE(d.accessed_at, d.created_at)"
+
+
+class DocumentIndex:
+    """SQLite index of document id -> content hash, size, creation and last
+    access time, pinning and summary presence, shared by the API and worker
+    processes."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+            for table, migrations in MIGRATIONS.items():
+                columns = {
+                    row["name"]
+                    for row in connection.execute(f"PRAGMA table_info({table})")
+                }
+                for column, statement in migrations.items():
+                    if column not in columns:
+                        connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Stored per thread and per process: SQLite connections must not be
+        # carried across fork(), and the worker opens the index in the prefork
+        # parent.
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid != os.getpid():
+            _inherited_connections.append(connection)
+            connection = None
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def add_document(
+        self,
+        document_id: str,
+        content_hash: str,
+        size: int,
+        created_at: float | None = None,
+        compression: str = "none",
+    ) -> str:
+        """Index a document. Returns the compression its content is stored
+        with, which is only compression if the content was not indexed yet."""
+        codecs = self.add_documents(
+            [(document_id, content_hash, size, compression)], created_at
+        )
+        return codecs[content_hash]
+
+    def add_documents(
+        self, rows: list[tuple[str, str, int, str]], created_at: float | None = None
+    ) -> dict[str, str]:
+        """Insert (document_id, content_hash, size, compression) rows at once.
+        Returns the stored compression of each content hash."""
+        created_at = created_at or time.time()
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO contents (content_hash, size, compression)"
+                " VALUES (?, ?, ?)",
+                [(content_hash, size, codec) for _, content_hash, size, codec in rows],
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO documents (document_id, content_hash, created_at)"
+                " VALUES (?, ?, ?)",
+                [
+                    (document_id, content_hash, created_at)
+                    for document_id, content_hash, _, _ in rows
+                ],
+            )
+            return {
+                content_hash: connection.execute(
+                    "SELECT compression FROM contents WHERE content_hash = ?",
+                    (content_hash,),
+                ).fetchone()["compression"]
+                for content_hash in {content_hash for _, content_hash, _, _ in rows}
+            }
+
+    def get(self, document_id: str) -> dict | None:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT d.document_id, d.content_hash, d.created_at, d.pinned,"
+                " c.size, c.has_summary, c.compression, c.summary_compression,"
+                " c.summary_hash"
+                " FROM documents d"
+                " JOIN contents c ON c.content_hash = d.content_hash"
+                " WHERE d.document_id = ?",
+                (document_id,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+
+        return _metadata(row)
+
+    def get_many(self, document_ids: list[str]) -> dict[str, dict]:
+        if not document_ids:
+            return {}
+        placeholders = ", ".join("?" * len(document_ids))
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT d.document_id, d.content_hash, d.created_at, d.pinned,"
+                " c.size, c.has_summary, c.compression, c.summary_compression,"
+                " c.summary_hash"
+                " FROM documents d"
+                " JOIN contents c ON c.content_hash = d.content_hash"
+                f" WHERE d.document_id IN ({placeholders})",
+                list(document_ids),
+            )
+            .fetchall()
+        )
+        return {row["document_id"]: _metadata(row) for row in rows}
+
+    def get_content(self, content_hash: str) -> dict | None:
+        row = (
+            self._connection()
+            .execute("SELECT * FROM contents WHERE content_hash = ?", (content_hash,))
+            .fetchone()
+        )
+        return dict(row) if row else None
+
+    def mark_summary(
+        self,
+        content_hash: str,
+        compression: str = "none",
+        summary_hash: str | None = None,
+    ):
+        with self._connection() as connection:
+            connection.execute(
+                "UPDATE contents SET has_summary = 1, summary_compression = ?,"
+                " summary_hash = ? WHERE content_hash = ?",
+                (compression, summary_hash, content_hash),
+            )
+
+    def touch(self, accessed: dict[str, float]):
+        """Record the last access time of many documents at once."""
+        with self._connection() as connection:
+            connection.executemany(
+                "UPDATE documents SET accessed_at = MAX(COALESCE(accessed_at, 0), ?)"
+                " WHERE document_id = ?",
+                [
+                    (accessed_at, document_id)
+                    for document_id, accessed_at in accessed.items()
+                ],
+            )
+
+    def set_pinned(self, document_id: str, pinned: bool) -> bool:
+        """Exempt a document from retention, or make it subject to it again.
+        Returns False if the document does not exist."""
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "UPDATE documents SET pinned = ? WHERE document_id = ?",
+                (int(pinned), document_id),
+            )
+        return cursor.rowcount > 0
+
+    def delete_document(
+        self, document_id: str, delete_objects: Callable[[dict], None] | None = None
+    ) -> dict | None:
+        """Remove a document id. Returns its content row, with ``orphaned``
+        set if no other document references the content any more and its row
+        was removed too, or None if the document does not exist.
+
+        delete_objects is called with the row of an orphaned content before
+        the transaction commits, so no document can be indexed under the
+        content while its objects are being removed.
+        """
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT c.* FROM documents d"
+                " JOIN contents c ON c.content_hash = d.content_hash"
+                " WHERE d.document_id = ?",
+                (document_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "DELETE FROM documents WHERE document_id = ?", (document_id,)
+            )
+            cursor = connection.execute(
+                "DELETE FROM contents WHERE content_hash = ? AND NOT EXISTS"
+                " (SELECT 1 FROM documents WHERE content_hash = ?)",
+                (row["content_hash"], row["content_hash"]),
+            )
+            if cursor.rowcount > 0 and delete_objects is not None:
+                delete_objects(dict(row))
+        return {**dict(row), "orphaned": cursor.rowcount > 0}
+
+    def delete_content(
+        self, content_hash: str, delete_objects: Callable[[dict], None] | None = None
+    ) -> dict | None:
+        """Remove a content and every document id referencing it. Returns the
+        content row with the number of ``documents`` removed, or None.
+
+        delete_objects is called with the row as in delete_document.
+        """
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT * FROM contents WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if row is None:
+                return None
+            cursor = connection.execute(
+                "DELETE FROM documents WHERE content_hash = ?", (content_hash,)
+            )
+            connection.execute(
+                "DELETE FROM contents WHERE content_hash = ?", (content_hash,)
+            )
+            if delete_objects is not None:
+                delete_objects(dict(row))
+        return {**dict(row), "documents": cursor.rowcount}
+
+    def expired_documents(self, created_before: float, limit: int) -> list[str]:
+        """Unpinned document ids uploaded before created_before, oldest first."""
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT document_id FROM documents"
+                " WHERE pinned = 0 AND created_at < ? ORDER BY created_at LIMIT ?",
+                (created_before, limit),
+            )
+            .fetchall()
+        )
+        return [row["document_id"] for row in rows]
+
+    def total_size(self) -> int:
+        """Bytes of all stored texts, each distinct content counted once."""
+        row = (
+            self._connection()
+            .execute("SELECT COALESCE(SUM(size), 0) AS size FROM contents")
+            .fetchone()
+        )
+        return row["size"]
+
+    def least_recently_used(self, limit: int) -> list[dict]:
+        """Contents with no pinned document, least recently accessed first.
+
+        A content was last accessed when any of its documents was.
+        """
+        rows = (
+            self._connection()
+            .execute(
+                f"SELECT c.content_hash, c.size, MAX({LAST_ACCESS}) AS accessed_at"
+                " FROM contents c JOIN documents d ON d.content_hash = c.content_hash"
+                " GROUP BY c.content_hash HAVING MAX(d.pinned) = 0"
+                " ORDER BY accessed_at LIMIT ?",
+                (limit,),
+            )
+            .fetchall()
+        )
+        return [dict(row) for row in rows]
+
+
+def _metadata(row: sqlite3.Row) -> dict:
+    metadata = dict(row)
+    metadata["has_summary"] = bool(metadata["has_summary"])
+    metadata["pinned"] = bool(metadata["pinned"])
+    return metadata
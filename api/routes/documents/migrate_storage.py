@@ -0,0 +1,99 @@
+"""Convert an existing document store to the sharded, indexed layout in place.
+
+Handles both the original flat layout (``<document_id>.txt`` and
+``<document_id>-summary.txt`` next to each other) and the unsharded
+content-addressed layout (``objects/<sha256>.txt`` plus ``refs/<document_id>``).
+Files are moved, not copied, and only after they are indexed, so an
+interrupted migration is completed by running it again.
+
+Usage: python -m routes.documents.migrate_storage [base_path]
+"""
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+from .storage import DocumentStorage
+
+
+def _move_object(source: Path, destination: Path):
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    if destination.exists():
+        source.unlink()
+    else:
+        os.replace(source, destination)
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def migrate(base_path: str = "document_storage") -> dict:
+    storage = DocumentStorage(base_path)
+    stats = {"documents": 0, "summaries": 0, "objects": 0}
+
+    # Flat layout: one file per document id.
+    for path in sorted(storage.base_path.glob("*.txt")):
+        if path.name.endswith("-summary.txt"):
+            continue
+
+        document_id = path.stem
+        content_hash = _hash_file(path)
+        size = path.stat().st_size
+        created_at = path.stat().st_mtime
+        storage.index.add_document(document_id, content_hash, size, created_at)
+
+        summary_path = storage.base_path / f"{document_id}-summary.txt"
+        if summary_path.exists():
+            storage.index.mark_summary(content_hash)
+            _move_object(
+                summary_path, storage.object_path(content_hash, "-summary.txt")
+            )
+            stats["summaries"] += 1
+
+        # Moved last: until it is, a re-run migrates this document again.
+        _move_object(path, storage.object_path(content_hash))
+        stats["documents"] += 1
+
+    # Unsharded content-addressed layout.
+    for path in sorted(storage.objects_path.glob("*.txt")):
+        if path.name.endswith("-summary.txt"):
+            content_hash = path.name.removesuffix("-summary.txt")
+            storage.index.mark_summary(content_hash)
+            _move_object(path, storage.object_path(content_hash, "-summary.txt"))
+            stats["summaries"] += 1
+        else:
+            _move_object(path, storage.object_path(path.stem))
+            stats["objects"] += 1
+
+    refs_path = storage.base_path / "refs"
+    if refs_path.is_dir():
+        for ref_path in sorted(refs_path.iterdir()):
+            content_hash = ref_path.read_text(encoding="utf-8").strip()
+            object_path = storage.object_path(content_hash)
+            storage.index.add_document(
+                ref_path.name,
+                content_hash,
+                object_path.stat().st_size,
+                ref_path.stat().st_mtime,
+            )
+            if storage.object_path(content_hash, "-summary.txt").exists():
+                storage.index.mark_summary(content_hash)
+            ref_path.unlink()
+            stats["documents"] += 1
+        refs_path.rmdir()
+
+    return stats
+
+
+if __name__ == "__main__":
+    result = migrate(*sys.argv[1:2])
+    print(
+        f"Migrated {result['documents']} documents, {result['summaries']} summaries "
+        f"and {result['objects']} objects"
+    )
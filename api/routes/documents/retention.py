@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import time
+
+from core.metrics import (
+    DOCUMENT_BYTES_RECLAIMED,
+    DOCUMENTS_DELETED,
+    RETENTION_SWEEP_SECONDS,
+)
+
+from .async_storage import AsyncDocumentStorage
+from .summary_status import SummaryStatusStore
+
+logger = logging.getLogger("momentum.retention")
+
+# Documents uploaded longer ago than this are removed; 0 keeps them forever.
+DOCUMENT_RETENTION_MAX_AGE_SECONDS = float(
+    os.environ.get("DOCUMENT_RETENTION_MAX_AGE_SECONDS", 0)
+)
+# Least recently accessed contents are removed while the stored texts exceed
+# this many bytes; 0 disables the limit.
+DOCUMENT_RETENTION_MAX_BYTES = int(os.environ.get("DOCUMENT_RETENTION_MAX_BYTES", 0))
+DOCUMENT_RETENTION_SWEEP_SECONDS = float(
+    os.environ.get("DOCUMENT_RETENTION_SWEEP_SECONDS", 300)
+)
+
+# Held for one sweep interval by whichever API process sweeps.
+SWEEP_LOCK_KEY = "document_retention_sweep"
+SWEEP_BATCH_SIZE = 500
+
+
+class RetentionSweeper:
+    """Applies the retention policies to the document store from the API.
+
+    Every ``DOCUMENT_RETENTION_SWEEP_SECONDS`` each API process writes the
+    access times it buffered to the index, and one of them, holding a Redis
+    lock for the interval, removes unpinned documents older than the max age
+    and then the least recently accessed unpinned contents until the stored
+    texts fit in the max bytes. A content is removed with its text, summary
+    and Redis keys once its last document id goes.
+    """
+
+    def __init__(
+        self,
+        storage: AsyncDocumentStorage,
+        summary_status: SummaryStatusStore,
+        redis_client,
+        max_age_seconds: float = DOCUMENT_RETENTION_MAX_AGE_SECONDS,
+        max_bytes: int = DOCUMENT_RETENTION_MAX_BYTES,
+        interval: float = DOCUMENT_RETENTION_SWEEP_SECONDS,
+    ):
+        self.storage = storage
+        self.summary_status = summary_status
+        self._redis_client = redis_client
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self._accessed: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0 and (self.max_age_seconds > 0 or self.max_bytes > 0)
+
+    def record_access(self, document_id: str):
+        # Only the byte limit evicts by last access, so nothing else pays for
+        # tracking it.
+        if self.enabled and self.max_bytes > 0:
+            self._accessed[document_id] = time.time()
+
+    async def flush_access(self):
+        accessed, self._accessed = self._accessed, {}
+        if accessed:
+            await asyncio.to_thread(self.storage.index.touch, accessed)
+
+    async def delete_document(self, document_id: str, reason: str = "api") -> bool:
+        """Remove a document id, and its content with everything derived from
+        it once no other document id shares it. Returns False if it does not
+        exist."""
+        removed = await self.storage.delete_document(document_id)
+        if removed is None:
+            return False
+        DOCUMENTS_DELETED.inc(reason=reason)
+        if removed["orphaned"]:
+            await self._forget(removed, reason)
+        return True
+
+    async def _delete_content(self, content_hash: str, reason: str) -> dict | None:
+        removed = await self.storage.delete_content(content_hash)
+        if removed is not None:
+            DOCUMENTS_DELETED.inc(removed["documents"], reason=reason)
+            await self._forget(removed, reason)
+        return removed
+
+    async def _forget(self, content: dict, reason: str):
+        DOCUMENT_BYTES_RECLAIMED.inc(content["size"], reason=reason)
+        await self.summary_status.forget(content["content_hash"])
+
+    async def sweep(self, now: float | None = None) -> dict:
+        """Apply the retention policies once; returns what was removed."""
+        now = time.time() if now is None else now
+        index = self.storage.index
+        removed = {"max_age": 0, "max_bytes": 0}
+
+        with RETENTION_SWEEP_SECONDS.time():
+            if self.max_age_seconds > 0:
+                created_before = now - self.max_age_seconds
+                while document_ids := await asyncio.to_thread(
+                    index.expired_documents, created_before, SWEEP_BATCH_SIZE
+                ):
+                    for document_id in document_ids:
+                        if await self.delete_document(document_id, "max_age"):
+                            removed["max_age"] += 1
+
+            if self.max_bytes > 0:
+                excess = await asyncio.to_thread(index.total_size) - self.max_bytes
+                while excess > 0 and (
+                    contents := await asyncio.to_thread(
+                        index.least_recently_used, SWEEP_BATCH_SIZE
+                    )
+                ):
+                    for content in contents:
+                        if excess <= 0:
+                            break
+                        removed_content = await self._delete_content(
+                            content["content_hash"], "max_bytes"
+                        )
+                        if removed_content is not None:
+                            excess -= content["size"]
+                            removed["max_bytes"] += 1
+
+        if any(removed.values()):
+            logger.info(
+                f"Retention sweep removed {removed['max_age']} expired documents"
+                f" and {removed['max_bytes']} contents over the byte limit"
+            )
+        return removed
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush_access()
+                if await self._redis_client.set(
+                    SWEEP_LOCK_KEY, os.getpid(), nx=True, ex=max(int(self.interval), 1)
+                ):
+                    await self.sweep()
+            except Exception as e:
+                logger.warning(f"Retention sweep failed: {e}")
+
+    def start(self):
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_access()
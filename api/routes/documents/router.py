@@ -1,31 +1,131 @@
-from fastapi import APIRouter, HTTPException, status, Form
-from fastapi.responses import JSONResponse
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, status, Form, Header, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from . import controller, exceptions
+from .schemas import BulkStoreRequest, BulkSummaryRequest
 
 router = APIRouter(prefix="/documents", tags=["Document"])
 
 
 @router.post("", operation_id="store_text")
-def store_text(
+async def store_text(
     text: str = Form(...),
 ) -> JSONResponse:
-    return controller.store_text(text=text)
+    return await controller.store_text(text=text)
+
+
+@router.post("/bulk", operation_id="store_texts")
+async def store_texts(body: BulkStoreRequest) -> JSONResponse:
+    return await controller.store_texts(texts=body.texts)
+
+
+@router.post("/bulk/summary", operation_id="summarize_texts")
+async def summarize_texts(body: BulkSummaryRequest) -> JSONResponse:
+    return await controller.summarize_texts(document_ids=body.document_ids)
+
+
+@router.post("/raw", operation_id="store_text_stream")
+async def store_text_stream(request: Request) -> JSONResponse:
+    try:
+        return await controller.store_text_stream(chunks=request.stream())
+    except exceptions.InvalidDocumentEncodingError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+
+
+@router.get("/cache/stats", operation_id="cache_stats", response_model=dict)
+async def cache_stats() -> dict:
+    return controller.cache_stats()
+
 
 @router.get("/{document_id}", operation_id="get_text", response_model=dict)
-def get_text(document_id: str) -> dict:
+async def get_text(
+    document_id: str,
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+) -> Response:
     try:
-        text = controller.get_text(document_id=document_id)
-        return {"document_id": document_id, "text": text}
+        return await controller.get_text(
+            document_id=document_id, if_none_match=if_none_match
+        )
     except exceptions.DocumentDoesNotExistsError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
 
 
+@router.delete(
+    "/{document_id}",
+    operation_id="delete_text",
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+)
+async def delete_text(document_id: str) -> Response:
+    try:
+        return await controller.delete_text(document_id=document_id)
+    except exceptions.DocumentDoesNotExistsError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+
+
+@router.put("/{document_id}/pin", operation_id="pin_text", response_model=dict)
+async def pin_text(document_id: str) -> JSONResponse:
+    try:
+        return await controller.pin_text(document_id=document_id, pinned=True)
+    except exceptions.DocumentDoesNotExistsError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+
+
+@router.delete("/{document_id}/pin", operation_id="unpin_text", response_model=dict)
+async def unpin_text(document_id: str) -> JSONResponse:
+    try:
+        return await controller.pin_text(document_id=document_id, pinned=False)
+    except exceptions.DocumentDoesNotExistsError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+
+
+@router.get("/{document_id}/raw", operation_id="stream_text")
+async def stream_text(
+    document_id: str, range_header: str | None = Header(default=None, alias="Range")
+) -> StreamingResponse:
+    try:
+        return await controller.stream_text(
+            document_id=document_id, range_header=range_header
+        )
+    except exceptions.DocumentDoesNotExistsError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+    except exceptions.RangeNotSatisfiableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail=str(e),
+            headers={"Content-Range": f"bytes */{e.size}"},
+        ) from e
+
+
 @router.get(
     "/{document_id}/summary", operation_id="summarize_text", response_model=dict
 )
-def summarize_text(document_id: str) -> dict:
+async def summarize_text(
+    document_id: str,
+    wait: float = Query(default=0, ge=0, le=controller.SUMMARY_WAIT_MAX),
+    mode: Literal["abstractive", "extractive"] = Query(default=controller.ABSTRACTIVE),
+    provisional: bool = Query(default=False),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+) -> Response:
+    try:
+        return await controller.summarize_text(
+            document_id=document_id,
+            wait=wait,
+            mode=mode,
+            provisional=provisional,
+            if_none_match=if_none_match,
+        )
+    except exceptions.DocumentDoesNotExistsError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+
+
+@router.get("/{document_id}/summary/events", operation_id="stream_summary_events")
+async def stream_summary_events(document_id: str) -> StreamingResponse:
     try:
-        return controller.summarize_text(document_id=document_id)
+        return await controller.stream_summary_events(document_id=document_id)
     except exceptions.DocumentDoesNotExistsError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
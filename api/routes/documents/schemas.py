@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+
+# Upper bound on documents per bulk request, keeping one request's index
+# query, Redis round trips and response size bounded.
+BULK_MAX_DOCUMENTS = 1000
+
+
+class BulkStoreRequest(BaseModel):
+    texts: list[str] = Field(min_length=1, max_length=BULK_MAX_DOCUMENTS)
+
+
+class BulkSummaryRequest(BaseModel):
+    document_ids: list[str] = Field(min_length=1, max_length=BULK_MAX_DOCUMENTS)
@@ -0,0 +1,342 @@
+import fcntl
+import logging
+import mmap
+import os
+import shutil
+import sqlite3
+import struct
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger("momentum.segments")
+
+# The active segment is sealed and a new one started once it would grow past
+# this size.
+SEGMENT_MAX_BYTES = int(os.environ.get("DOCUMENT_SEGMENT_MAX_BYTES", 64 * 1024 * 1024))
+# How often each process looks for sealed segments worth compacting; 0 turns
+# background compaction off.
+SEGMENT_COMPACTION_SECONDS = float(
+    os.environ.get("DOCUMENT_SEGMENT_COMPACTION_SECONDS", 300)
+)
+# Fraction of a sealed segment that must be dead records before it is rewritten.
+SEGMENT_COMPACTION_GARBAGE_RATIO = float(
+    os.environ.get("DOCUMENT_SEGMENT_COMPACTION_GARBAGE_RATIO", 0.5)
+)
+
+# magic, key length, data length
+RECORD_HEADER = struct.Struct("<4sHQ")
+RECORD_MAGIC = b"SEG1"
+COPY_CHUNK_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    key TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_segment ON records (segment);
+"""
+
+# Connections a forked child inherited, kept open for the reason given for
+# the document index's.
+_inherited_connections: list[sqlite3.Connection] = []
+
+
+def record_size(key: str, length: int) -> int:
+    return RECORD_HEADER.size + len(key.encode("utf-8")) + length
+
+
+def _after_fork_in_child(method):
+    """Call a bound method in every forked child, for as long as its object
+    is alive."""
+    method_ref = weakref.WeakMethod(method)
+
+    def call():
+        method = method_ref()
+        if method is not None:
+            method()
+
+    os.register_at_fork(after_in_child=call)
+
+
+class SegmentStore:
+    """Append-only store packing many small objects into large segment files.
+
+    Every object is appended to the active ``segment-<n>.log`` as a record of a
+    fixed header, its key and its bytes; an SQLite offset index maps each key
+    to the segment, offset and length of its latest record. Reads slice a
+    per-process, read-only memory map of the segment, so serving an object
+    costs no open, read or close. Appends and compaction from all processes
+    are serialized by an exclusive lock on ``segments/.lock``.
+
+    Writing a key again or deleting it leaves its previous record behind as
+    garbage. Sealed segments with at least ``SEGMENT_COMPACTION_GARBAGE_RATIO``
+    garbage are compacted by copying their live records to the active segment
+    and deleting the file, every ``SEGMENT_COMPACTION_SECONDS`` in a background
+    thread.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_segment_bytes: int = SEGMENT_MAX_BYTES,
+        compaction_seconds: float = SEGMENT_COMPACTION_SECONDS,
+        garbage_ratio: float = SEGMENT_COMPACTION_GARBAGE_RATIO,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.compaction_seconds = compaction_seconds
+        self.garbage_ratio = garbage_ratio
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._append_lock = threading.Lock()
+        self._maps: dict[int, mmap.mmap] = {}
+        self._pid: int | None = None
+        self._lock_file = None
+        self._active: int | None = None
+        self._active_file = None
+        # Threads holding the locks, e.g. the compactor, do not exist in a
+        # forked child, so it starts with fresh ones.
+        _after_fork_in_child(self._reset_locks)
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _reset_locks(self):
+        self._lock = threading.Lock()
+        self._append_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Per thread and per process, like the document index's.
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid != os.getpid():
+            _inherited_connections.append(connection)
+            connection = None
+        if connection is None:
+            connection = sqlite3.connect(self.path / "segments.sqlite3", timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def segment_path(self, segment: int) -> Path:
+        return self.path / f"segment-{segment:06d}.log"
+
+    def segments(self) -> list[int]:
+        return sorted(
+            int(name[len("segment-") : -len(".log")])
+            for name in os.listdir(self.path)
+            if name.startswith("segment-") and name.endswith(".log")
+        )
+
+    def _ensure_process(self):
+        # A forked child must not share the parent's lock and append file
+        # descriptions or SQLite connection, and needs its own compaction
+        # thread.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._lock_file = open(self.path / ".lock", "a+b")
+            self._active = None
+            self._active_file = None
+            # The parent's maps would stay valid, but hold on to segments
+            # compacted away long before this process reads anything.
+            self._maps = {}
+            if self.compaction_seconds > 0:
+                threading.Thread(
+                    target=self._compact_forever, name="segment-compactor", daemon=True
+                ).start()
+
+    @contextmanager
+    def _exclusive(self):
+        # Serializes appends and compaction within the process and, through
+        # flock, across processes.
+        self._ensure_process()
+        with self._append_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def put(self, key: str, data: bytes):
+        """Append data as the latest version of key."""
+        with self._exclusive():
+            self._append(key, len(data), lambda f: f.write(data))
+
+    def put_file(self, key: str, path: Path):
+        """Append the contents of a file without reading it into memory."""
+        with open(path, "rb") as source, self._exclusive():
+            length = os.fstat(source.fileno()).st_size
+            self._append(
+                key,
+                length,
+                lambda f: shutil.copyfileobj(source, f, COPY_CHUNK_SIZE),
+            )
+
+    def delete(self, key: str) -> bool:
+        """Drop key from the index; compaction reclaims its record."""
+        with self._exclusive(), self._connection() as connection:
+            cursor = connection.execute("DELETE FROM records WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def _append(self, key: str, length: int, write_data):
+        # Called with the exclusive lock held.
+        encoded_key = key.encode("utf-8")
+        f = self._active_segment(record_size(key, length))
+        offset = f.seek(0, os.SEEK_END) + RECORD_HEADER.size + len(encoded_key)
+        f.write(RECORD_HEADER.pack(RECORD_MAGIC, len(encoded_key), length))
+        f.write(encoded_key)
+        write_data(f)
+        # Readers in other processes map the file, so the record must reach
+        # the page cache before the index points at it.
+        f.flush()
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO records (key, segment, offset, length)"
+                " VALUES (?, ?, ?, ?)",
+                (key, self._active, offset, length),
+            )
+
+    def _active_segment(self, size: int):
+        # Other processes may have started newer segments since the last append.
+        active = max(self.segments(), default=1)
+        path = self.segment_path(active)
+        current = path.stat().st_size if path.exists() else 0
+        if current and current + size > self.max_segment_bytes:
+            active += 1
+
+        if active != self._active:
+            if self._active_file is not None:
+                self._active_file.close()
+            self._active = active
+            self._active_file = open(self.segment_path(active), "ab")
+        return self._active_file
+
+    def locate(self, key: str) -> dict | None:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT segment, offset, length FROM records WHERE key = ?", (key,)
+            )
+            .fetchone()
+        )
+        return dict(row) if row else None
+
+    def view(self, key: str) -> memoryview | None:
+        """Zero-copy view of the latest bytes stored under key, or None."""
+        self._ensure_process()
+        for _ in range(2):
+            record = self.locate(key)
+            if record is None:
+                return None
+            if record["length"] == 0:
+                return memoryview(b"")
+            end = record["offset"] + record["length"]
+            try:
+                mapped = self._map(record["segment"], end)
+            except FileNotFoundError:
+                # Compacted away between the lookup and the map; look again.
+                continue
+            return memoryview(mapped)[record["offset"] : end]
+        raise FileNotFoundError(f"Segment record for {key} disappeared twice")
+
+    def _map(self, segment: int, size: int) -> mmap.mmap:
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or len(mapped) < size:
+                # The active segment grew since it was mapped. Replaced maps
+                # are not closed: views handed out earlier may still use them.
+                with open(self.segment_path(segment), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment] = mapped
+            return mapped
+
+    def _forget_deleted_segments(self):
+        # Maps keep the disk space of segments compacted by any process.
+        existing = set(self.segments())
+        with self._lock:
+            for segment in [s for s in self._maps if s not in existing]:
+                del self._maps[segment]
+
+    def stats(self) -> dict:
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT segment, COUNT(*) AS records,"
+                " SUM(length + LENGTH(CAST(key AS BLOB))) AS live"
+                " FROM records GROUP BY segment"
+            )
+            .fetchall()
+        )
+        live = {
+            row["segment"]: row["live"] + row["records"] * RECORD_HEADER.size
+            for row in rows
+        }
+        sizes = {s: self.segment_path(s).stat().st_size for s in self.segments()}
+        return {
+            "segments": len(sizes),
+            "records": sum(row["records"] for row in rows),
+            "bytes": sum(sizes.values()),
+            "live_bytes": sum(live.get(s, 0) for s in sizes),
+            "segment_live_bytes": {s: live.get(s, 0) for s in sizes},
+            "segment_bytes": sizes,
+        }
+
+    def compact(self, garbage_ratio: float | None = None) -> dict:
+        """Rewrite the live records of sealed segments that are mostly garbage.
+
+        Returns the number of segments removed and the bytes reclaimed.
+        """
+        garbage_ratio = self.garbage_ratio if garbage_ratio is None else garbage_ratio
+        compacted = {"segments": 0, "bytes_reclaimed": 0}
+
+        with self._exclusive():
+            self._active_segment(0)
+            stats = self.stats()
+            for segment, size in stats["segment_bytes"].items():
+                live = stats["segment_live_bytes"][segment]
+                if segment >= self._active or size == 0:
+                    continue
+                if (size - live) / size < garbage_ratio:
+                    continue
+
+                keys = [
+                    row["key"]
+                    for row in self._connection().execute(
+                        "SELECT key FROM records WHERE segment = ?", (segment,)
+                    )
+                ]
+                for key in keys:
+                    data = self.view(key)
+                    self._append(key, len(data), lambda f, data=data: f.write(data))
+                with self._lock:
+                    self._maps.pop(segment, None)
+                self.segment_path(segment).unlink()
+                compacted["segments"] += 1
+                compacted["bytes_reclaimed"] += size - live
+
+        self._forget_deleted_segments()
+        if compacted["segments"]:
+            logger.info(
+                f"Compacted {compacted['segments']} segments, reclaimed "
+                f"{compacted['bytes_reclaimed']} bytes"
+            )
+        return compacted
+
+    def _compact_forever(self):
+        while True:
+            time.sleep(self.compaction_seconds)
+            try:
+                self.compact()
+            except Exception as e:
+                logger.warning(f"Segment compaction failed: {e}")
@@ -1,57 +1,429 @@
+import codecs
+import hashlib
+import mmap
+import os
+import tempfile
 import uuid
+from collections.abc import Iterator
 from pathlib import Path
 
+from . import compression
+from core.metrics import STORAGE_READ_SECONDS
+
+from .cache import DOCUMENT_CACHE_MAX_BYTES, ReadCache
+from .exceptions import DocumentDoesNotExistsError
+from .index import DocumentIndex
+from .segments import SegmentStore
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# Uncompressed objects at least this large are decoded straight from a
+# read-only memory map instead of being copied into a bytes buffer first.
+MMAP_THRESHOLD = 1024 * 1024
+
+FILES = "files"
+SEGMENTS = "segments"
+BACKENDS = (FILES, SEGMENTS)
+DOCUMENT_STORAGE_BACKEND = os.environ.get("DOCUMENT_STORAGE_BACKEND", FILES).lower()
+
 
 class DocumentStorage:
-    def __init__(self, base_path: str = "document_storage"):
+    """Content-addressed, sharded document store.
+
+    Texts and summaries are stored once per distinct content under
+    ``objects/<h[:2]>/<h[2:4]>/<sha256>``. An SQLite index maps every uploaded
+    ``document_id`` to its content hash and metadata, so lookups never scan or
+    stat the object directories. Stores in older layouts are converted with
+    ``python -m routes.documents.migrate_storage``.
+
+    New objects are written with ``DOCUMENT_COMPRESSION`` (``none``, ``gzip`` or
+    ``zstd``); the index records the codec of every object, so objects written
+    under different settings are read back transparently.
+
+    Decoded texts and summaries are kept in a ReadCache of
+    ``DOCUMENT_CACHE_MAX_BYTES``, so hot documents are not re-read from disk.
+
+    With ``DOCUMENT_STORAGE_BACKEND=segments`` new objects are appended to the
+    packed segment files of a SegmentStore under ``segments/`` instead, and
+    read back through its memory maps. Objects already stored as files are
+    still read from their shards.
+    """
+
+    def __init__(
+        self,
+        base_path: str = "document_storage",
+        compression_codec: str = compression.DOCUMENT_COMPRESSION,
+        compression_level: int = compression.DOCUMENT_COMPRESSION_LEVEL,
+        cache_max_bytes: int = DOCUMENT_CACHE_MAX_BYTES,
+        backend: str = DOCUMENT_STORAGE_BACKEND,
+    ):
         self.base_path = Path(base_path).absolute()
         self.base_path.mkdir(exist_ok=True)
+        self.objects_path = self.base_path / "objects"
+        self.objects_path.mkdir(exist_ok=True)
+        self.index = DocumentIndex(self.base_path / "index.sqlite3")
+        self.compression = compression.validate(compression_codec)
+        self.compression_level = compression_level
+        self.cache = ReadCache(cache_max_bytes)
+        if backend not in BACKENDS:
+            raise ValueError(f"Unsupported document storage backend: {backend}")
+        self.backend = backend
+        self.segments = (
+            SegmentStore(self.base_path / "segments") if backend == SEGMENTS else None
+        )
+
+    @staticmethod
+    def hash_content(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def object_path(
+        self,
+        content_hash: str,
+        suffix: str = ".txt",
+        codec: str = compression.NONE,
+    ) -> Path:
+        return (
+            self.objects_path
+            / content_hash[:2]
+            / content_hash[2:4]
+            / object_name(content_hash, suffix, codec)
+        )
 
     def store_document(self, text: str) -> str:
         document_id = str(uuid.uuid4())
-        file_path = self.base_path / f"{document_id}.txt"
+        data = text.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
 
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(text)
+            if self.index.get_content(content_hash) is None:
+                self._write_object(
+                    content_hash,
+                    ".txt",
+                    self.compression,
+                    compression.compress(
+                        data, self.compression, self.compression_level
+                    ),
+                )
+            missing = self._index_documents([(document_id, content_hash, len(data))])
+            for codec in missing.values():
+                self._write_object(
+                    content_hash,
+                    ".txt",
+                    codec,
+                    compression.compress(data, codec, self.compression_level),
+                )
         except Exception as e:
             print(f"Error storing document: {str(e)}")
             raise
 
         return document_id
 
+    def open_document_writer(self) -> "DocumentWriter":
+        return DocumentWriter(self)
+
+    def get_metadata(self, document_id: str) -> dict | None:
+        return self.index.get(document_id)
+
+    def get_content_hash(self, document_id: str) -> str | None:
+        metadata = self.index.get(document_id)
+        return metadata["content_hash"] if metadata else None
+
+    def get_document_size(self, document_id: str) -> int | None:
+        metadata = self.index.get(document_id)
+        return metadata["size"] if metadata else None
+
+    def iter_document(
+        self,
+        document_id: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        """Yield the UTF-8 bytes of a document from start up to (excluding) end."""
+        metadata = self.index.get(document_id)
+        codec = metadata["compression"]
+        file_path = self.object_path(metadata["content_hash"], codec=codec)
+
+        try:
+            view = self._segment_view(metadata["content_hash"], ".txt", codec)
+            if view is not None:
+                yield from iter_view(view, codec, start, end, chunk_size)
+                return
+
+            with compression.open_reader(file_path, codec) as f:
+                f.seek(start)
+                remaining = None if end is None else end - start
+                while remaining is None or remaining > 0:
+                    size = (
+                        chunk_size if remaining is None else min(chunk_size, remaining)
+                    )
+                    chunk = f.read(size)
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+        except Exception as e:
+            print(f"Error streaming document {document_id}: {str(e)}")
+            raise
+
     def get_document(self, document_id: str) -> str:
-        file_path = self.base_path / f"{document_id}.txt"
+        metadata = self.index.get(document_id)
 
-        if not file_path.exists():
+        if metadata is None:
             return None
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
+            return self._read_cached(
+                metadata["content_hash"], ".txt", metadata["compression"]
+            )
         except Exception as e:
             print(f"Error retrieving document {document_id}: {str(e)}")
             raise
 
     def get_summary(self, document_id: str) -> str | None:
-        summary_path = self.base_path / f"{document_id}-summary.txt"
+        metadata = self.index.get(document_id)
 
-        if not summary_path.exists():
+        if metadata is None or not metadata["has_summary"]:
             return None
 
         try:
-            with open(summary_path, "r", encoding="utf-8") as f:
-                return f.read()
+            return self._read_cached(
+                metadata["content_hash"],
+                "-summary.txt",
+                metadata["summary_compression"],
+                metadata["summary_hash"],
+            )
         except Exception as e:
             print(f"Error retrieving summary for document {document_id}: {str(e)}")
             raise
 
     def store_summary(self, document_id: str, summary: str):
-        summary_path = self.base_path / f"{document_id}-summary.txt"
+        content_hash = self.get_content_hash(document_id)
+        if content_hash is None:
+            raise DocumentDoesNotExistsError(
+                attribute_name="document_id", attribute_value=document_id
+            )
 
         try:
-            with open(summary_path, "w", encoding="utf-8") as f:
-                f.write(summary)
+            self._write_object(
+                content_hash,
+                "-summary.txt",
+                self.compression,
+                compression.compress(
+                    summary.encode("utf-8"), self.compression, self.compression_level
+                ),
+            )
+            self.index.mark_summary(
+                content_hash, self.compression, self.hash_content(summary)
+            )
         except Exception as e:
             print(f"Error storing summary for document {document_id}: {str(e)}")
             raise
+
+    def delete_document(self, document_id: str) -> dict | None:
+        """Remove a document id, and its text and summary objects once no
+        other document id shares them.
+
+        Returns the index's record of the removal (see
+        DocumentIndex.delete_document), or None if the document does not exist.
+        """
+        return self.index.delete_document(document_id, self._delete_objects)
+
+    def delete_content(self, content_hash: str) -> dict | None:
+        """Remove a content with every document id referencing it."""
+        return self.index.delete_content(content_hash, self._delete_objects)
+
+    def _index_documents(self, rows: list[tuple[str, str, int]]) -> dict[str, str]:
+        """Index (document_id, content_hash, size) rows, with contents not
+        indexed yet stored in the configured codec.
+
+        Returns the codec of each content whose text object is missing. A
+        delete of the last document sharing a content may remove its objects
+        between the caller's lookup and this insert, and those must be written
+        again. Deletes remove objects before they commit, so none can after.
+        """
+        codecs = self.index.add_documents(
+            [(document_id, h, size, self.compression) for document_id, h, size in rows]
+        )
+        return {
+            content_hash: codec
+            for content_hash, codec in codecs.items()
+            if not self._has_object(content_hash, ".txt", codec)
+        }
+
+    def _delete_objects(self, content: dict):
+        # Cached copies need no invalidation: nothing indexes them any more, and
+        # identical content stored again is read back under the same key.
+        self._delete_object(content["content_hash"], ".txt", content["compression"])
+        self._delete_object(
+            content["content_hash"], "-summary.txt", content["summary_compression"]
+        )
+
+    def _delete_object(self, content_hash: str, suffix: str, codec: str):
+        if self.segments is not None:
+            self.segments.delete(object_name(content_hash, suffix, codec))
+        # Also covers objects stored as files before switching to segments.
+        self.object_path(content_hash, suffix, codec).unlink(missing_ok=True)
+
+    def _has_object(self, content_hash: str, suffix: str, codec: str) -> bool:
+        if self.segments is not None and self.segments.locate(
+            object_name(content_hash, suffix, codec)
+        ):
+            return True
+        return self.object_path(content_hash, suffix, codec).exists()
+
+    def _read_cached(
+        self, content_hash: str, suffix: str, codec: str, version: str | None = None
+    ) -> str:
+        # Objects never change under their content hash and a regenerated
+        # summary gets a new version, so entries need no invalidation.
+        key = (content_hash, suffix, version)
+        text = self.cache.get(key)
+        if text is None:
+            with STORAGE_READ_SECONDS.time(object=object_kind(suffix)):
+                text = self._read_object(content_hash, suffix, codec)
+            self.cache.put(key, text)
+        return text
+
+    def _read_object(self, content_hash: str, suffix: str, codec: str) -> str:
+        view = self._segment_view(content_hash, suffix, codec)
+        if view is not None:
+            if codec != compression.NONE:
+                view = compression.decompress(view, codec)
+            return str(view, "utf-8")
+
+        with compression.open_reader(
+            self.object_path(content_hash, suffix, codec), codec
+        ) as f:
+            if (
+                codec == compression.NONE
+                and os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD
+            ):
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return str(mapped, "utf-8")
+            return f.read().decode("utf-8")
+
+    def _segment_view(
+        self, content_hash: str, suffix: str, codec: str
+    ) -> memoryview | None:
+        if self.segments is None:
+            return None
+        return self.segments.view(object_name(content_hash, suffix, codec))
+
+    def _write_object(self, content_hash: str, suffix: str, codec: str, data: bytes):
+        if self.segments is not None:
+            self.segments.put(object_name(content_hash, suffix, codec), data)
+        else:
+            self._write_atomic(self.object_path(content_hash, suffix, codec), data)
+
+    @staticmethod
+    def _write_atomic(path: Path, content: bytes):
+        # Concurrent writers of the same content hash must never observe a
+        # partially written object, so write to a temp file and rename.
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+
+def object_name(content_hash: str, suffix: str, codec: str) -> str:
+    return f"{content_hash}{suffix}{compression.suffix(codec)}"
+
+
+def object_kind(suffix: str) -> str:
+    return "summary" if suffix == "-summary.txt" else "text"
+
+
+def iter_view(
+    view: memoryview,
+    codec: str,
+    start: int = 0,
+    end: int | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Yield the decompressed bytes of a stored object from start up to end."""
+    if codec == compression.NONE:
+        view, start, end = view[start:end], 0, None
+    return compression.decompress_range(
+        (view[i : i + chunk_size] for i in range(0, len(view), chunk_size)),
+        codec,
+        start,
+        end,
+    )
+
+
+class DocumentWriter:
+    """Streams an upload to disk chunk by chunk without holding it in memory.
+
+    The content hash is computed incrementally over the raw bytes while the
+    configured codec compresses them; on commit the temp file is renamed into
+    its object shard, or appended to the segment store, unless identical
+    content is already stored.
+    """
+
+    def __init__(self, storage: DocumentStorage):
+        self.storage = storage
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._compressor = compression.compressor(
+            storage.compression, storage.compression_level
+        )
+        fd, tmp_path = tempfile.mkstemp(dir=storage.objects_path, prefix=".tmp-")
+        self._file = os.fdopen(fd, "wb")
+        self._tmp_path = Path(tmp_path)
+
+    def write(self, chunk: bytes):
+        # Raises UnicodeDecodeError as soon as the stream stops being UTF-8.
+        self._decoder.decode(chunk)
+        self._hash.update(chunk)
+        self._file.write(self._compressor.compress(chunk))
+        self.size += len(chunk)
+
+    def commit(self) -> str:
+        try:
+            self._decoder.decode(b"", final=True)
+            self._file.write(self._compressor.flush())
+            self._file.close()
+
+            content_hash = self._hash.hexdigest()
+            codec = self.storage.compression
+            placed = self.storage.index.get_content(content_hash) is None
+            if placed:
+                self._place(content_hash, codec)
+
+            document_id = str(uuid.uuid4())
+            missing = self.storage._index_documents(
+                [(document_id, content_hash, self.size)]
+            )
+            # Only a content deleted since the lookup above, and indexed again
+            # by this upload, can be missing in the codec of the temp file.
+            if not placed and missing.get(content_hash) == codec:
+                self._place(content_hash, codec)
+            elif not placed:
+                self._tmp_path.unlink()
+        except BaseException:
+            self.abort()
+            raise
+
+        return document_id
+
+    def _place(self, content_hash: str, codec: str):
+        if self.storage.segments is not None:
+            self.storage.segments.put_file(
+                object_name(content_hash, ".txt", codec), self._tmp_path
+            )
+            self._tmp_path.unlink()
+        else:
+            file_path = self.storage.object_path(content_hash, codec=codec)
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._tmp_path, file_path)
+
+    def abort(self):
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
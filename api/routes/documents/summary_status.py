@@ -0,0 +1,129 @@
+from core.celery import celery_app
+from core.checkpoints import checkpoint_keys_key
+from core.metrics import REDIS_CALL_SECONDS
+
+SUMMARY_STATUS_PREFIX = "summary_status:"
+SUMMARY_STATUS_TTL = 3600
+
+# Chunk progress fields the worker writes while a long document is summarized.
+PROGRESS_FIELDS = {
+    "chunks_done": int,
+    "chunks_total": int,
+    "eta_seconds": float,
+    "chunks_cached": int,
+    "chunk_cache_hit_rate": float,
+}
+
+# Returns the status hash of a live task for the content, or atomically
+# records ARGV[1] as its task and returns that. Callers compare the returned
+# task_id with their own to learn whether they won the dispatch.
+CLAIM_SCRIPT = """
+local state = redis.call('HGET', KEYS[1], 'state')
+if not state or state == 'FAILURE' then
+    redis.call('DEL', KEYS[1])
+    redis.call('HSET', KEYS[1], 'task_id', ARGV[1], 'state', 'PENDING')
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+# Drops a claim whose task could not be enqueued, unless another task has
+# taken the slot since.
+RELEASE_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'task_id') == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def summary_status_key(content_hash: str) -> str:
+    return f"{SUMMARY_STATUS_PREFIX}{content_hash}"
+
+
+def update_summary_status(redis_client, content_hash: str, task_id: str, fields: dict):
+    """Record the worker's view of a summary task in its status hash."""
+    key = summary_status_key(content_hash)
+    # Redis has no null; an empty string clears a field that is unknown now.
+    fields = {name: "" if value is None else value for name, value in fields.items()}
+    redis_client.hset(key, mapping={"task_id": task_id, **fields})
+    redis_client.expire(key, SUMMARY_STATUS_TTL)
+
+
+def summary_progress(task_status: dict) -> dict | None:
+    """Chunk progress of a running task from its status hash, if it has any."""
+    if "chunks_total" not in task_status:
+        return None
+    progress = {"status": task_status.get("status")}
+    for name, parse in PROGRESS_FIELDS.items():
+        value = task_status.get(name)
+        progress[name] = parse(value) if value else None
+    return progress
+
+
+def _as_dict(values: list) -> dict:
+    return dict(zip(values[::2], values[1::2]))
+
+
+class SummaryStatusStore:
+    """Single-flight summary dispatch over one Redis hash per content hash.
+
+    The hash holds ``task_id``, ``state`` and, once done, ``summary``; the
+    worker keeps it current. Reading the status and claiming the right to
+    enqueue a task happen in one atomic script call, so concurrent requests
+    for the same content never start more than one task.
+    """
+
+    def __init__(self, redis_client):
+        self._redis_client = redis_client
+        self._claim = redis_client.register_script(CLAIM_SCRIPT)
+        self._release = redis_client.register_script(RELEASE_SCRIPT)
+
+    async def get(self, content_hash: str) -> dict:
+        """The status hash without claiming anything; empty once expired."""
+        with REDIS_CALL_SECONDS.time(operation="get"):
+            return await self._redis_client.hgetall(summary_status_key(content_hash))
+
+    async def claim(self, content_hash: str, task_id: str) -> dict:
+        with REDIS_CALL_SECONDS.time(operation="claim"):
+            values = await self._claim(
+                keys=[summary_status_key(content_hash)],
+                args=[task_id, SUMMARY_STATUS_TTL],
+            )
+        return _as_dict(values)
+
+    async def claim_many(
+        self, content_hashes: list[str], task_ids: list[str]
+    ) -> list[dict]:
+        """Claim many contents in one pipelined round trip."""
+        if not content_hashes:
+            return []
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for content_hash, task_id in zip(content_hashes, task_ids):
+                await self._claim(
+                    keys=[summary_status_key(content_hash)],
+                    args=[task_id, SUMMARY_STATUS_TTL],
+                    client=pipe,
+                )
+            with REDIS_CALL_SECONDS.time(operation="claim_many"):
+                results = await pipe.execute()
+        return [_as_dict(values) for values in results]
+
+    async def release(self, content_hash: str, task_id: str):
+        with REDIS_CALL_SECONDS.time(operation="release"):
+            await self._release(keys=[summary_status_key(content_hash)], args=[task_id])
+
+    async def forget(self, content_hash: str):
+        """Delete the Redis keys kept for a content's summary: its status hash,
+        the Celery result of its task and, while a task has not succeeded, its
+        chunk checkpoints (which would otherwise outlive the status hash)."""
+        key = summary_status_key(content_hash)
+        with REDIS_CALL_SECONDS.time(operation="forget"):
+            task_status = await self._redis_client.hgetall(key)
+            checkpoints = checkpoint_keys_key(content_hash)
+            keys = [key, checkpoints]
+            if task_status.get("task_id"):
+                keys.append(celery_app.backend.get_key_for_task(task_status["task_id"]))
+            if task_status.get("state", "SUCCESS") != "SUCCESS":
+                keys += await self._redis_client.smembers(checkpoints)
+            await self._redis_client.delete(*keys)
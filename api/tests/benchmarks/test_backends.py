@@ -0,0 +1,27 @@
+from benchmarks.backends import compare, load_corpus
+
+
+def test_fixed_corpus_is_present() -> None:
+    corpus = load_corpus()
+
+    assert len(corpus) >= 4
+    assert all(text.strip() for text in corpus.values())
+
+
+def test_compare_scores_every_backend_against_fp32() -> None:
+    # Arrange
+    results = [
+        {"backend": "torch", "summaries": {"a.txt": "the bridge is replaced"}},
+        {"backend": "torch-int8", "summaries": {"a.txt": "the bridge is rebuilt"}},
+    ]
+
+    # Act
+    compared = compare(results)
+
+    # Assert
+    assert compared[0]["rouge_vs_fp32"] == {
+        "rouge1": 1.0,
+        "rouge2": 1.0,
+        "rougeL": 1.0,
+    }
+    assert compared[1]["rouge_vs_fp32"]["rouge1"] == 0.75
@@ -0,0 +1,79 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.load import FakeSummarizer, find_regressions, make_texts
+
+API_PATH = Path(__file__).parents[2]
+
+
+def test_make_texts_is_deterministic_and_sized() -> None:
+    # Act
+    texts = make_texts(2048, 3, seed=1, run_id="a")
+
+    # Assert
+    assert texts == make_texts(2048, 3, seed=1, run_id="a")
+    assert len(set(texts)) == 3
+    assert all(2048 <= len(text) < 2048 + 64 for text in texts)
+    assert make_texts(2048, 1, seed=1, run_id="b")[0] != texts[0]
+
+
+def test_fake_summarizer_returns_leading_words() -> None:
+    # Arrange
+    summarizer = FakeSummarizer(seconds_per_call=0, summary_words=2)
+
+    # Act
+    results = summarizer(["one two three", "four five"], max_length=150)
+
+    # Assert
+    assert results == [{"summary_text": "one two"}, {"summary_text": "four five"}]
+
+
+def test_find_regressions_flags_slower_results_past_tolerance() -> None:
+    # Arrange
+    result = {
+        "mode": "fake",
+        "operation": "get",
+        "size": 1024,
+        "concurrency": 8,
+        "requests_per_second": 40.0,
+        "p95_ms": 30.0,
+    }
+    baselines = {"fake/get/1024/8": {"requests_per_second": 100.0, "p95_ms": 10.0}}
+
+    # Act
+    regressions = find_regressions([result], baselines, tolerance=0.5)
+    within_tolerance = find_regressions([result], baselines, tolerance=2.0)
+    without_baseline = find_regressions([result], {}, tolerance=0.5)
+
+    # Assert
+    assert len(regressions) == 2
+    assert regressions[0].startswith("fake/get/1024/8: p95")
+    assert within_tolerance == []
+    assert without_baseline == []
+
+
+def test_load_benchmark_runs_end_to_end() -> None:
+    # Act
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.load",
+            "--sizes",
+            "512",
+            "--concurrency",
+            "2",
+            "--requests",
+            "2",
+        ],
+        cwd=API_PATH,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+    # Assert
+    assert completed.returncode == 0, completed.stderr
+    for operation in ("store", "get", "summary_poll", "summary_ready"):
+        assert f"\n{operation} " in completed.stdout
@@ -0,0 +1,37 @@
+import pytest
+
+from benchmarks.rouge import rouge, rouge_l, rouge_n
+
+
+def test_identical_texts_score_one() -> None:
+    assert rouge("The bridge will be replaced.", "the bridge will be replaced") == {
+        "rouge1": 1.0,
+        "rouge2": 1.0,
+        "rougeL": 1.0,
+    }
+
+
+def test_rouge_n_counts_clipped_overlap() -> None:
+    # Arrange
+    reference = "the cat sat on the mat"
+    candidate = "the cat the cat"
+
+    # Act
+    unigram = rouge_n(reference, candidate, 1)
+    bigram = rouge_n(reference, candidate, 2)
+
+    # Assert
+    # Unigrams: overlap 3 (the x2, cat x1); precision 3/4, recall 3/6.
+    assert unigram == pytest.approx(0.6)
+    # Bigrams: only "the cat" overlaps; precision 1/3, recall 1/5.
+    assert bigram == pytest.approx(0.25)
+
+
+def test_rouge_l_uses_longest_common_subsequence() -> None:
+    # LCS is "a c e": precision 3/3, recall 3/5.
+    assert rouge_l("a b c d e", "a c e") == pytest.approx(0.75)
+
+
+def test_disjoint_texts_score_zero() -> None:
+    assert rouge_n("alpha beta", "gamma delta") == 0.0
+    assert rouge_l("alpha beta", "") == 0.0
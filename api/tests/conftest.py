@@ -0,0 +1,55 @@
+import os
+import re
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# The suite imports the API and the worker into one process.
+os.environ["API_FORBID_ML_IMPORTS"] = "false"
+
+
+@pytest.fixture
+def chunk_summary_cache_keys():
+    """Give the test an empty chunk summary cache of its own, so summaries of
+    fixed test texts never carry over between tests or runs. Used by the
+    modules whose tests reach the cache."""
+    from core import chunk_cache
+    from core.celery import redis_client
+
+    prefix = f"test:{uuid.uuid4()}:"
+    keys = {
+        "CHUNK_SUMMARY_CACHE_KEY": prefix + chunk_cache.CHUNK_SUMMARY_CACHE_KEY,
+        "CHUNK_SUMMARY_CACHE_LRU_KEY": prefix + chunk_cache.CHUNK_SUMMARY_CACHE_LRU_KEY,
+    }
+    with patch.multiple(chunk_cache, **keys):
+        yield
+    redis_client.delete(*keys.values())
+
+
+class WhitespaceTokenizer:
+    """Tokenizer stand-in where every whitespace-separated word is one token."""
+
+    model_max_length = 130
+
+    def __call__(self, text: str, **kwargs) -> dict:
+        spans = [match.span() for match in re.finditer(r"\S+", text)]
+        return {"input_ids": list(range(len(spans))), "offset_mapping": spans}
+
+    def num_special_tokens_to_add(self) -> int:
+        return 2
+
+
+@pytest.fixture
+def fake_summarizer() -> MagicMock:
+    summarizer = MagicMock()
+    summarizer.tokenizer = WhitespaceTokenizer()
+    summarizer.model.config.max_position_embeddings = 130
+
+    def summarize(inputs, **kwargs):
+        if isinstance(inputs, list):
+            return [{"summary_text": "chunk"} for _ in inputs]
+        return [{"summary_text": "final"}]
+
+    summarizer.side_effect = summarize
+    return summarizer
@@ -0,0 +1,189 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.batching import BatchingSummarizer
+from core.summarization import chunk_spans
+
+
+def _echo_summarizer() -> MagicMock:
+    summarizer = MagicMock()
+
+    def summarize(inputs, **kwargs):
+        texts = [inputs] if isinstance(inputs, str) else inputs
+        return [{"summary_text": f"summary of {text}"} for text in texts]
+
+    summarizer.side_effect = summarize
+    return summarizer
+
+
+def test_concurrent_callers_share_one_forward_pass() -> None:
+    # Arrange
+    summarizer = _echo_summarizer()
+    batcher = BatchingSummarizer(lambda: summarizer, max_batch_size=8, window_seconds=5)
+    barrier = threading.Barrier(4)
+
+    def call(i: int) -> list[dict]:
+        barrier.wait()
+        return batcher([f"doc{i}-a", f"doc{i}-b"], truncation=True)
+
+    # Act
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(call, range(4)))
+
+    # Assert
+    assert results == [
+        [
+            {"summary_text": f"summary of doc{i}-a"},
+            {"summary_text": f"summary of doc{i}-b"},
+        ]
+        for i in range(4)
+    ]
+    summarizer.assert_called_once()
+    assert len(summarizer.call_args.args[0]) == 8
+    assert summarizer.call_args.kwargs == {"batch_size": 8, "truncation": True}
+    assert batcher.stats() == {"batches": 1, "inputs": 8, "mean_batch_size": 8}
+
+
+def test_partial_batch_runs_after_window() -> None:
+    # Arrange
+    summarizer = _echo_summarizer()
+    batcher = BatchingSummarizer(
+        lambda: summarizer, max_batch_size=8, window_seconds=0.01
+    )
+
+    # Act
+    result = batcher("lonely text", max_length=20)
+
+    # Assert
+    assert result == [{"summary_text": "summary of lonely text"}]
+    summarizer.assert_called_once_with("lonely text", max_length=20)
+
+
+def test_inputs_with_different_kwargs_are_not_mixed() -> None:
+    # Arrange
+    summarizer = _echo_summarizer()
+    batcher = BatchingSummarizer(lambda: summarizer, max_batch_size=2, window_seconds=5)
+
+    # Act
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        short = executor.submit(batcher, ["a", "b"], max_length=10)
+        long = executor.submit(batcher, ["c", "d"], max_length=200)
+        short.result(), long.result()
+
+    # Assert
+    batches = {
+        call.kwargs["max_length"]: call.args[0] for call in summarizer.call_args_list
+    }
+    assert batches == {10: ["a", "b"], 200: ["c", "d"]}
+
+
+def test_full_group_is_not_held_behind_an_older_partial_one() -> None:
+    # Arrange
+    summarizer = _echo_summarizer()
+    batcher = BatchingSummarizer(lambda: summarizer, max_batch_size=2, window_seconds=5)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        partial = executor.submit(batcher, ["a"], max_length=10)
+        time.sleep(0.05)
+
+        # Act
+        started = time.monotonic()
+        full = batcher(["b", "c"], max_length=200)
+        elapsed = time.monotonic() - started
+        batcher.window_seconds = 0
+        batcher(["d"], max_length=10)
+
+        # Assert
+        assert full == [
+            {"summary_text": "summary of b"},
+            {"summary_text": "summary of c"},
+        ]
+        assert elapsed < 1
+        assert partial.result() == [{"summary_text": "summary of a"}]
+
+
+def test_large_inputs_are_split_into_max_size_batches() -> None:
+    # Arrange
+    summarizer = _echo_summarizer()
+    batcher = BatchingSummarizer(
+        lambda: summarizer, max_batch_size=3, window_seconds=0.01
+    )
+
+    # Act
+    results = batcher([str(i) for i in range(7)])
+
+    # Assert
+    assert [r["summary_text"] for r in results] == [f"summary of {i}" for i in range(7)]
+    assert [
+        len(call.args[0]) if isinstance(call.args[0], list) else 1
+        for call in summarizer.call_args_list
+    ] == [3, 3, 1]
+
+
+def test_model_errors_reach_every_caller_of_the_batch() -> None:
+    # Arrange
+    summarizer = MagicMock(side_effect=RuntimeError("out of memory"))
+    batcher = BatchingSummarizer(
+        lambda: summarizer, max_batch_size=2, window_seconds=0.01
+    )
+
+    # Act / Assert
+    with pytest.raises(RuntimeError, match="out of memory"):
+        batcher(["a", "b"])
+
+
+class BorrowCheckingTokenizer:
+    """Tokenizer stand-in that fails like a fast tokenizer used concurrently."""
+
+    model_max_length = 130
+
+    def __init__(self):
+        self.borrowed = False
+
+    def __call__(self, text, **kwargs) -> dict:
+        if self.borrowed:
+            raise RuntimeError("Already borrowed")
+        self.borrowed = True
+        time.sleep(0.001)
+        self.borrowed = False
+        words = [match.span() for match in re.finditer(r"\S+", text)]
+        return {"input_ids": list(range(len(words))), "offset_mapping": words}
+
+
+def test_callers_chunk_while_the_dispatcher_tokenizes() -> None:
+    # Arrange
+    summarizer = _echo_summarizer()
+    summarizer.tokenizer = BorrowCheckingTokenizer()
+    summarize = summarizer.side_effect
+
+    def truncate_and_summarize(inputs, **kwargs):
+        texts = [inputs] if isinstance(inputs, str) else inputs
+        for text in texts:
+            summarizer.tokenizer(text, truncation=True)
+        return summarize(inputs, **kwargs)
+
+    summarizer.side_effect = truncate_and_summarize
+    batcher = BatchingSummarizer(
+        lambda: summarizer, max_batch_size=4, window_seconds=0.001
+    )
+    text = " ".join(f"word{i}" for i in range(40))
+
+    def chunk_and_summarize(i: int) -> list[tuple[int, int]]:
+        spans = []
+        for _ in range(20):
+            spans = chunk_spans(batcher.tokenizer, text, 16, 4)
+            batcher([text[start:end] for start, end in spans])
+        return spans
+
+    # Act
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(chunk_and_summarize, range(8)))
+
+    # Assert
+    assert results == [chunk_spans(BorrowCheckingTokenizer(), text, 16, 4)] * 8
+    assert batcher.stats()["inputs"] == 8 * 20 * len(results[0])
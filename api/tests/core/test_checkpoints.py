@@ -0,0 +1,41 @@
+import uuid
+
+from core.celery import redis_client
+from core.checkpoints import ChunkCheckpoint, checkpoint_keys_key, checkpoint_signature
+
+
+def test_checkpoint_round_trips_chunk_summaries() -> None:
+    # Arrange
+    content_hash = str(uuid.uuid4())
+    checkpoint = ChunkCheckpoint(redis_client, content_hash, "signature")
+
+    # Act
+    checkpoint.save({0: "first"})
+    checkpoint.save({2: "third"})
+
+    # Assert
+    assert checkpoint.load() == {0: "first", 2: "third"}
+    assert redis_client.ttl(checkpoint.key) > 0
+    assert redis_client.smembers(checkpoint_keys_key(content_hash)) == {checkpoint.key}
+    checkpoint.clear()
+    assert checkpoint.load() == {}
+    assert redis_client.smembers(checkpoint_keys_key(content_hash)) == set()
+
+
+def test_checkpoints_are_scoped_to_their_signature() -> None:
+    # Arrange
+    content_hash = str(uuid.uuid4())
+    saved = ChunkCheckpoint(
+        redis_client, content_hash, checkpoint_signature("model-a", 512)
+    )
+    saved.save({0: "summary"})
+
+    # Act
+    other = ChunkCheckpoint(
+        redis_client, content_hash, checkpoint_signature("model-b", 512)
+    )
+
+    # Assert
+    assert other.load() == {}
+    assert checkpoint_signature("model-a", 512) == checkpoint_signature("model-a", 512)
+    saved.clear()
@@ -0,0 +1,58 @@
+import pytest
+
+from core import chunk_cache
+from core.celery import redis_client
+from core.chunk_cache import ChunkSummaryCache
+
+pytestmark = pytest.mark.usefixtures("chunk_summary_cache_keys")
+
+
+def test_cache_round_trips_summaries_by_chunk_text() -> None:
+    # Arrange
+    cache = ChunkSummaryCache(redis_client, "signature")
+
+    # Act
+    cache.put_many({"boilerplate": "summary of boilerplate"})
+    cached = cache.get_many(["unique text", "boilerplate"])
+
+    # Assert
+    assert cached == {1: "summary of boilerplate"}
+
+
+def test_cache_is_scoped_to_its_signature() -> None:
+    # Arrange
+    ChunkSummaryCache(redis_client, "model-a").put_many({"chunk": "summary"})
+
+    # Act
+    cached = ChunkSummaryCache(redis_client, "model-b").get_many(["chunk"])
+
+    # Assert
+    assert cached == {}
+
+
+def test_cache_evicts_least_recently_used_beyond_max_entries() -> None:
+    # Arrange
+    cache = ChunkSummaryCache(redis_client, "signature", max_entries=2)
+    cache.put_many({"first": "1"})
+    cache.put_many({"second": "2"})
+    cache.get_many(["first"])
+
+    # Act
+    cache.put_many({"third": "3"})
+
+    # Assert
+    assert cache.get_many(["first", "second", "third"]) == {0: "1", 2: "3"}
+    assert redis_client.hlen(chunk_cache.CHUNK_SUMMARY_CACHE_KEY) == 2
+    assert redis_client.zcard(chunk_cache.CHUNK_SUMMARY_CACHE_LRU_KEY) == 2
+
+
+def test_cache_with_no_entries_is_disabled() -> None:
+    # Arrange
+    cache = ChunkSummaryCache(redis_client, "signature", max_entries=0)
+
+    # Act
+    cache.put_many({"chunk": "summary"})
+
+    # Assert
+    assert cache.get_many(["chunk"]) == {}
+    assert redis_client.exists(chunk_cache.CHUNK_SUMMARY_CACHE_KEY) == 0
@@ -0,0 +1,67 @@
+import numpy as np
+
+from core import extractive
+
+TEXT = (
+    "The council approved a new harbor bridge on Tuesday. "
+    "The harbor bridge replaces a structure built in 1958. "
+    "Construction of the bridge starts next spring. "
+    "Lunch was served afterwards. "
+    "The new bridge will cost 640 million dollars."
+)
+
+
+def test_split_sentences() -> None:
+    assert extractive.split_sentences("First one. Second one!  Third?") == [
+        "First one.",
+        "Second one!",
+        "Third?",
+    ]
+
+
+def test_tfidf_rows_are_unit_vectors() -> None:
+    vectors = extractive.tfidf_matrix(["a b c", "a a d", "..."])
+
+    assert vectors.shape == (3, extractive.HASHED_FEATURES)
+    assert np.allclose(np.linalg.norm(vectors[:2], axis=1), 1)
+    assert not vectors[2].any()
+
+
+def test_centroid_scores_of_sparse_weights_match_dense_vectors() -> None:
+    # Arrange
+    sentences = extractive.split_sentences(TEXT)
+    vectors = extractive.tfidf_matrix(sentences)
+
+    # Act
+    scores = extractive.centroid_scores(
+        *extractive.tfidf_weights(sentences), len(sentences)
+    )
+
+    # Assert
+    assert np.allclose(scores, vectors @ vectors.mean(axis=0))
+
+
+def test_extractive_summary_keeps_central_sentences_in_order() -> None:
+    # Act
+    summary = extractive.extractive_summary(TEXT, sentence_count=2)
+
+    # Assert
+    sentences = extractive.split_sentences(summary)
+    assert len(sentences) == 2
+    assert "Lunch was served afterwards." not in sentences
+    assert sentences == sorted(sentences, key=TEXT.index)
+
+
+def test_short_text_is_returned_whole() -> None:
+    assert extractive.extractive_summary("Only one sentence.") == "Only one sentence."
+
+
+def test_long_documents_use_centroid_scoring(monkeypatch) -> None:
+    # Arrange
+    monkeypatch.setattr(extractive, "TEXTRANK_MAX_SENTENCES", 3)
+
+    # Act
+    summary = extractive.extractive_summary(TEXT, sentence_count=2)
+
+    # Assert
+    assert "Lunch was served afterwards." not in summary
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import torch
+
+from core import inference
+
+
+def test_validate_rejects_unknown_backend() -> None:
+    with pytest.raises(ValueError, match="Unsupported inference backend"):
+        inference.validate("tensorrt")
+
+
+@patch("core.inference.ORTModelForSeq2SeqLM", None)
+def test_onnx_backend_requires_optimum() -> None:
+    with pytest.raises(ValueError, match="optimum"):
+        inference.load_summarizer("test-model", inference.ONNX)
+
+
+@patch("core.inference.pipeline")
+def test_int8_backend_quantizes_linear_layers(mock_pipeline) -> None:
+    # Arrange
+    summarizer = MagicMock()
+    summarizer.model = torch.nn.Sequential(torch.nn.Linear(8, 4))
+    mock_pipeline.return_value = summarizer
+    fp32_bytes = inference.model_bytes(summarizer.model)
+
+    # Act
+    result = inference.load_summarizer("test-model", inference.TORCH_INT8)
+
+    # Assert
+    assert mock_pipeline.call_args.kwargs["torch_dtype"] == torch.float32
+    assert isinstance(result.model[0], torch.ao.nn.quantized.dynamic.Linear)
+    # int8 weights take a quarter of the float32 bytes; the bias stays float.
+    assert inference.model_bytes(result.model) == 8 * 4 + 4 * 4
+    assert fp32_bytes == (8 * 4 + 4) * 4
+
+
+@patch("core.inference.AutoTokenizer")
+@patch("core.inference.pipeline")
+@patch("core.inference.ORTModelForSeq2SeqLM")
+def test_onnx_backend_exports_when_no_path_is_given(
+    mock_ort_model, mock_pipeline, mock_tokenizer
+) -> None:
+    # Act
+    inference.load_summarizer("test-model", inference.ONNX)
+    inference.load_summarizer("test-model", inference.ONNX, onnx_path="/models/x")
+
+    # Assert
+    assert mock_ort_model.from_pretrained.call_args_list[0].args == ("test-model",)
+    assert mock_ort_model.from_pretrained.call_args_list[0].kwargs == {"export": True}
+    assert mock_ort_model.from_pretrained.call_args_list[1].args == ("/models/x",)
+    assert mock_ort_model.from_pretrained.call_args_list[1].kwargs == {"export": False}
+    assert (
+        mock_pipeline.call_args.kwargs["model"]
+        is mock_ort_model.from_pretrained.return_value
+    )
+
+
+def test_torch_threads_split_cpus_across_processes() -> None:
+    assert inference.torch_threads(4, cpus=16) == 4
+    assert inference.torch_threads(3, cpus=8) == 2
+    assert inference.torch_threads(32, cpus=8) == 1
+    assert inference.torch_threads(1, cpus=8) == 8
@@ -0,0 +1,74 @@
+import os
+import time
+import uuid
+
+import pytest
+
+from core import metrics
+from core.celery import redis_client
+
+
+@pytest.fixture
+def metric_name() -> str:
+    name = f"test_metric_{uuid.uuid4().hex}"
+    yield name
+    metrics._registry.pop(name, None)
+    redis_client.delete(f"{metrics.METRICS_PREFIX}{name}")
+
+
+def test_histogram_renders_cumulative_buckets(metric_name: str) -> None:
+    # Arrange
+    histogram = metrics.Histogram(metric_name, "Test histogram.", buckets=(0.1, 1))
+    fields = {'stage="a"|0.1': "2", 'stage="a"|1': "1", 'stage="a"|sum': "0.7"}
+
+    # Act
+    lines = histogram.samples(fields)
+
+    # Assert
+    assert lines == [
+        f'{metric_name}_bucket{{stage="a",le="0.1"}} 2.0',
+        f'{metric_name}_bucket{{stage="a",le="1"}} 3.0',
+        f'{metric_name}_bucket{{stage="a",le="+Inf"}} 3.0',
+        f'{metric_name}_sum{{stage="a"}} 0.7',
+        f'{metric_name}_count{{stage="a"}} 3.0',
+    ]
+
+
+def test_flush_adds_buffered_observations_to_shared_totals(metric_name: str) -> None:
+    # Arrange
+    counter = metrics.Counter(metric_name, "Test counter.")
+    counter.inc(state="SUCCESS")
+    counter.inc(2, state="SUCCESS")
+
+    # Act
+    metrics.flush()
+
+    # Assert
+    key = f"{metrics.METRICS_PREFIX}{metric_name}"
+    assert float(redis_client.hget(key, 'state="SUCCESS"')) == 3
+    rendered = metrics.render({metric_name: redis_client.hgetall(key)})
+    assert f"# TYPE {metric_name} counter" in rendered
+    assert f'{metric_name}{{state="SUCCESS"}} 3.0' in rendered
+
+
+def test_forked_child_does_not_inherit_a_held_lock(metric_name: str) -> None:
+    # Arrange
+    counter = metrics.Counter(metric_name, "Test counter.")
+    counter.inc()
+
+    # Act
+    with metrics._lock:
+        pid = os.fork()
+        if pid == 0:
+            counter.inc()
+            os._exit(0 if metrics._pending == {(metric_name, ""): 1} else 1)
+
+    # Assert
+    deadline = time.monotonic() + 5
+    while (status := os.waitpid(pid, os.WNOHANG))[0] == 0:
+        if time.monotonic() > deadline:
+            os.kill(pid, 9)
+            os.waitpid(pid, 0)
+            pytest.fail("Child blocked on the metrics lock")
+        time.sleep(0.01)
+    assert os.waitstatus_to_exitcode(status[1]) == 0
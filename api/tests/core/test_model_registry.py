@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock, patch
+
+import torch
+
+from core.model_registry import ModelRegistry
+
+
+def _fake_pipeline() -> MagicMock:
+    summarizer = MagicMock()
+    summarizer.model.parameters.return_value = [torch.zeros(4, dtype=torch.float32)]
+    summarizer.model.buffers.return_value = [torch.zeros(2, dtype=torch.float32)]
+    return summarizer
+
+
+@patch("core.inference.pipeline")
+def test_get_summarizer_loads_model_once(mock_pipeline) -> None:
+    # Arrange
+    mock_pipeline.return_value = _fake_pipeline()
+    registry = ModelRegistry(model_name="test-model")
+
+    # Act
+    first = registry.get_summarizer()
+    second = registry.get_summarizer()
+
+    # Assert
+    assert first is second
+    mock_pipeline.assert_called_once()
+    assert registry.load_count == 1
+
+
+@patch("core.inference.pipeline")
+def test_stats_report_load_time_and_memory(mock_pipeline) -> None:
+    # Arrange
+    mock_pipeline.return_value = _fake_pipeline()
+    registry = ModelRegistry(model_name="test-model")
+
+    # Act
+    registry.warm_up()
+    stats = registry.stats()
+
+    # Assert
+    assert stats["model"] == "test-model"
+    assert stats["loaded"] is True
+    assert stats["load_count"] == 1
+    assert stats["load_seconds"] >= 0
+    assert stats["warmup_seconds"] >= 0
+    assert stats["parameter_bytes"] == 24
+
+
+@patch("core.model_registry.gc.freeze")
+@patch("core.inference.pipeline")
+def test_preload_loads_without_running_inference(mock_pipeline, mock_freeze) -> None:
+    # Arrange
+    summarizer = _fake_pipeline()
+    mock_pipeline.return_value = summarizer
+    registry = ModelRegistry(model_name="test-model")
+
+    # Act
+    registry.preload()
+
+    # Assert
+    assert registry.is_loaded
+    summarizer.assert_not_called()
+    mock_freeze.assert_called_once()
@@ -0,0 +1,103 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from core import queues
+from core.celery import (
+    redis_client,
+    SUMMARY_QUEUE_SMALL,
+    SUMMARY_QUEUE_MEDIUM,
+    SUMMARY_QUEUE_LARGE,
+    SUMMARY_QUEUE_SMALL_MAX_BYTES,
+    SUMMARY_QUEUE_MEDIUM_MAX_BYTES,
+)
+
+
+@pytest.mark.parametrize(
+    "size, queue",
+    [
+        (0, SUMMARY_QUEUE_SMALL),
+        (SUMMARY_QUEUE_SMALL_MAX_BYTES - 1, SUMMARY_QUEUE_SMALL),
+        (SUMMARY_QUEUE_SMALL_MAX_BYTES, SUMMARY_QUEUE_MEDIUM),
+        (SUMMARY_QUEUE_MEDIUM_MAX_BYTES - 1, SUMMARY_QUEUE_MEDIUM),
+        (SUMMARY_QUEUE_MEDIUM_MAX_BYTES, SUMMARY_QUEUE_LARGE),
+        (500 * 1024 * 1024, SUMMARY_QUEUE_LARGE),
+    ],
+)
+def test_summary_queue_by_size(size: int, queue: str) -> None:
+    assert queues.summary_queue(size) == queue
+
+
+def test_summary_route_without_shortest_job_first() -> None:
+    assert queues.summary_route(100) == {"queue": SUMMARY_QUEUE_SMALL}
+
+
+@patch("core.queues.SUMMARY_SHORTEST_JOB_FIRST", True)
+def test_summary_priority_prefers_smaller_documents() -> None:
+    # Arrange
+    sizes = [100, 4 * 1024, SUMMARY_QUEUE_SMALL_MAX_BYTES - 1]
+
+    # Act
+    priorities = [queues.summary_priority(size) for size in sizes]
+
+    # Assert
+    assert priorities == sorted(priorities)
+    assert priorities[0] == 0
+    assert queues.summary_priority(SUMMARY_QUEUE_MEDIUM_MAX_BYTES) == 0
+    assert queues.summary_priority(10**12) == queues.MAX_PRIORITY
+    assert queues.summary_route(100) == {"queue": SUMMARY_QUEUE_SMALL, "priority": 0}
+
+
+def test_queue_stats_reports_depth_and_wait_times() -> None:
+    # Arrange
+    queue = f"test-queue-{uuid.uuid4()}"
+    redis_client.lpush(queue, "m1", "m2")
+    redis_client.lpush(f"{queue}:3", "m3")
+    for seconds in [1.0, 2.0, 3.0, 4.0]:
+        queues.record_wait(queue, seconds)
+
+    # Act
+    stats = queues.queue_stats([queue])[queue]
+
+    # Assert
+    redis_client.delete(
+        queue,
+        f"{queue}:3",
+        f"{queues.WAIT_STATS_PREFIX}{queue}",
+        f"{queues.WAIT_STATS_PREFIX}{queue}:samples",
+    )
+    assert stats == {
+        "depth": 3,
+        "started": 4,
+        "wait_seconds_mean": 2.5,
+        "wait_seconds_p50": 3.0,
+        "wait_seconds_p95": 4.0,
+        "wait_seconds_max": 4.0,
+    }
+
+
+def test_stamped_tasks_record_wait_for_their_queue() -> None:
+    # Arrange
+    headers = {}
+    queues.stamp_enqueue_time(headers=headers)
+    request = SimpleNamespace(
+        get=lambda key: headers.get(key),
+        delivery_info={"routing_key": "summaries.small"},
+    )
+
+    with (
+        patch("core.queues.record_wait") as mock_record_wait,
+        patch("core.queues.SUMMARY_STAGE_SECONDS") as mock_histogram,
+    ):
+        # Act
+        queues.record_queue_wait(task=SimpleNamespace(request=request))
+
+    # Assert
+    queue, seconds = mock_record_wait.call_args.args
+    assert queue == "summaries.small"
+    assert 0 <= seconds < 5
+    mock_histogram.observe.assert_called_once_with(
+        seconds, stage="queue_wait", queue="summaries.small"
+    )
@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock
+
+from core.summarization import chunk_text, summarize_text
+from tests.conftest import WhitespaceTokenizer
+
+
+def test_chunk_text_short_text_is_single_chunk() -> None:
+    # Arrange
+    text = "a short document"
+
+    # Act
+    chunks = chunk_text(WhitespaceTokenizer(), text, max_tokens=10, overlap=2)
+
+    # Assert
+    assert chunks == [text]
+
+
+def test_chunk_text_windows_overlap_and_cover_all_tokens() -> None:
+    # Arrange
+    words = [f"w{i}" for i in range(25)]
+    text = " ".join(words)
+
+    # Act
+    chunks = chunk_text(WhitespaceTokenizer(), text, max_tokens=10, overlap=3)
+
+    # Assert
+    assert all(len(chunk.split()) <= 10 for chunk in chunks)
+    assert chunks[0].split()[-3:] == chunks[1].split()[:3]
+    assert chunks[-1].split()[-1] == words[-1]
+    assert {word for chunk in chunks for word in chunk.split()} == set(words)
+
+
+def test_summarize_text_batches_all_chunks_in_one_call(
+    fake_summarizer: MagicMock,
+) -> None:
+    # Arrange
+    text = " ".join(f"w{i}" for i in range(400))
+
+    # Act
+    summary = summarize_text(fake_summarizer, text, batch_size=4, overlap=2)
+
+    # Assert
+    assert summary == "final"
+    batched_call = fake_summarizer.call_args_list[0]
+    assert isinstance(batched_call.args[0], list)
+    assert len(batched_call.args[0]) > 1
+    assert batched_call.kwargs["batch_size"] == 4
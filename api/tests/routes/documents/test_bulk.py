@@ -0,0 +1,136 @@
+import hashlib
+import uuid
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from core.celery import redis_client
+from routes.documents.schemas import BULK_MAX_DOCUMENTS
+from routes.documents.storage import DocumentStorage
+from routes.documents.summary_status import summary_status_key
+
+DOCUMENTS_URL = "/documents"
+
+
+def test_store_texts_returns_ids_in_order(client: TestClient) -> None:
+    # Arrange
+    texts = ["First bulk text", "Second bulk text", "First bulk text"]
+
+    # Act
+    response = client.post(f"{DOCUMENTS_URL}/bulk", json={"texts": texts})
+
+    # Assert
+    assert response.status_code == 201
+    document_ids = response.json()["document_ids"]
+    assert len(set(document_ids)) == 3
+    for document_id, text in zip(document_ids, texts):
+        assert client.get(f"{DOCUMENTS_URL}/{document_id}").json()["text"] == text
+    storage = DocumentStorage()
+    assert storage.get_content_hash(document_ids[0]) == storage.get_content_hash(
+        document_ids[2]
+    )
+
+
+def test_store_texts_rejects_empty_and_oversized_batches(client: TestClient) -> None:
+    # Act
+    empty = client.post(f"{DOCUMENTS_URL}/bulk", json={"texts": []})
+    oversized = client.post(
+        f"{DOCUMENTS_URL}/bulk", json={"texts": ["x"] * (BULK_MAX_DOCUMENTS + 1)}
+    )
+
+    # Assert
+    assert empty.status_code == 422
+    assert oversized.status_code == 422
+
+
+@patch("routes.documents.controller.generate_summary")
+def test_summarize_texts_mixed_states(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    run = uuid.uuid4()
+    texts = [
+        f"Already summarized ({run})",
+        f"Summary in progress ({run})",
+        f"Needs a summary ({run})",
+        f"Needs a summary ({run})",
+    ]
+    summarized_id, in_progress_id, missing_id, duplicate_id = client.post(
+        f"{DOCUMENTS_URL}/bulk", json={"texts": texts}
+    ).json()["document_ids"]
+    DocumentStorage().store_summary(summarized_id, "Stored summary")
+
+    progress_task_id = str(uuid.uuid4())
+    progress_key = summary_status_key(hashlib.sha256(texts[1].encode()).hexdigest())
+    redis_client.hset(
+        progress_key, mapping={"task_id": progress_task_id, "state": "PROGRESS"}
+    )
+    redis_client.expire(progress_key, 60)
+    document_ids = [
+        summarized_id,
+        "non-existent-doc",
+        in_progress_id,
+        missing_id,
+        duplicate_id,
+    ]
+
+    # Act
+    response = client.post(
+        f"{DOCUMENTS_URL}/bulk/summary", json={"document_ids": document_ids}
+    )
+
+    # Assert
+    assert response.status_code == 200
+    bulk_task_id = mock_generate_summary.apply_async.call_args.kwargs["task_id"]
+    assert response.json()["results"] == [
+        {
+            "document_id": summarized_id,
+            "status": "completed",
+            "summary": "Stored summary",
+        },
+        {"document_id": "non-existent-doc", "status": "not_found"},
+        {
+            "document_id": in_progress_id,
+            "status": "progress",
+            "task_id": progress_task_id,
+        },
+        {"document_id": missing_id, "status": "pending", "task_id": bulk_task_id},
+        {"document_id": duplicate_id, "status": "pending", "task_id": bulk_task_id},
+    ]
+    mock_generate_summary.apply_async.assert_called_once()
+    assert mock_generate_summary.apply_async.call_args.args == ((missing_id,),)
+    content_hash = hashlib.sha256(texts[2].encode()).hexdigest()
+    assert redis_client.hgetall(summary_status_key(content_hash)) == {
+        "task_id": bulk_task_id,
+        "state": "PENDING",
+    }
+
+
+def test_summarize_texts_reads_finished_tasks_from_status(
+    client: TestClient,
+) -> None:
+    # Arrange
+    text = f"Bulk document whose task already finished ({uuid.uuid4()})"
+    (document_id,) = client.post(
+        f"{DOCUMENTS_URL}/bulk", json={"texts": [text]}
+    ).json()["document_ids"]
+    key = summary_status_key(hashlib.sha256(text.encode()).hexdigest())
+    redis_client.hset(
+        key,
+        mapping={"task_id": "done-task-id", "state": "SUCCESS", "summary": "Done"},
+    )
+    redis_client.expire(key, 60)
+
+    # Act
+    response = client.post(
+        f"{DOCUMENTS_URL}/bulk/summary", json={"document_ids": [document_id]}
+    )
+
+    # Assert
+    assert response.json()["results"] == [
+        {
+            "document_id": document_id,
+            "status": "completed",
+            "summary": "Done",
+        }
+    ]
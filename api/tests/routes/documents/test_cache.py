@@ -0,0 +1,52 @@
+import sys
+
+from routes.documents.cache import ReadCache
+
+
+def test_read_cache_evicts_least_recently_used_over_budget() -> None:
+    # Arrange
+    value = "x" * 100
+    cache = ReadCache(max_bytes=sys.getsizeof(value) * 4)
+    for key in ("a", "b", "c", "d"):
+        cache.put(key, value)
+
+    # Act
+    cache.get("a")
+    cache.put("e", value)
+
+    # Assert
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("e") == value
+    stats = cache.stats()
+    assert stats["entries"] == 4
+    assert stats["bytes"] <= stats["max_bytes"]
+    assert stats["evictions"] == 1
+
+
+def test_read_cache_skips_objects_over_a_quarter_of_the_budget() -> None:
+    # Arrange
+    cache = ReadCache(max_bytes=1000)
+
+    # Act
+    cache.put("large", "x" * 500)
+
+    # Assert
+    assert cache.get("large") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_read_cache_reports_hit_rate() -> None:
+    # Arrange
+    cache = ReadCache()
+    cache.put("key", "value")
+
+    # Act
+    cache.get("key")
+    cache.get("missing")
+
+    # Assert
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
@@ -0,0 +1,101 @@
+import hashlib
+import uuid
+
+from fastapi.testclient import TestClient
+
+from core.celery import celery_app, redis_client
+from core.checkpoints import ChunkCheckpoint, checkpoint_keys_key
+from routes.documents.summary_status import summary_status_key
+
+DOCUMENTS_URL = "/documents"
+
+
+def _store_unique_document(client: TestClient) -> tuple[str, str]:
+    text = f"Document to delete ({uuid.uuid4()})"
+    document_id = client.post(DOCUMENTS_URL, data={"text": text}).json()["document_id"]
+    return document_id, text
+
+
+def test_delete_text_removes_document(client: TestClient) -> None:
+    # Arrange
+    document_id, _ = _store_unique_document(client)
+
+    # Act
+    response = client.delete(f"{DOCUMENTS_URL}/{document_id}")
+
+    # Assert
+    assert response.status_code == 204
+    assert client.get(f"{DOCUMENTS_URL}/{document_id}").status_code == 404
+    assert client.delete(f"{DOCUMENTS_URL}/{document_id}").status_code == 404
+
+
+def test_delete_text_document_not_found(client: TestClient) -> None:
+    # Arrange
+    document_id = str(uuid.uuid4())
+
+    # Act
+    response = client.delete(f"{DOCUMENTS_URL}/{document_id}")
+
+    # Assert
+    assert response.status_code == 404
+    assert response.json() == {
+        "detail": f"Document with document_id={document_id} does not exists"
+    }
+
+
+def test_delete_text_keeps_content_shared_with_other_ids(client: TestClient) -> None:
+    # Arrange
+    document_id, text = _store_unique_document(client)
+    other_id = client.post(DOCUMENTS_URL, data={"text": text}).json()["document_id"]
+
+    # Act
+    client.delete(f"{DOCUMENTS_URL}/{document_id}")
+
+    # Assert
+    assert client.get(f"{DOCUMENTS_URL}/{other_id}").json()["text"] == text
+
+
+def test_delete_text_removes_redis_keys_of_last_reference(client: TestClient) -> None:
+    # Arrange
+    document_id, text = _store_unique_document(client)
+    content_hash = hashlib.sha256(text.encode()).hexdigest()
+    task_id = str(uuid.uuid4())
+    result_key = celery_app.backend.get_key_for_task(task_id)
+    checkpoint = ChunkCheckpoint(redis_client, content_hash, "signature")
+    redis_client.hset(
+        summary_status_key(content_hash),
+        mapping={"task_id": task_id, "state": "STARTED"},
+    )
+    checkpoint.save({0: "First chunk summary"})
+    redis_client.set(result_key, "{}")
+
+    # Act
+    response = client.delete(f"{DOCUMENTS_URL}/{document_id}")
+
+    # Assert
+    assert response.status_code == 204
+    assert (
+        redis_client.exists(
+            summary_status_key(content_hash),
+            checkpoint.key,
+            checkpoint_keys_key(content_hash),
+            result_key,
+        )
+        == 0
+    )
+
+
+def test_pin_text_marks_document_pinned(client: TestClient) -> None:
+    # Arrange
+    document_id, _ = _store_unique_document(client)
+    url = f"{DOCUMENTS_URL}/{document_id}/pin"
+
+    # Act
+    pinned = client.put(url)
+    unpinned = client.delete(url)
+
+    # Assert
+    assert pinned.status_code == 200
+    assert pinned.json() == {"document_id": document_id, "pinned": True}
+    assert unpinned.json() == {"document_id": document_id, "pinned": False}
+    assert client.put(f"{DOCUMENTS_URL}/{uuid.uuid4()}/pin").status_code == 404
@@ -1,4 +1,6 @@
+import hashlib
 import uuid
+from unittest.mock import patch
 
 from fastapi.testclient import TestClient
 
@@ -35,3 +37,35 @@ def test_get_text_successful(client: TestClient) -> None:
     # Assert
     assert response.status_code == 200
     assert response.json() == {"document_id": document_id, "text": test_text}
+
+
+def test_get_text_returns_not_modified_for_matching_etag(client: TestClient) -> None:
+    # Arrange
+    test_text = f"Cached document text ({uuid.uuid4()})"
+    store_response = client.post(DOCUMENTS_URL, data={"text": test_text})
+    url = f"{DOCUMENTS_URL}/{store_response.json()['document_id']}"
+    etag = client.get(url).headers["ETag"]
+
+    # Act
+    with patch("routes.documents.controller.storage.get_document") as mock_get:
+        response = client.get(url, headers={"If-None-Match": etag})
+
+    # Assert
+    assert etag == f'"{hashlib.sha256(test_text.encode()).hexdigest()}"'
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    mock_get.assert_not_called()
+
+
+def test_get_text_returns_body_for_stale_etag(client: TestClient) -> None:
+    # Arrange
+    store_response = client.post(DOCUMENTS_URL, data={"text": "Changed text"})
+    url = f"{DOCUMENTS_URL}/{store_response.json()['document_id']}"
+
+    # Act
+    response = client.get(url, headers={"If-None-Match": '"stale"'})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["text"] == "Changed text"
@@ -0,0 +1,75 @@
+import hashlib
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from routes.documents import migrate_storage
+from routes.documents.migrate_storage import migrate
+from routes.documents.storage import DocumentStorage
+
+
+def test_migrate_flat_layout(tmp_path: Path) -> None:
+    # Arrange
+    (tmp_path / "doc-1.txt").write_text("First document", encoding="utf-8")
+    (tmp_path / "doc-1-summary.txt").write_text("First summary", encoding="utf-8")
+    (tmp_path / "doc-2.txt").write_text("Second document", encoding="utf-8")
+
+    # Act
+    stats = migrate(str(tmp_path))
+    storage = DocumentStorage(str(tmp_path))
+
+    # Assert
+    assert stats == {"documents": 2, "summaries": 1, "objects": 0}
+    assert list(tmp_path.glob("*.txt")) == []
+    assert storage.get_document("doc-1") == "First document"
+    assert storage.get_summary("doc-1") == "First summary"
+    assert storage.get_document("doc-2") == "Second document"
+    assert storage.get_summary("doc-2") is None
+
+
+def test_interrupted_migration_completes_on_rerun(tmp_path: Path) -> None:
+    # Arrange
+    (tmp_path / "doc-1.txt").write_text("First document", encoding="utf-8")
+    (tmp_path / "doc-1-summary.txt").write_text("First summary", encoding="utf-8")
+
+    move_object = migrate_storage._move_object
+
+    def move_then_crash(source: Path, destination: Path):
+        move_object(source, destination)
+        raise KeyboardInterrupt
+
+    with patch.object(migrate_storage, "_move_object", move_then_crash):
+        with pytest.raises(KeyboardInterrupt):
+            migrate(str(tmp_path))
+
+    # Act
+    migrate(str(tmp_path))
+    storage = DocumentStorage(str(tmp_path))
+
+    # Assert
+    assert list(tmp_path.glob("*.txt")) == []
+    assert storage.get_document("doc-1") == "First document"
+    assert storage.get_summary("doc-1") == "First summary"
+
+
+def test_migrate_unsharded_content_addressed_layout(tmp_path: Path) -> None:
+    # Arrange
+    content_hash = hashlib.sha256(b"Shared text").hexdigest()
+    (tmp_path / "objects").mkdir()
+    (tmp_path / "refs").mkdir()
+    (tmp_path / "objects" / f"{content_hash}.txt").write_text("Shared text")
+    (tmp_path / "objects" / f"{content_hash}-summary.txt").write_text("Summary")
+    (tmp_path / "refs" / "doc-a").write_text(content_hash)
+    (tmp_path / "refs" / "doc-b").write_text(content_hash)
+
+    # Act
+    migrate(str(tmp_path))
+    stats = migrate(str(tmp_path))
+    storage = DocumentStorage(str(tmp_path))
+
+    # Assert
+    assert stats == {"documents": 0, "summaries": 0, "objects": 0}
+    assert not (tmp_path / "refs").exists()
+    assert storage.get_document("doc-a") == "Shared text"
+    assert storage.get_summary("doc-b") == "Summary"
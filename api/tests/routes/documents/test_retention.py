@@ -0,0 +1,151 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from core.celery import async_redis_client
+from routes.documents.async_storage import AsyncDocumentStorage
+from routes.documents.retention import RetentionSweeper
+from routes.documents.storage import DocumentStorage
+from routes.documents.summary_status import SummaryStatusStore
+
+
+def _sweeper(storage: AsyncDocumentStorage, **policies) -> RetentionSweeper:
+    return RetentionSweeper(
+        storage,
+        SummaryStatusStore(async_redis_client),
+        async_redis_client,
+        **{"max_age_seconds": 0, "max_bytes": 0, **policies},
+    )
+
+
+def _run(coroutine):
+    async def run():
+        try:
+            return await coroutine
+        finally:
+            # Pooled connections are bound to the loop that opened them.
+            await async_redis_client.connection_pool.disconnect()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("backend", ["files", "segments"])
+def test_delete_document_removes_objects_after_last_reference(
+    tmp_path: Path, backend: str
+) -> None:
+    # Arrange
+    storage = DocumentStorage(str(tmp_path), backend=backend, cache_max_bytes=0)
+    first_id = storage.store_document("Shared text")
+    second_id = storage.store_document("Shared text")
+    storage.store_summary(first_id, "Shared summary")
+    content_hash = storage.get_content_hash(first_id)
+
+    # Act
+    first = storage.delete_document(first_id)
+    kept = storage.get_document(second_id)
+    second = storage.delete_document(second_id)
+
+    # Assert
+    assert first["orphaned"] is False
+    assert kept == "Shared text"
+    assert second["orphaned"] is True
+    assert storage.index.get_content(content_hash) is None
+    assert not storage.object_path(content_hash).exists()
+    if backend == "segments":
+        assert storage.segments.view(f"{content_hash}.txt") is None
+        assert storage.segments.view(f"{content_hash}-summary.txt") is None
+    assert storage.delete_document(second_id) is None
+
+
+@pytest.mark.parametrize("backend", ["files", "segments"])
+@pytest.mark.parametrize("streamed", [False, True])
+def test_store_rewrites_objects_deleted_after_lookup(
+    tmp_path: Path, backend: str, streamed: bool, monkeypatch
+) -> None:
+    # Arrange
+    storage = DocumentStorage(str(tmp_path), backend=backend, cache_max_bytes=0)
+    first_id = storage.store_document("Shared text")
+    get_content = storage.index.get_content
+
+    def delete_after_lookup(content_hash: str) -> dict | None:
+        content = get_content(content_hash)
+        storage.delete_document(first_id)
+        return content
+
+    monkeypatch.setattr(storage.index, "get_content", delete_after_lookup)
+
+    # Act
+    if streamed:
+        writer = storage.open_document_writer()
+        writer.write(b"Shared text")
+        second_id = writer.commit()
+    else:
+        second_id = storage.store_document("Shared text")
+
+    # Assert
+    assert storage.index.get(first_id) is None
+    assert storage.get_document(second_id) == "Shared text"
+    assert not list(tmp_path.glob("objects/.tmp-*"))
+
+
+def test_sweep_removes_expired_unpinned_documents(tmp_path: Path) -> None:
+    # Arrange
+    storage = AsyncDocumentStorage(str(tmp_path))
+    sweeper = _sweeper(storage, max_age_seconds=3600)
+    expired_id = storage.storage.store_document("Expired text")
+    pinned_id = storage.storage.store_document("Pinned text")
+    storage.index.set_pinned(pinned_id, True)
+    later = time.time() + 7200
+    fresh_id = storage.storage.store_document("Fresh text")
+    storage.index.add_document(
+        fresh_id, storage.hash_content("Fresh text"), 10, created_at=later
+    )
+
+    # Act
+    removed = _run(sweeper.sweep(now=later))
+
+    # Assert
+    assert removed == {"max_age": 1, "max_bytes": 0}
+    assert storage.index.get(expired_id) is None
+    assert storage.index.get(pinned_id)["pinned"] is True
+    assert storage.index.get(fresh_id) is not None
+
+
+def test_sweep_evicts_least_recently_accessed_over_byte_limit(tmp_path: Path) -> None:
+    # Arrange
+    storage = AsyncDocumentStorage(str(tmp_path))
+    sweeper = _sweeper(storage, max_bytes=25)
+    old_id, read_id, pinned_id = (
+        storage.storage.store_document(text)
+        for text in ("Old text 1", "Read text 2", "Pinned text")
+    )
+    storage.index.set_pinned(pinned_id, True)
+    sweeper.record_access(read_id)
+
+    async def flush_and_sweep():
+        await sweeper.flush_access()
+        return await sweeper.sweep()
+
+    # Act
+    removed = _run(flush_and_sweep())
+
+    # Assert
+    assert removed == {"max_age": 0, "max_bytes": 1}
+    assert storage.index.get(old_id) is None
+    assert storage.index.get(read_id) is not None
+    assert storage.index.get(pinned_id) is not None
+    assert storage.index.total_size() <= 25
+
+
+def test_sweeper_is_disabled_without_policies(tmp_path: Path) -> None:
+    # Arrange
+    sweeper = _sweeper(AsyncDocumentStorage(str(tmp_path)))
+
+    # Act
+    sweeper.record_access("document")
+
+    # Assert
+    assert sweeper.enabled is False
+    assert sweeper._accessed == {}
@@ -0,0 +1,243 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from routes.documents.async_storage import AsyncDocumentStorage
+from routes.documents.segments import SegmentStore
+from routes.documents.storage import DocumentStorage
+
+
+def _append_many(path: str, prefix: str, count: int):
+    store = SegmentStore(Path(path), compaction_seconds=0)
+    for i in range(count):
+        store.put(f"{prefix}-{i}", f"{prefix} value {i}".encode())
+
+
+def test_put_and_view_round_trip(tmp_path: Path) -> None:
+    # Arrange
+    store = SegmentStore(tmp_path, compaction_seconds=0)
+
+    # Act
+    store.put("first", b"first value")
+    store.put("empty", b"")
+    store.put("second", b"second value")
+
+    # Assert
+    assert bytes(store.view("first")) == b"first value"
+    assert bytes(store.view("empty")) == b""
+    assert bytes(store.view("second")) == b"second value"
+    assert store.view("missing") is None
+    assert store.segments() == [1]
+
+
+def test_put_again_returns_latest_version(tmp_path: Path) -> None:
+    # Arrange
+    store = SegmentStore(tmp_path, compaction_seconds=0)
+    store.put("key", b"old")
+
+    # Act
+    store.put("key", b"new")
+
+    # Assert
+    assert bytes(store.view("key")) == b"new"
+    assert store.stats()["records"] == 1
+
+
+def test_full_segment_rotates_to_a_new_one(tmp_path: Path) -> None:
+    # Arrange
+    store = SegmentStore(tmp_path, max_segment_bytes=100, compaction_seconds=0)
+
+    # Act
+    for i in range(5):
+        store.put(f"key-{i}", bytes([i]) * 60)
+
+    # Assert
+    assert store.segments() == [1, 2, 3, 4, 5]
+    assert all(bytes(store.view(f"key-{i}")) == bytes([i]) * 60 for i in range(5))
+
+
+def test_put_file_streams_file_into_segment(tmp_path: Path) -> None:
+    # Arrange
+    store = SegmentStore(tmp_path / "segments", compaction_seconds=0)
+    source = tmp_path / "upload"
+    source.write_bytes(b"streamed " * 1000)
+
+    # Act
+    store.put_file("upload", source)
+
+    # Assert
+    assert bytes(store.view("upload")) == b"streamed " * 1000
+
+
+def test_compact_rewrites_mostly_dead_segments(tmp_path: Path) -> None:
+    # Arrange
+    store = SegmentStore(tmp_path, max_segment_bytes=1000, compaction_seconds=0)
+    for version in range(3):
+        for i in range(4):
+            store.put(f"key-{i}", f"v{version}".encode() * 100)
+    before = store.stats()
+
+    # Act
+    compacted = store.compact()
+    after = store.stats()
+
+    # Assert
+    assert compacted["segments"] > 0
+    assert after["bytes"] < before["bytes"]
+    assert after["live_bytes"] == before["live_bytes"]
+    assert all(bytes(store.view(f"key-{i}")) == b"v2" * 100 for i in range(4))
+
+
+def test_compact_keeps_live_segments(tmp_path: Path) -> None:
+    # Arrange
+    store = SegmentStore(tmp_path, max_segment_bytes=100, compaction_seconds=0)
+    for i in range(3):
+        store.put(f"key-{i}", b"x" * 60)
+
+    # Act
+    compacted = store.compact()
+
+    # Assert
+    assert compacted == {"segments": 0, "bytes_reclaimed": 0}
+    assert store.segments() == [1, 2, 3]
+
+
+def test_appends_from_several_processes_do_not_interleave(tmp_path: Path) -> None:
+    # Arrange
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_append_many, args=(str(tmp_path), prefix, 50))
+        for prefix in ("a", "b", "c")
+    ]
+
+    # Act
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+
+    # Assert
+    store = SegmentStore(tmp_path, compaction_seconds=0)
+    assert all(process.exitcode == 0 for process in processes)
+    for prefix in ("a", "b", "c"):
+        for i in range(50):
+            assert bytes(store.view(f"{prefix}-{i}")) == f"{prefix} value {i}".encode()
+
+
+def test_forked_child_opens_its_own_segment_index(tmp_path: Path) -> None:
+    # Arrange
+    store = SegmentStore(tmp_path, compaction_seconds=0)
+    store.put("key", b"value")
+    parent_connection = store._connection()
+    store.view("key")
+
+    # Act
+    with store._lock:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                fresh = store._connection() is not parent_connection
+                store.put("child-key", b"child value")
+                read = bytes(store.view("key"))
+                os._exit(0 if fresh and read == b"value" else 1)
+            finally:
+                os._exit(1)
+    deadline = time.monotonic() + 5
+    while (status := os.waitpid(pid, os.WNOHANG))[0] == 0:
+        if time.monotonic() > deadline:
+            os.kill(pid, 9)
+            os.waitpid(pid, 0)
+            pytest.fail("Child blocked on a lock held in the parent")
+        time.sleep(0.01)
+
+    # Assert
+    assert os.waitstatus_to_exitcode(status[1]) == 0
+    assert store._connection() is parent_connection
+    assert bytes(store.view("child-key")) == b"child value"
+
+
+@pytest.mark.parametrize("codec", ["none", "gzip"])
+def test_segment_storage_round_trip(tmp_path: Path, codec: str) -> None:
+    # Arrange
+    storage = DocumentStorage(
+        str(tmp_path), compression_codec=codec, backend="segments"
+    )
+    text = "Packed English text. " * 200
+
+    # Act
+    document_id = storage.store_document(text)
+    storage.store_summary(document_id, "Packed summary")
+    storage.cache.clear()
+
+    # Assert
+    assert not any((tmp_path / "objects").iterdir())
+    assert storage.get_document(document_id) == text
+    assert storage.get_summary(document_id) == "Packed summary"
+    assert b"".join(storage.iter_document(document_id, 21, 63)) == text[21:63].encode()
+
+
+def test_segment_storage_streams_uploads(tmp_path: Path) -> None:
+    # Arrange
+    storage = DocumentStorage(str(tmp_path), backend="segments")
+    writer = storage.open_document_writer()
+
+    # Act
+    writer.write("Streamed ".encode())
+    writer.write("upload".encode())
+    document_id = writer.commit()
+
+    # Assert
+    assert storage.get_document(document_id) == "Streamed upload"
+    assert list((tmp_path / "objects").iterdir()) == []
+
+
+def test_segment_storage_reads_objects_stored_as_files(tmp_path: Path) -> None:
+    # Arrange
+    document_id = DocumentStorage(str(tmp_path), backend="files").store_document(
+        "Stored before switching"
+    )
+
+    # Act
+    storage = DocumentStorage(str(tmp_path), backend="segments")
+
+    # Assert
+    assert storage.get_document(document_id) == "Stored before switching"
+    assert b"".join(storage.iter_document(document_id, 7)) == b"before switching"
+
+
+def test_async_segment_storage_shares_store_with_sync(tmp_path: Path) -> None:
+    # Arrange
+    storage = AsyncDocumentStorage(str(tmp_path), backend="segments")
+    text = "Asynchronously packed text " * 50
+
+    async def scenario():
+        document_id = await storage.store_document(text)
+        await storage.store_summary(document_id, "Async summary")
+        writer = storage.open_document_writer()
+        await writer.write(b"Async upload")
+        upload_id = await writer.commit()
+        chunks = [
+            chunk
+            async for chunk in storage.iter_document(document_id, 5, 40, chunk_size=8)
+        ]
+        return document_id, upload_id, b"".join(chunks)
+
+    # Act
+    document_id, upload_id, streamed = asyncio.run(scenario())
+    reader = DocumentStorage(str(tmp_path), backend="segments", cache_max_bytes=0)
+
+    # Assert
+    assert streamed == text.encode()[5:40]
+    assert reader.get_document(document_id) == text
+    assert reader.get_summary(document_id) == "Async summary"
+    assert reader.get_document(upload_id) == "Async upload"
+
+
+def test_unknown_backend_is_rejected(tmp_path: Path) -> None:
+    # Act / Assert
+    with pytest.raises(ValueError):
+        DocumentStorage(str(tmp_path), backend="tape")
@@ -0,0 +1,221 @@
+import asyncio
+import mmap
+import os
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from routes.documents.async_storage import AsyncDocumentStorage
+from routes.documents.storage import DocumentStorage
+
+
+def test_store_document_shards_objects_and_indexes_metadata(tmp_path: Path) -> None:
+    # Arrange
+    storage = DocumentStorage(str(tmp_path))
+    text = "Sharded document text"
+    content_hash = DocumentStorage.hash_content(text)
+
+    # Act
+    document_id = storage.store_document(text)
+    metadata = storage.get_metadata(document_id)
+
+    # Assert
+    assert (
+        tmp_path
+        / "objects"
+        / content_hash[:2]
+        / content_hash[2:4]
+        / f"{content_hash}.txt"
+    ).exists()
+    assert metadata["content_hash"] == content_hash
+    assert metadata["size"] == len(text)
+    assert metadata["has_summary"] is False
+    assert metadata["created_at"] > 0
+
+
+def test_store_summary_marks_index_for_all_duplicates(tmp_path: Path) -> None:
+    # Arrange
+    storage = DocumentStorage(str(tmp_path))
+    first_id = storage.store_document("Same text")
+    second_id = storage.store_document("Same text")
+
+    # Act
+    storage.store_summary(first_id, "Summary")
+
+    # Assert
+    assert storage.get_metadata(second_id)["has_summary"] is True
+    assert storage.get_summary(second_id) == "Summary"
+
+
+def test_get_summary_missing_document_returns_none(tmp_path: Path) -> None:
+    # Arrange
+    storage = DocumentStorage(str(tmp_path))
+
+    # Act / Assert
+    assert storage.get_summary("missing") is None
+    assert storage.get_document("missing") is None
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_compressed_storage_round_trip(tmp_path: Path, codec: str) -> None:
+    # Arrange
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    storage = DocumentStorage(str(tmp_path), compression_codec=codec)
+    text = "Compressible English text. " * 200
+
+    # Act
+    document_id = storage.store_document(text)
+    storage.store_summary(document_id, "Compressed summary")
+    content_hash = storage.get_content_hash(document_id)
+    stored = storage.object_path(content_hash, codec=codec)
+
+    # Assert
+    assert stored.stat().st_size < len(text)
+    assert storage.get_document(document_id) == text
+    assert storage.get_summary(document_id) == "Compressed summary"
+    assert b"".join(storage.iter_document(document_id, 27, 54)) == text[27:54].encode()
+
+
+def test_compressed_and_uncompressed_objects_coexist(tmp_path: Path) -> None:
+    # Arrange
+    legacy_id = DocumentStorage(str(tmp_path)).store_document("Legacy plain text")
+    storage = DocumentStorage(str(tmp_path), compression_codec="gzip")
+
+    # Act
+    new_id = storage.store_document("New compressed text")
+
+    # Assert
+    assert storage.get_metadata(legacy_id)["compression"] == "none"
+    assert storage.get_metadata(new_id)["compression"] == "gzip"
+    assert storage.get_document(legacy_id) == "Legacy plain text"
+    assert storage.get_document(new_id) == "New compressed text"
+
+
+def test_async_storage_streams_compressed_range(tmp_path: Path) -> None:
+    # Arrange
+    storage = AsyncDocumentStorage(str(tmp_path), compression_codec="gzip")
+    text = "".join(f"{i:05d}" for i in range(20000))
+
+    async def scenario() -> tuple[str, bytes]:
+        document_id = await storage.store_document(text)
+        chunks = [
+            chunk
+            async for chunk in storage.iter_document(
+                document_id, 70000, 70100, chunk_size=1024
+            )
+        ]
+        return await storage.get_document(document_id), b"".join(chunks)
+
+    # Act
+    stored_text, ranged = asyncio.run(scenario())
+
+    # Assert
+    assert stored_text == text
+    assert ranged == text[70000:70100].encode()
+
+
+def test_async_storage_reads_index_off_the_event_loop(tmp_path: Path) -> None:
+    # Arrange
+    storage = AsyncDocumentStorage(str(tmp_path))
+    index = storage.index
+    reader_threads = []
+
+    def recording(read):
+        def wrapper(*args):
+            reader_threads.append(threading.get_ident())
+            return read(*args)
+
+        return wrapper
+
+    async def scenario() -> str:
+        document_id = await storage.store_document("Indexed text")
+        await storage.store_documents(["Indexed text", "Other text"])
+        return await storage.get_document(document_id)
+
+    # Act
+    with (
+        patch.object(index, "get", recording(index.get)),
+        patch.object(index, "get_content", recording(index.get_content)),
+    ):
+        result = asyncio.run(scenario())
+
+    # Assert
+    assert result == "Indexed text"
+    assert len(reader_threads) == 4
+    assert threading.get_ident() not in reader_threads
+
+
+@patch("routes.documents.storage.MMAP_THRESHOLD", 16)
+def test_get_document_large_file_reads_through_mmap(tmp_path: Path) -> None:
+    # Arrange
+    storage = DocumentStorage(str(tmp_path))
+    text = "Memory-mapped document text é " * 10
+    document_id = storage.store_document(text)
+
+    # Act
+    with patch("routes.documents.storage.mmap.mmap", wraps=mmap.mmap) as mock_mmap:
+        result = storage.get_document(document_id)
+
+    # Assert
+    assert result == text
+    mock_mmap.assert_called_once()
+
+
+def test_get_document_serves_repeat_reads_from_cache(tmp_path: Path) -> None:
+    # Arrange
+    storage = DocumentStorage(str(tmp_path))
+    document_id = storage.store_document("Hot document text")
+    storage.get_document(document_id)
+
+    # Act
+    with patch.object(storage, "_read_object") as mock_read:
+        result = storage.get_document(document_id)
+
+    # Assert
+    assert result == "Hot document text"
+    mock_read.assert_not_called()
+    assert storage.cache.stats()["hits"] == 1
+
+
+def test_regenerated_summary_is_not_served_stale(tmp_path: Path) -> None:
+    # Arrange
+    storage = DocumentStorage(str(tmp_path))
+    async_storage = AsyncDocumentStorage(str(tmp_path))
+    document_id = storage.store_document("Summarized text")
+    storage.store_summary(document_id, "First summary")
+    asyncio.run(async_storage.get_summary(document_id))
+
+    # Act
+    storage.store_summary(document_id, "Second summary")
+    result = asyncio.run(async_storage.get_summary(document_id))
+
+    # Assert
+    assert result == "Second summary"
+    assert storage.get_metadata(document_id)["summary_hash"] == (
+        DocumentStorage.hash_content("Second summary")
+    )
+
+
+def test_index_connection_is_not_shared_with_forked_children(tmp_path: Path) -> None:
+    # Arrange
+    storage = DocumentStorage(str(tmp_path), cache_max_bytes=0)
+    document_id = storage.store_document("Text read by a forked child")
+    parent_connection = storage.index._connection()
+
+    # Act
+    pid = os.fork()
+    if pid == 0:
+        try:
+            fresh = storage.index._connection() is not parent_connection
+            read = storage.get_document(document_id)
+            os._exit(0 if fresh and read == "Text read by a forked child" else 1)
+        finally:
+            os._exit(1)
+    _, status = os.waitpid(pid, 0)
+
+    # Assert
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert storage.index._connection() is parent_connection
@@ -0,0 +1,40 @@
+from fastapi.testclient import TestClient
+
+DOCUMENTS_URL = "/documents"
+
+
+def test_store_text_stream_successful(client: TestClient) -> None:
+    # Arrange
+    chunks = [b"Streamed ", "document é".encode("utf-8"), b" content"]
+
+    # Act
+    response = client.post(f"{DOCUMENTS_URL}/raw", content=iter(chunks))
+
+    # Assert
+    assert response.status_code == 201
+    document_id = response.json()["document_id"]
+    get_response = client.get(f"{DOCUMENTS_URL}/{document_id}")
+    assert get_response.json()["text"] == "Streamed document é content"
+
+
+def test_store_text_stream_multibyte_character_split_across_chunks(
+    client: TestClient,
+) -> None:
+    # Arrange
+    encoded = "café".encode("utf-8")
+    chunks = [encoded[:4], encoded[4:]]
+
+    # Act
+    response = client.post(f"{DOCUMENTS_URL}/raw", content=iter(chunks))
+
+    # Assert
+    assert response.status_code == 201
+
+
+def test_store_text_stream_failed_invalid_utf8(client: TestClient) -> None:
+    # Act
+    response = client.post(f"{DOCUMENTS_URL}/raw", content=b"\xff\xfe invalid")
+
+    # Assert
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Document body must be UTF-8 encoded text"}
@@ -0,0 +1,74 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+DOCUMENTS_URL = "/documents"
+
+
+def _store(client: TestClient, text: str) -> str:
+    response = client.post(DOCUMENTS_URL, data={"text": text})
+    return response.json()["document_id"]
+
+
+def test_stream_text_failed_document_not_found(client: TestClient) -> None:
+    # Arrange
+    random_document_id = uuid.uuid4()
+
+    # Act
+    response = client.get(f"{DOCUMENTS_URL}/{random_document_id}/raw")
+
+    # Assert
+    assert response.status_code == 404
+
+
+def test_stream_text_successful(client: TestClient) -> None:
+    # Arrange
+    test_text = "Full streamed document text"
+    document_id = _store(client, test_text)
+
+    # Act
+    response = client.get(f"{DOCUMENTS_URL}/{document_id}/raw")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.text == test_text
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-length"] == str(len(test_text))
+
+
+def test_stream_text_range_successful(client: TestClient) -> None:
+    # Arrange
+    test_text = "0123456789"
+    document_id = _store(client, test_text)
+
+    # Act
+    bounded = client.get(
+        f"{DOCUMENTS_URL}/{document_id}/raw", headers={"Range": "bytes=2-5"}
+    )
+    open_ended = client.get(
+        f"{DOCUMENTS_URL}/{document_id}/raw", headers={"Range": "bytes=7-"}
+    )
+    suffix = client.get(
+        f"{DOCUMENTS_URL}/{document_id}/raw", headers={"Range": "bytes=-3"}
+    )
+
+    # Assert
+    assert bounded.status_code == 206
+    assert bounded.text == "2345"
+    assert bounded.headers["content-range"] == "bytes 2-5/10"
+    assert open_ended.text == "789"
+    assert suffix.text == "789"
+
+
+def test_stream_text_range_not_satisfiable(client: TestClient) -> None:
+    # Arrange
+    document_id = _store(client, "short")
+
+    # Act
+    response = client.get(
+        f"{DOCUMENTS_URL}/{document_id}/raw", headers={"Range": "bytes=10-20"}
+    )
+
+    # Assert
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */5"
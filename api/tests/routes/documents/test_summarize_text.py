@@ -1,10 +1,31 @@
-from unittest.mock import patch, MagicMock
+import hashlib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
 from fastapi.testclient import TestClient
 
+from core.celery import redis_client
+from routes.documents.storage import DocumentStorage
+from routes.documents.summary_status import summary_status_key
 
 DOCUMENTS_URL = "/documents"
 
 
+def _store_unique_document(client: TestClient) -> tuple[str, str]:
+    # Summary tasks are keyed by content, so every run needs its own text.
+    text = f"Test document for summarization ({uuid.uuid4()})"
+    document_id = client.post(DOCUMENTS_URL, data={"text": text}).json()["document_id"]
+    return document_id, hashlib.sha256(text.encode()).hexdigest()
+
+
+def _set_status(content_hash: str, **fields) -> None:
+    redis_client.hset(summary_status_key(content_hash), mapping=fields)
+    redis_client.expire(summary_status_key(content_hash), 60)
+
+
 def test_summarize_text_document_not_found(client: TestClient) -> None:
     # Arrange
     non_existent_id = "non-existent-doc"
@@ -44,129 +65,138 @@ def test_summarize_text_existing_summary_returns_immediately(
         }
 
 
-@patch("routes.documents.controller.redis_client")
 @patch("routes.documents.controller.generate_summary")
 def test_summarize_text_new_task_created(
-    mock_generate_summary, mock_redis, client: TestClient
+    mock_generate_summary, client: TestClient
 ) -> None:
     # Arrange
-    test_text = "Test document for new summarization task"
+    test_text = f"Test document for new summarization task ({uuid.uuid4()})"
+    content_hash = hashlib.sha256(test_text.encode()).hexdigest()
     store_response = client.post(DOCUMENTS_URL, data={"text": test_text})
     document_id = store_response.json()["document_id"]
     url = f"{DOCUMENTS_URL}/{document_id}/summary"
 
-    mock_redis.get.return_value = None
-
-    mock_task = MagicMock()
-    mock_task.id = "test-task-id-123"
-    mock_generate_summary.delay.return_value = mock_task
-
-    with patch("routes.documents.controller.storage.get_summary", return_value=None):
-        # Act
-        response = client.get(url)
-
-        # Assert
-        assert response.status_code == 202
-        expected_response = {
-            "document_id": document_id,
-            "message": "Summary generation started",
-            "task_id": "test-task-id-123",
-            "status": "pending",
-        }
-        assert response.json() == expected_response
+    # Act
+    response = client.get(url)
 
-        mock_redis.get.assert_called_once_with(f"summary_task:{document_id}")
-        mock_redis.setex.assert_called_once_with(
-            f"summary_task:{document_id}", 3600, "test-task-id-123"
-        )
-        mock_generate_summary.delay.assert_called_once_with(document_id, test_text)
+    # Assert
+    assert response.status_code == 202
+    task_id = response.json()["task_id"]
+    assert response.json() == {
+        "document_id": document_id,
+        "message": "Summary generation started",
+        "task_id": task_id,
+        "status": "pending",
+    }
+    mock_generate_summary.apply_async.assert_called_once()
+    call = mock_generate_summary.apply_async.call_args
+    assert call.args == ((document_id,),)
+    assert call.kwargs["task_id"] == task_id
+    assert call.kwargs["queue"] == "summaries.small"
+    assert redis_client.hgetall(summary_status_key(content_hash)) == {
+        "task_id": task_id,
+        "state": "PENDING",
+    }
 
 
-@patch("routes.documents.controller.redis_client")
-@patch("routes.documents.controller.celery_app")
+@patch("routes.documents.controller.generate_summary")
 def test_summarize_text_existing_task_pending(
-    mock_celery_app, mock_redis, client: TestClient
+    mock_generate_summary, client: TestClient
 ) -> None:
     # Arrange
-    test_text = "Test document with pending task"
-    store_response = client.post(DOCUMENTS_URL, data={"text": test_text})
-    document_id = store_response.json()["document_id"]
+    document_id, content_hash = _store_unique_document(client)
+    _set_status(content_hash, task_id="existing-task-id", state="PENDING")
     url = f"{DOCUMENTS_URL}/{document_id}/summary"
 
-    mock_redis.get.return_value = "existing-task-id"
-
-    mock_task_result = MagicMock()
-    mock_task_result.state = "PENDING"
-    mock_celery_app.AsyncResult.return_value = mock_task_result
-
-    with patch("routes.documents.controller.storage.get_summary", return_value=None):
-        # Act
-        response = client.get(url)
+    # Act
+    response = client.get(url)
 
-        # Assert
-        assert response.status_code == 202
-        expected_response = {
-            "document_id": document_id,
-            "message": "Summary is being generated. Please try again soon.",
-            "task_id": "existing-task-id",
-            "status": "pending",
-        }
-        assert response.json() == expected_response
+    # Assert
+    assert response.status_code == 202
+    expected_response = {
+        "document_id": document_id,
+        "message": "Summary is being generated. Please try again soon.",
+        "task_id": "existing-task-id",
+        "status": "pending",
+    }
+    assert response.json() == expected_response
+    mock_generate_summary.apply_async.assert_not_called()
 
 
-@patch("routes.documents.controller.redis_client")
-@patch("routes.documents.controller.celery_app")
+@patch("routes.documents.controller.generate_summary")
 def test_summarize_text_existing_task_progress(
-    mock_celery_app, mock_redis, client: TestClient
+    mock_generate_summary, client: TestClient
 ) -> None:
     # Arrange
-    test_text = "Test document with task in progress"
-    store_response = client.post(DOCUMENTS_URL, data={"text": test_text})
-    document_id = store_response.json()["document_id"]
+    document_id, content_hash = _store_unique_document(client)
+    _set_status(
+        content_hash,
+        task_id="progress-task-id",
+        state="PROGRESS",
+        status="Generating summary...",
+    )
     url = f"{DOCUMENTS_URL}/{document_id}/summary"
 
-    mock_redis.get.return_value = "progress-task-id"
-
-    mock_task_result = MagicMock()
-    mock_task_result.state = "PROGRESS"
-    mock_celery_app.AsyncResult.return_value = mock_task_result
-
-    with patch("routes.documents.controller.storage.get_summary", return_value=None):
-        # Act
-        response = client.get(url)
+    # Act
+    response = client.get(url)
 
-        # Assert
-        assert response.status_code == 202
-        expected_response = {
-            "document_id": document_id,
-            "message": "Summary is being generated. Please try again soon.",
-            "task_id": "progress-task-id",
-            "status": "progress",
-        }
-        assert response.json() == expected_response
+    # Assert
+    assert response.status_code == 202
+    expected_response = {
+        "document_id": document_id,
+        "message": "Summary is being generated. Please try again soon.",
+        "task_id": "progress-task-id",
+        "status": "progress",
+    }
+    assert response.json() == expected_response
+    mock_generate_summary.apply_async.assert_not_called()
 
 
-@patch("routes.documents.controller.redis_client")
-@patch("routes.documents.controller.celery_app")
-def test_summarize_text_existing_task_success(
-    mock_celery_app, mock_redis, client: TestClient
+@patch("routes.documents.controller.generate_summary")
+def test_summarize_text_reports_chunk_progress(
+    mock_generate_summary, client: TestClient
 ) -> None:
     # Arrange
-    test_text = "Test document with completed task"
-    store_response = client.post(DOCUMENTS_URL, data={"text": test_text})
-    document_id = store_response.json()["document_id"]
+    document_id, content_hash = _store_unique_document(client)
+    _set_status(
+        content_hash,
+        task_id="chunked-task-id",
+        state="PROGRESS",
+        status="Summarized 3 of 8 chunks...",
+        chunks_done=3,
+        chunks_total=8,
+        eta_seconds=12.5,
+        chunks_cached=2,
+        chunk_cache_hit_rate=0.667,
+    )
     url = f"{DOCUMENTS_URL}/{document_id}/summary"
 
-    mock_redis.get.return_value = "success-task-id"
+    # Act
+    response = client.get(url)
 
-    mock_task_result = MagicMock()
-    mock_task_result.state = "SUCCESS"
-    mock_task_result.result = {
-        "document_id": document_id,
-        "summary": "Task completed summary",
-        "status": "completed",
+    # Assert
+    assert response.status_code == 202
+    assert response.json()["progress"] == {
+        "status": "Summarized 3 of 8 chunks...",
+        "chunks_done": 3,
+        "chunks_total": 8,
+        "eta_seconds": 12.5,
+        "chunks_cached": 2,
+        "chunk_cache_hit_rate": 0.667,
     }
-    mock_celery_app.AsyncResult.return_value = mock_task_result
+    mock_generate_summary.apply_async.assert_not_called()
+
+
+def test_summarize_text_existing_task_success(client: TestClient) -> None:
+    # Arrange
+    document_id, content_hash = _store_unique_document(client)
+    _set_status(
+        content_hash,
+        task_id="success-task-id",
+        state="SUCCESS",
+        summary="Task completed summary",
+    )
+    url = f"{DOCUMENTS_URL}/{document_id}/summary"
 
     with patch("routes.documents.controller.storage.get_summary", return_value=None):
         # Act
@@ -181,54 +211,123 @@ def test_summarize_text_existing_task_success(
         assert response.json() == expected_response
 
 
-@patch("routes.documents.controller.redis_client")
-@patch("routes.documents.controller.celery_app")
 @patch("routes.documents.controller.generate_summary")
 def test_summarize_text_existing_task_failed_retry(
-    mock_generate_summary, mock_celery_app, mock_redis, client: TestClient
+    mock_generate_summary, client: TestClient
 ) -> None:
     # Arrange
-    test_text = "Test document with failed task"
-    store_response = client.post(DOCUMENTS_URL, data={"text": test_text})
-    document_id = store_response.json()["document_id"]
+    document_id, content_hash = _store_unique_document(client)
+    _set_status(content_hash, task_id="failed-task-id", state="FAILURE", error="x")
+    url = f"{DOCUMENTS_URL}/{document_id}/summary"
+
+    # Act
+    response = client.get(url)
+
+    # Assert
+    assert response.status_code == 202
+    task_id = response.json()["task_id"]
+    assert task_id != "failed-task-id"
+    assert response.json()["message"] == "Summary generation started"
+    mock_generate_summary.apply_async.assert_called_once()
+    assert redis_client.hgetall(summary_status_key(content_hash)) == {
+        "task_id": task_id,
+        "state": "PENDING",
+    }
+
+
+@patch("routes.documents.controller.generate_summary")
+def test_summarize_text_releases_claim_when_dispatch_fails(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    document_id, content_hash = _store_unique_document(client)
+    mock_generate_summary.apply_async.side_effect = ConnectionError("broker down")
     url = f"{DOCUMENTS_URL}/{document_id}/summary"
 
-    mock_redis.get.return_value = "failed-task-id"
+    # Act
+    with pytest.raises(ConnectionError):
+        client.get(url)
 
-    mock_task_result = MagicMock()
-    mock_task_result.state = "FAILURE"
-    mock_celery_app.AsyncResult.return_value = mock_task_result
+    # Assert
+    assert redis_client.exists(summary_status_key(content_hash)) == 0
 
-    mock_new_task = MagicMock()
-    mock_new_task.id = "retry-task-id-456"
-    mock_generate_summary.delay.return_value = mock_new_task
 
-    with patch("routes.documents.controller.storage.get_summary", return_value=None):
-        # Act
-        response = client.get(url)
+@patch("routes.documents.controller.generate_summary")
+def test_summarize_text_concurrent_requests_dispatch_once(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    test_text = f"Document requested by many clients at once ({uuid.uuid4()})"
+    document_ids = [
+        client.post(DOCUMENTS_URL, data={"text": test_text}).json()["document_id"]
+        for _ in range(4)
+    ]
+    requests = 32
+    barrier = threading.Barrier(requests)
+
+    def request_summary(i: int):
+        barrier.wait()
+        document_id = document_ids[i % len(document_ids)]
+        return client.get(f"{DOCUMENTS_URL}/{document_id}/summary")
 
-        # Assert
-        assert response.status_code == 202
-        expected_response = {
-            "document_id": document_id,
-            "message": "Summary generation started",
-            "task_id": "retry-task-id-456",
-            "status": "pending",
-        }
-        assert response.json() == expected_response
+    # Act
+    with ThreadPoolExecutor(max_workers=requests) as executor:
+        responses = list(executor.map(request_summary, range(requests)))
+
+    # Assert
+    assert all(response.status_code == 202 for response in responses)
+    assert len({response.json()["task_id"] for response in responses}) == 1
+    assert mock_generate_summary.apply_async.call_count == 1
+
+
+def test_summarize_text_duplicate_upload_reuses_summary(client: TestClient) -> None:
+    # Arrange
+    test_text = "Byte-identical report uploaded twice under different ids"
+    first_id = client.post(DOCUMENTS_URL, data={"text": test_text}).json()[
+        "document_id"
+    ]
+    second_id = client.post(DOCUMENTS_URL, data={"text": test_text}).json()[
+        "document_id"
+    ]
+    DocumentStorage().store_summary(first_id, "Shared summary")
+
+    # Act
+    response = client.get(f"{DOCUMENTS_URL}/{second_id}/summary")
+
+    # Assert
+    assert first_id != second_id
+    assert response.status_code == 200
+    assert response.json() == {"document_id": second_id, "summary": "Shared summary"}
+
+
+@patch("routes.documents.controller.generate_summary")
+def test_summarize_text_duplicate_upload_joins_in_flight_task(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    test_text = f"Duplicate upload while the first summary is running ({uuid.uuid4()})"
+    content_hash = hashlib.sha256(test_text.encode()).hexdigest()
+    client.post(DOCUMENTS_URL, data={"text": test_text})
+    second_id = client.post(DOCUMENTS_URL, data={"text": test_text}).json()[
+        "document_id"
+    ]
+    _set_status(content_hash, task_id="in-flight-task-id", state="PROGRESS")
 
-        mock_redis.delete.assert_called_once_with(f"summary_task:{document_id}")
+    # Act
+    response = client.get(f"{DOCUMENTS_URL}/{second_id}/summary")
 
-        mock_generate_summary.delay.assert_called_once_with(document_id, test_text)
-        mock_redis.setex.assert_called_with(
-            f"summary_task:{document_id}", 3600, "retry-task-id-456"
-        )
+    # Assert
+    assert response.status_code == 202
+    assert response.json()["task_id"] == "in-flight-task-id"
+    mock_generate_summary.apply_async.assert_not_called()
 
 
 def test_summarize_text_integration_flow(client: TestClient) -> None:
     # Arrange
+    # Summary tasks are keyed by content, so every run needs its own text.
     test_text = (
-        "This is a comprehensive integration test for the summarization API flow."
+        "This is a comprehensive integration test for the summarization API flow "
+        f"({uuid.uuid4()})."
     )
     store_response = client.post(DOCUMENTS_URL, data={"text": test_text})
     document_id = store_response.json()["document_id"]
@@ -254,22 +353,94 @@ def test_summarize_text_integration_flow(client: TestClient) -> None:
 
 
 @patch("routes.documents.controller.storage.get_summary")
-@patch("routes.documents.controller.get_text")
+@patch("routes.documents.controller.storage.get_metadata")
 def test_summarize_text_all_edge_cases(
-    mock_get_text, mock_get_summary, client: TestClient
+    mock_get_metadata, mock_get_summary, client: TestClient
 ) -> None:
     document_id = "test-doc-id"
     url = f"{DOCUMENTS_URL}/{document_id}/summary"
 
-    mock_get_text.side_effect = FileNotFoundError()
+    mock_get_metadata.return_value = None
     response = client.get(url)
     assert response.status_code == 404
-    assert response.json() == {"message": "Document not found"}
+    assert response.json() == {
+        "detail": f"Document with document_id={document_id} does not exists"
+    }
 
-    mock_get_text.side_effect = None
-    mock_get_text.return_value = "Test text"
+    mock_get_metadata.return_value = {"content_hash": "test-hash"}
 
     mock_get_summary.return_value = "Existing summary"
     response = client.get(url)
     assert response.status_code == 200
     assert response.json()["summary"] == "Existing summary"
+
+
+@patch("routes.documents.controller.generate_summary")
+def test_summarize_text_extractive_mode_is_synchronous(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    test_text = (
+        f"Extractive summaries need no model ({uuid.uuid4()}). "
+        "They pick the most central sentences. "
+        "Sentences are scored with TextRank. "
+        "The result comes back at once."
+    )
+    document_id = client.post(DOCUMENTS_URL, data={"text": test_text}).json()[
+        "document_id"
+    ]
+
+    # Act
+    response = client.get(f"{DOCUMENTS_URL}/{document_id}/summary?mode=extractive")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["mode"] == "extractive"
+    assert 0 < len(response.json()["summary"]) < len(test_text)
+    mock_generate_summary.apply_async.assert_not_called()
+
+
+@patch("routes.documents.controller.generate_summary")
+def test_summarize_text_pending_response_carries_provisional_summary(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    document_id, _ = _store_unique_document(client)
+
+    # Act
+    response = client.get(f"{DOCUMENTS_URL}/{document_id}/summary?provisional=true")
+
+    # Assert
+    assert response.status_code == 202
+    assert response.json()["provisional_summary"].startswith("Test document")
+    mock_generate_summary.apply_async.assert_called_once()
+
+
+def test_summarize_text_rejects_unknown_mode(client: TestClient) -> None:
+    # Arrange
+    document_id, _ = _store_unique_document(client)
+
+    # Act
+    response = client.get(f"{DOCUMENTS_URL}/{document_id}/summary?mode=poetic")
+
+    # Assert
+    assert response.status_code == 422
+
+
+def test_summarize_text_stored_summary_revalidates_with_etag(
+    client: TestClient,
+) -> None:
+    # Arrange
+    document_id, _ = _store_unique_document(client)
+    DocumentStorage().store_summary(document_id, "Stored summary")
+    url = f"{DOCUMENTS_URL}/{document_id}/summary"
+    etag = client.get(url).headers["ETag"]
+
+    # Act
+    with patch("routes.documents.controller.storage.get_summary") as mock_get_summary:
+        response = client.get(url, headers={"If-None-Match": etag})
+
+    # Assert
+    assert etag == f'"{DocumentStorage.hash_content("Stored summary")}"'
+    assert response.status_code == 304
+    mock_get_summary.assert_not_called()
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from core.celery import redis_client
+from routes.documents.events import publish_summary_event
+from routes.documents.storage import DocumentStorage
+from routes.documents.summary_status import (
+    summary_status_key,
+    update_summary_status,
+)
+
+DOCUMENTS_URL = "/documents"
+
+
+def _store_unique_document(client: TestClient) -> tuple[str, str]:
+    # Summary tasks are keyed by content, so every run needs its own text.
+    text = f"Document awaiting its summary ({uuid.uuid4()})"
+    document_id = client.post(DOCUMENTS_URL, data={"text": text}).json()["document_id"]
+    return document_id, hashlib.sha256(text.encode()).hexdigest()
+
+
+def _publish_later(delay: float, content_hash: str, event: dict, summary=None):
+    def publish():
+        if summary is not None:
+            DocumentStorage().store_summary(event["document_id"], summary)
+        # Like the worker, update the status hash before announcing it.
+        task_id = redis_client.hget(summary_status_key(content_hash), "task_id")
+        fields = {name: value for name, value in event.items() if name != "document_id"}
+        update_summary_status(redis_client, content_hash, task_id, fields)
+        publish_summary_event(redis_client, content_hash, event)
+
+    timer = threading.Timer(delay, publish)
+    timer.start()
+    return timer
+
+
+def _read_events(response) -> list[tuple[str, dict]]:
+    events = []
+    name = None
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            name = line.removeprefix("event: ")
+        elif line.startswith("data: "):
+            events.append((name, json.loads(line.removeprefix("data: "))))
+    return events
+
+
+@patch("routes.documents.controller.generate_summary")
+def test_summarize_text_wait_returns_when_summary_is_stored(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    document_id, content_hash = _store_unique_document(client)
+    timer = _publish_later(
+        0.3,
+        content_hash,
+        {"document_id": document_id, "state": "SUCCESS"},
+        summary="Pushed summary",
+    )
+
+    # Act
+    started = time.monotonic()
+    response = client.get(f"{DOCUMENTS_URL}/{document_id}/summary?wait=10")
+    elapsed = time.monotonic() - started
+    timer.join()
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {"document_id": document_id, "summary": "Pushed summary"}
+    assert elapsed < 5
+
+
+@patch("routes.documents.controller.generate_summary")
+def test_summarize_text_wait_times_out_with_pending_status(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    document_id, _ = _store_unique_document(client)
+
+    # Act
+    started = time.monotonic()
+    response = client.get(f"{DOCUMENTS_URL}/{document_id}/summary?wait=0.2")
+    elapsed = time.monotonic() - started
+
+    # Assert
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+    assert elapsed >= 0.2
+
+
+def test_summarize_text_wait_is_bounded(client: TestClient) -> None:
+    # Arrange
+    document_id, _ = _store_unique_document(client)
+
+    # Act
+    response = client.get(f"{DOCUMENTS_URL}/{document_id}/summary?wait=3600")
+
+    # Assert
+    assert response.status_code == 422
+
+
+@patch("routes.documents.controller.generate_summary")
+def test_stream_summary_events_until_summary(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    document_id, content_hash = _store_unique_document(client)
+    timers = [
+        _publish_later(
+            0.2,
+            content_hash,
+            {"document_id": document_id, "state": "PROGRESS", "status": "Loading"},
+        ),
+        _publish_later(
+            0.4,
+            content_hash,
+            {"document_id": document_id, "state": "SUCCESS"},
+            summary="Streamed summary",
+        ),
+    ]
+
+    # Act
+    with client.stream("GET", f"{DOCUMENTS_URL}/{document_id}/summary/events") as r:
+        content_type = r.headers["content-type"]
+        events = _read_events(r)
+    for timer in timers:
+        timer.join()
+
+    # Assert
+    assert content_type.startswith("text/event-stream")
+    assert [name for name, _ in events] == ["status", "status", "summary"]
+    assert events[0][1]["message"] == "Summary generation started"
+    assert events[-1][1] == {"document_id": document_id, "summary": "Streamed summary"}
+
+
+@patch("routes.documents.controller.generate_summary")
+def test_stream_summary_events_reports_failure(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    document_id, content_hash = _store_unique_document(client)
+    timer = _publish_later(
+        0.2,
+        content_hash,
+        {"document_id": document_id, "state": "FAILURE", "error": "boom"},
+    )
+
+    # Act
+    with client.stream("GET", f"{DOCUMENTS_URL}/{document_id}/summary/events") as r:
+        events = _read_events(r)
+    timer.join()
+
+    # Assert
+    assert [name for name, _ in events] == ["status", "error"]
+    assert events[-1][1]["error"] == "boom"
+
+
+@patch("routes.documents.controller.SUMMARY_EVENTS_MAX_SECONDS", 0.3)
+@patch("routes.documents.controller.SUMMARY_EVENTS_KEEPALIVE", 0.05)
+@patch("routes.documents.controller.generate_summary")
+def test_stream_summary_events_sends_unchanged_status_once_and_ends(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    document_id, _ = _store_unique_document(client)
+
+    # Act
+    with client.stream("GET", f"{DOCUMENTS_URL}/{document_id}/summary/events") as r:
+        lines = list(r.iter_lines())
+
+    # Assert
+    assert [line for line in lines if line.startswith("event: ")] == ["event: status"]
+    assert ": keep-alive" in lines
+    mock_generate_summary.apply_async.assert_called_once()
+
+
+@patch("routes.documents.controller.SUMMARY_EVENTS_KEEPALIVE", 0.05)
+@patch("routes.documents.controller.generate_summary")
+def test_stream_summary_events_ends_when_status_expires(
+    mock_generate_summary, client: TestClient
+) -> None:
+    # Arrange
+    document_id, content_hash = _store_unique_document(client)
+    timer = threading.Timer(
+        0.2, redis_client.delete, args=(summary_status_key(content_hash),)
+    )
+    timer.start()
+
+    # Act
+    with client.stream("GET", f"{DOCUMENTS_URL}/{document_id}/summary/events") as r:
+        events = _read_events(r)
+    timer.join()
+
+    # Assert
+    assert [name for name, _ in events] == ["status", "error"]
+    assert events[-1][1]["state"] == "EXPIRED"
+    mock_generate_summary.apply_async.assert_called_once()
+
+
+def test_stream_summary_events_document_not_found(client: TestClient) -> None:
+    # Act
+    response = client.get(f"{DOCUMENTS_URL}/non-existent-doc/summary/events")
+
+    # Assert
+    assert response.status_code == 404
@@ -0,0 +1,306 @@
+import json
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+from celery.exceptions import ChordError
+
+import celery_worker
+from core.celery import celery_app, redis_client
+from routes.documents.events import summary_events_channel
+from routes.documents.exceptions import DocumentDoesNotExistsError
+from routes.documents.summary_status import summary_status_key
+
+pytestmark = pytest.mark.usefixtures("chunk_summary_cache_keys")
+
+API_PATH = Path(__file__).parents[1]
+
+
+@pytest.fixture
+def eager_celery():
+    celery_app.conf.task_always_eager = True
+    yield
+    celery_app.conf.task_always_eager = False
+
+
+@patch("celery_worker.storage")
+@patch("celery_worker.SUMMARY_CHUNKS_PER_TASK", 2)
+@patch("celery_worker.SUMMARY_DISTRIBUTED_MIN_CHUNKS", 2)
+@patch("celery_worker.SUMMARY_DISTRIBUTED", True)
+def test_generate_summary_distributed_map_reduce(
+    mock_storage, fake_summarizer: MagicMock, eager_celery
+) -> None:
+    # Arrange
+    document_id = "distributed-doc"
+    text = " ".join(f"w{i}" for i in range(600))
+    mock_storage.get_document.return_value = text
+
+    with patch.object(
+        celery_worker.model_registry, "get_summarizer", return_value=fake_summarizer
+    ):
+        # Act
+        result = celery_worker.generate_summary.apply(args=(document_id,)).get()
+
+    # Assert
+    assert result == {
+        "document_id": document_id,
+        "summary": "final",
+        "status": "completed",
+    }
+    batch_calls = [
+        call
+        for call in fake_summarizer.call_args_list
+        if isinstance(call.args[0], list)
+    ]
+    assert len(batch_calls) > 1
+    assert all(len(call.args[0]) <= 2 for call in batch_calls)
+    mock_storage.store_summary.assert_called_once_with(document_id, "final")
+
+
+@patch("celery_worker.storage")
+def test_generate_summary_reads_text_from_storage(
+    mock_storage, fake_summarizer: MagicMock, eager_celery
+) -> None:
+    # Arrange
+    document_id = "stored-doc"
+    mock_storage.get_document.return_value = "A short stored document"
+
+    with patch.object(
+        celery_worker.model_registry, "get_summarizer", return_value=fake_summarizer
+    ):
+        # Act
+        result = celery_worker.generate_summary.apply(args=(document_id,)).get()
+
+    # Assert
+    assert result["summary"] == "final"
+    mock_storage.get_document.assert_called_once_with(document_id)
+    assert fake_summarizer.call_args.args[0] == "A short stored document"
+
+
+@patch("celery_worker.storage")
+def test_generate_summary_announces_progress_and_completion(
+    mock_storage, fake_summarizer: MagicMock, eager_celery
+) -> None:
+    # Arrange
+    document_id = "published-doc"
+    mock_storage.get_document.return_value = "A short stored document"
+    mock_storage.get_content_hash.return_value = f"hash-{uuid.uuid4()}"
+    pubsub = redis_client.pubsub()
+    pubsub.subscribe(summary_events_channel(mock_storage.get_content_hash.return_value))
+
+    with patch.object(
+        celery_worker.model_registry, "get_summarizer", return_value=fake_summarizer
+    ):
+        # Act
+        celery_worker.generate_summary.apply(args=(document_id,)).get()
+
+    # Assert
+    states = []
+    while message := pubsub.get_message(timeout=1):
+        if message["type"] == "message":
+            states.append(json.loads(message["data"])["state"])
+    pubsub.close()
+    assert states[0] == "PROGRESS"
+    assert states[-1] == "SUCCESS"
+    status = redis_client.hgetall(
+        summary_status_key(mock_storage.get_content_hash.return_value)
+    )
+    assert status["state"] == "SUCCESS"
+    assert status["summary"] == "final"
+
+
+@patch("celery_worker.storage")
+def test_generate_summary_resumes_from_checkpointed_chunks(
+    mock_storage, fake_summarizer: MagicMock, eager_celery
+) -> None:
+    # Arrange
+    document_id = "resumed-doc"
+    content_hash = f"hash-{uuid.uuid4()}"
+    text = " ".join(f"w{i}" for i in range(600))
+    mock_storage.get_document.return_value = text
+    mock_storage.get_content_hash.return_value = content_hash
+
+    with patch.object(
+        celery_worker.model_registry, "get_summarizer", return_value=fake_summarizer
+    ):
+        batcher = celery_worker.model_registry.get_batcher()
+        checkpoint = celery_worker._chunk_checkpoint(document_id, batcher)
+        checkpoint.save({0: "saved-0", 1: "saved-1"})
+
+        # Act
+        result = celery_worker.generate_summary.apply(args=(document_id,)).get()
+
+    # Assert
+    assert result["summary"] == "final"
+    chunk_inputs = [
+        text
+        for call in fake_summarizer.call_args_list
+        for text in (call.args[0] if isinstance(call.args[0], list) else [])
+    ]
+    assert chunk_inputs
+    assert not any(chunk.startswith("w0 ") for chunk in chunk_inputs)
+    combined = fake_summarizer.call_args_list[-1].args[0]
+    assert combined.startswith("saved-0 saved-1 chunk")
+    assert checkpoint.load() == {}
+    status = redis_client.hgetall(summary_status_key(content_hash))
+    assert status["chunks_done"] == status["chunks_total"]
+
+
+@patch("celery_worker.storage")
+def test_generate_summary_reuses_chunk_summaries_across_documents(
+    mock_storage, fake_summarizer: MagicMock, eager_celery
+) -> None:
+    # Arrange
+    boilerplate = " ".join(f"w{i}" for i in range(600))
+    first_hash, second_hash = f"hash-{uuid.uuid4()}", f"hash-{uuid.uuid4()}"
+
+    def chunk_inputs() -> list[str]:
+        return [
+            text
+            for call in fake_summarizer.call_args_list
+            for text in (call.args[0] if isinstance(call.args[0], list) else [])
+        ]
+
+    with patch.object(
+        celery_worker.model_registry, "get_summarizer", return_value=fake_summarizer
+    ):
+        mock_storage.get_document.return_value = f"{boilerplate} first ending"
+        mock_storage.get_content_hash.return_value = first_hash
+        celery_worker.generate_summary.apply(args=("first-doc",)).get()
+        first_inputs = chunk_inputs()
+        fake_summarizer.reset_mock()
+
+        # Act
+        mock_storage.get_document.return_value = f"{boilerplate} second ending"
+        mock_storage.get_content_hash.return_value = second_hash
+        result = celery_worker.generate_summary.apply(args=("second-doc",)).get()
+
+    # Assert
+    assert result["summary"] == "final"
+    assert len(chunk_inputs()) < len(first_inputs)
+    assert all(chunk.endswith("second ending") for chunk in chunk_inputs())
+    status = redis_client.hgetall(summary_status_key(second_hash))
+    assert int(status["chunks_cached"]) == len(first_inputs) - len(chunk_inputs())
+    assert 0 < float(status["chunk_cache_hit_rate"]) < 1
+
+
+def test_chunk_eta_ignores_cached_chunks() -> None:
+    # Arrange
+    started = celery_worker.time.monotonic() - 10
+
+    with patch("celery_worker._report_progress") as mock_report_progress:
+        # Act
+        celery_worker._report_chunk_progress(
+            MagicMock(), "doc", 4, 8, started, processed=4, cached=2
+        )
+
+    # Assert
+    progress = mock_report_progress.call_args.kwargs
+    assert progress["eta_seconds"] == pytest.approx(20, abs=0.5)
+    assert progress["chunk_cache_hit_rate"] == 0.5
+
+
+@patch("celery_worker.storage")
+def test_failed_map_task_marks_summary_failed(mock_storage) -> None:
+    # Arrange
+    content_hash = f"hash-{uuid.uuid4()}"
+    task_id = str(uuid.uuid4())
+    mock_storage.get_content_hash.return_value = content_hash
+    reduce = celery_worker._map_reduce(
+        "mapped-doc", [celery_worker.summarize_span_batch.s("mapped-doc", [[0, 5]])]
+    ).body
+    reduce.freeze(task_id)
+
+    # Act
+    try:
+        raise ChordError("map task failed")
+    except ChordError as e:
+        celery_app.backend.chord_error_from_stack(reduce, e)
+
+    # Assert
+    status = redis_client.hgetall(summary_status_key(content_hash))
+    assert status["task_id"] == task_id
+    assert status["state"] == "FAILURE"
+    assert status["error"] == "map task failed"
+
+
+@patch("celery_worker.storage")
+def test_span_batch_of_deleted_document_fails(
+    mock_storage, fake_summarizer: MagicMock
+) -> None:
+    # Arrange
+    mock_storage.get_document.return_value = None
+    mock_storage.get_content_hash.return_value = None
+
+    with patch.object(
+        celery_worker.model_registry, "get_summarizer", return_value=fake_summarizer
+    ):
+        # Act / Assert
+        with pytest.raises(DocumentDoesNotExistsError):
+            celery_worker.summarize_span_batch("deleted-doc", [[0, 5]])
+
+
+@patch("celery_worker.SUMMARY_PRELOAD_MODEL", True)
+@patch("celery_worker.inference.available_cpus", return_value=8)
+@patch("celery_worker.inference.set_torch_threads")
+def test_prefork_worker_preloads_and_splits_torch_threads(
+    mock_set_threads, mock_cpus, monkeypatch
+) -> None:
+    # Arrange
+    monkeypatch.setattr(celery_worker, "_child_torch_threads", None)
+    monkeypatch.setattr(celery_worker.model_registry, "batch_window_seconds", 0.02)
+    worker = SimpleNamespace(pool_cls="prefork", concurrency=4)
+
+    with patch.object(celery_worker.model_registry, "preload") as mock_preload:
+        with patch.object(celery_worker.model_registry, "warm_up"):
+            # Act
+            celery_worker.prepare_worker(sender=worker)
+            celery_worker.warm_up_model()
+
+    # Assert
+    mock_preload.assert_called_once()
+    assert mock_set_threads.call_args_list == [call(1), call(2)]
+    assert celery_worker.model_registry.batch_window_seconds == 0
+
+
+@patch("celery_worker.SUMMARY_PRELOAD_MODEL", True)
+@patch("celery_worker.inference.available_cpus", return_value=8)
+@patch("celery_worker.inference.set_torch_threads")
+def test_thread_pool_worker_uses_every_cpu_without_preloading(
+    mock_set_threads, mock_cpus, monkeypatch
+) -> None:
+    # Arrange
+    monkeypatch.setattr(celery_worker, "_child_torch_threads", None)
+    monkeypatch.setattr(celery_worker.model_registry, "batch_window_seconds", 0.02)
+    worker = SimpleNamespace(pool_cls="threads", concurrency=8)
+
+    with patch.object(celery_worker.model_registry, "preload") as mock_preload:
+        with patch.object(celery_worker.model_registry, "warm_up") as mock_warm_up:
+            # Act
+            celery_worker.prepare_worker(sender=worker)
+
+    # Assert
+    mock_preload.assert_not_called()
+    mock_warm_up.assert_called_once()
+    mock_set_threads.assert_called_once_with(8)
+    assert celery_worker.model_registry.batch_window_seconds == 0.02
+
+
+def test_importing_worker_opens_no_storage(tmp_path: Path) -> None:
+    # Act
+    completed = subprocess.run(
+        [sys.executable, "-c", "import celery_worker"],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(API_PATH)},
+        capture_output=True,
+        text=True,
+    )
+
+    # Assert
+    assert completed.returncode == 0, completed.stderr
+    assert not (tmp_path / "document_storage").exists()
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from core.tasks import GENERATE_SUMMARY
+
+API_PATH = Path(__file__).parents[1]
+
+
+def _run_python(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=API_PATH,
+        env={**os.environ, "API_FORBID_ML_IMPORTS": "true"},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def test_api_process_does_not_import_the_ml_stack() -> None:
+    # Act
+    completed = _run_python(
+        "import sys, main; "
+        "print(sorted(m for m in ('torch', 'transformers') if m in sys.modules))"
+    )
+
+    # Assert
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == "[]"
+
+
+def test_api_process_refuses_to_import_the_worker() -> None:
+    # Act
+    completed = _run_python("import main, celery_worker")
+
+    # Assert
+    assert completed.returncode != 0
+    assert "must not be imported in the API process" in completed.stderr
+
+
+def test_api_refuses_to_start_with_torch_loaded() -> None:
+    # Act
+    completed = _run_python("import torch, main")
+
+    # Assert
+    assert completed.returncode != 0
+    assert "RuntimeError: The API process must not load torch" in completed.stderr
+
+
+def test_task_signature_matches_registered_worker_task() -> None:
+    import celery_worker
+
+    assert celery_worker.generate_summary.name == GENERATE_SUMMARY
@@ -0,0 +1,24 @@
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+def test_metrics_endpoint_exposes_prometheus_text() -> None:
+    with TestClient(app) as client:
+        # Arrange
+        document_id = client.post("/documents", data={"text": "Metrics text"}).json()[
+            "document_id"
+        ]
+        client.get(f"/documents/{document_id}")
+
+        # Act
+        response = client.get("/metrics")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE summary_stage_seconds histogram" in response.text
+    assert 'document_cache_lookups_total{result="miss"}' in response.text
+    assert 'document_storage_read_seconds_bucket{object="text",le="+Inf"}' in (
+        response.text
+    )